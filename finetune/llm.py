@@ -2,8 +2,11 @@
 
 import json
 import os
+import time
 import urllib.request
 
+import response_cache
+
 BASE_URL = os.environ.get("LLM_BASE_URL", "http://localhost:9292/v1")
 
 
@@ -14,28 +17,51 @@ def chat(
     max_tokens: int = 2048,
     response_schema: dict | None = None,
     timeout: int = 600,
+    cache_prompt: bool = True,
+    slot: int | None = None,
+    use_cache: bool = True,
 ) -> str:
     """One chat completion; returns the assistant message content.
 
     response_schema enables llama.cpp schema-constrained (GBNF) decoding via
     the OpenAI-compatible response_format json_schema field.
+
+    cache_prompt lets llama-server reuse the KV cache for the prefix this
+    prompt shares with the slot's previous one. Every extraction call starts
+    with the same system message, so only the transcript is prefilled. slot
+    pins the request to one llama-server slot (id_slot), keeping that prefix
+    resident when --parallel > 1.
+
+    Calls at temperature <= response_cache.MAX_TEMPERATURE are answered from
+    the shared response cache when an identical request was made before;
+    use_cache=False (or LLM_CACHE=0) always asks the model.
     """
     body: dict = {
         "model": model,
         "messages": messages,
         "temperature": temperature,
         "max_tokens": max_tokens,
+        "cache_prompt": cache_prompt,
     }
+    if slot is not None:
+        body["id_slot"] = slot
     if response_schema is not None:
         body["response_format"] = {
             "type": "json_schema",
             "json_schema": {"name": "extraction", "strict": True, "schema": response_schema},
         }
+    cache = response_cache.get_cache() if use_cache else None
+    cached = cache.get(body) if cache else None
+    if cached is not None:
+        return cached[0]["choices"][0]["message"]["content"]
     req = urllib.request.Request(
         f"{BASE_URL}/chat/completions",
         data=json.dumps(body).encode(),
         headers={"Content-Type": "application/json"},
     )
+    t0 = time.perf_counter()
     with urllib.request.urlopen(req, timeout=timeout) as resp:
         data = json.loads(resp.read())
+    if cache:
+        cache.put(body, data, time.perf_counter() - t0)
     return data["choices"][0]["message"]["content"]
@@ -0,0 +1,145 @@
+"""Content-addressed cache of chat completion responses (SQLite, stdlib only).
+
+Shared by llm.chat (teacher labeling), benchmark_extraction.py and
+judge_extraction.py. The key is a digest of the request body minus transport
+fields: model, messages, response_format schema and sampling parameters. So
+re-running a report after a code change only pays for the requests that
+actually changed.
+
+Only calls at temperature <= MAX_TEMPERATURE are cached: the 0.0 judge and
+the 0.2 extraction/labeling condition. Sampled generation (synthetic memos at
+0.7-1.0) relies on retries producing different text and always goes to the
+model.
+
+benchmark_extraction.py only reads it with --use-cache, since a hit replaces
+a timing. Opt out with LLM_CACHE=0, or with the judge's --no-cache. Inspect or
+trim with:
+    python response_cache.py stats
+    python response_cache.py clear --model qwen3-4b
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+ENABLED = os.environ.get("LLM_CACHE", "1").lower() not in ("0", "false", "off", "no")
+CACHE_PATH = Path(os.environ.get(
+    "LLM_CACHE_PATH", Path.home() / ".cache" / "lima" / "llm-responses.sqlite"))
+MAX_TEMPERATURE = 0.2
+
+# Request fields that change how the response is delivered, not what it is.
+TRANSPORT_FIELDS = ("stream", "stream_options", "cache_prompt", "id_slot")
+
+
+def request_key(body: dict) -> str:
+    content = {k: v for k, v in body.items() if k not in TRANSPORT_FIELDS}
+    canonical = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def cacheable(body: dict) -> bool:
+    return body.get("temperature", 1.0) <= MAX_TEMPERATURE
+
+
+class ResponseCache:
+    """SQLite-backed response store with per-process hit/miss counters.
+
+    One connection shared across threads behind a lock (the benchmark's
+    thread fallback calls in concurrently); WAL lets a judge and a benchmark
+    share the file.
+    """
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, response TEXT, latency_s REAL,"
+            " created REAL, hits INTEGER DEFAULT 0)")
+        self._db.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, body: dict) -> tuple[dict, float] | None:
+        """(response JSON, latency of the original call) for a cached request."""
+        if not cacheable(body):
+            return None
+        key = request_key(body)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, latency_s FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE responses SET hits = hits + 1 WHERE key = ?", (key,))
+            self._db.commit()
+        return json.loads(row[0]), row[1]
+
+    def put(self, body: dict, response: dict, latency_s: float | None = None) -> None:
+        if not cacheable(body):
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, latency_s, created)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (request_key(body), body.get("model"), json.dumps(response, ensure_ascii=False),
+                 latency_s, time.time()))
+            self._db.commit()
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = f" ({self.hits / total:.0%} hit rate)" if total else ""
+        return f"response cache: {self.hits} hits, {self.misses} misses{rate} [{self.path}]"
+
+
+_shared: ResponseCache | None = None
+_shared_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache | None:
+    """The process-wide cache, or None when ENABLED is off."""
+    global _shared
+    if not ENABLED:
+        return None
+    with _shared_lock:
+        if _shared is None:
+            _shared = ResponseCache()
+    return _shared
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or trim the LLM response cache")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--model", help="limit clear to one model")
+    args = parser.parse_args()
+
+    if not CACHE_PATH.exists():
+        print(f"no cache at {CACHE_PATH}")
+        return
+    db = sqlite3.connect(CACHE_PATH)
+    if args.command == "clear":
+        if args.model:
+            deleted = db.execute("DELETE FROM responses WHERE model = ?", (args.model,)).rowcount
+        else:
+            deleted = db.execute("DELETE FROM responses").rowcount
+        db.commit()
+        print(f"deleted {deleted} responses")
+        return
+    print(f"{CACHE_PATH}")
+    for model, rows, hits in db.execute(
+            "SELECT model, COUNT(*), SUM(hits) FROM responses GROUP BY model ORDER BY model"):
+        print(f"  {model}: {rows} responses, {hits} hits served")
+
+
+if __name__ == "__main__":
+    main()
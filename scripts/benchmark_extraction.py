@@ -15,12 +15,42 @@ Content quality scoring is a separate pass: judge_extraction.py (LLM judge
 from a different model family). This script produces outputs + code-grade
 (mechanical field-discipline checks) + timing.
 
+--concurrency N keeps N requests in flight (match llama-server --parallel) and
+adds aggregate throughput (memos/min, total tok/s) to the report; per-record
+latency still covers only that request's own time on the wire.
+
+--stream requests SSE responses and splits each record's latency into
+time-to-first-token and the decode phase: ttft_s, prefill_tokens_per_s and
+decode_tokens_per_s (from llama-server's own timings when it sends them).
+Long AMI chunks are prefill-bound and short memos decode-bound, so each
+condition also carries p50/p90/p99 summaries overall and per slice.
+
+Every request sets llama.cpp's cache_prompt, so the system message and user
+template header shared by all memos stay in the slot's KV cache between
+requests. --prefix-cache adds a per-model condition measuring what that
+saves: the eval records run again with the cache off, then with the prefix
+pinned in slot PREFIX_SLOT (restored from llama-server's --slot-save-path when
+a saved copy exists), comparing evaluated prompt tokens, prefill ms and TTFT.
+
+Every request hits the model by default, so timings are always measured.
+--use-cache routes non-streamed extractions through the shared response cache
+(finetune/response_cache.py), so re-running after a grading or report change
+only calls the model for requests that changed. Cached rows keep the timing
+of the call that produced them and are flagged "cached"; latency and
+throughput aggregates count live rows only, and compare_benchmarks.py skips
+them. The cold-start probe, --stream and --prefix-cache always hit the model.
+
 Usage:
     uv run benchmark_extraction.py --models qwen3-coder-30b,qwen3-8b
     uv run benchmark_extraction.py --models qwen3-4b --slices real,stt
+    uv run benchmark_extraction.py --models lima-extractor-4b --concurrency 4
+    uv run benchmark_extraction.py --models qwen3-4b --stream
+    uv run benchmark_extraction.py --models qwen3-4b --slices stt --prefix-cache
 """
 
 import argparse
+import asyncio
+import hashlib
 import json
 import re
 import subprocess
@@ -32,8 +62,14 @@ from pathlib import Path
 
 import requests
 
+try:
+    import httpx  # optional: native async client; otherwise requests in worker threads
+except ImportError:
+    httpx = None
+
 sys.path.insert(0, str(Path(__file__).parent.parent / "finetune"))
 import extraction_task  # noqa: E402
+import response_cache  # noqa: E402
 
 from system_info import get_system_info  # noqa: E402
 
@@ -48,6 +84,13 @@ SLICES = {
 
 TEMPERATURE = 0.2  # matches the teacher-labeling condition
 
+PERCENTILES = (50, 90, 99)
+# Per-record metrics summarized per condition; the last three only exist with --stream.
+SUMMARY_METRICS = ("latency_s", "tokens_per_s", "ttft_s", "prefill_tokens_per_s", "decode_tokens_per_s")
+
+# llama-server slot the --prefix-cache condition pins the shared prompt prefix to.
+PREFIX_SLOT = 0
+
 
 def load_jsonl(path: Path) -> list[dict]:
     with path.open() as f:
@@ -73,31 +116,208 @@ def unload_all(swap_root: str):
         print(f"  warning: unload failed: {e}")
 
 
-def extract(base_url: str, model: str, transcript: str) -> tuple[dict, dict]:
+def request_body(model: str, transcript: str, cache_prompt: bool = True,
+                 slot: int | None = None) -> dict:
+    body = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": extraction_task.SYSTEM_MESSAGE},
+            {"role": "user",
+             "content": extraction_task.USER_TEMPLATE.format(transcript=transcript)},
+        ],
+        "temperature": TEMPERATURE,
+        "max_tokens": 2048,
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "extraction", "strict": True,
+                            "schema": extraction_task.SCHEMA},
+        },
+        # reuse the KV cache for the longest common prefix with the slot's last
+        # prompt: the system message and template header are identical per memo
+        "cache_prompt": cache_prompt,
+    }
+    if slot is not None:
+        body["id_slot"] = slot
+    return body
+
+
+def prefix_digest() -> str:
+    """Short hash of the shared prompt prefix; names the saved slot file."""
+    prefix = extraction_task.SYSTEM_MESSAGE + extraction_task.USER_TEMPLATE
+    return hashlib.sha256(prefix.encode()).hexdigest()[:12]
+
+
+def pin_prefix(base_url: str, swap_root: str, model: str, slot: int = PREFIX_SLOT) -> str:
+    """Put the extraction prompt prefix into `slot`'s KV cache.
+
+    Restores a previously saved copy when llama-server runs with
+    --slot-save-path (the /slots API, reached through llama-swap's /upstream
+    passthrough); otherwise evaluates the prefix once and tries to save it.
+    Returns "restored", "saved" or "evaluated".
+    """
+    slot_url = f"{swap_root}/upstream/{model}/slots/{slot}"
+    filename = f"{model}-extraction-{prefix_digest()}.bin"
+    try:
+        if requests.post(slot_url, params={"action": "restore"},
+                         json={"filename": filename}, timeout=60).ok:
+            return "restored"
+    except requests.RequestException:
+        pass
+    body = request_body(model, "", slot=slot)
+    body.pop("response_format")  # the grammar doesn't touch the KV cache
+    body["max_tokens"] = 1
+    requests.post(f"{base_url}/chat/completions", json=body, timeout=600).raise_for_status()
+    try:
+        if requests.post(slot_url, params={"action": "save"},
+                         json={"filename": filename}, timeout=60).ok:
+            return "saved"
+    except requests.RequestException:
+        pass
+    return "evaluated"
+
+
+def cache_lookup(body: dict) -> tuple[dict, dict] | None:
+    cache = response_cache.get_cache()
+    hit = cache.get(body) if cache else None
+    if hit is None:
+        return None
+    output, info = parse_response(*hit)
+    info["cached"] = True
+    return output, info
+
+
+def cache_store(body: dict, data: dict, latency: float) -> None:
+    cache = response_cache.get_cache()
+    if cache:
+        cache.put(body, data, latency)
+
+
+def extract(base_url: str, model: str, transcript: str,
+            use_cache: bool = True) -> tuple[dict, dict]:
     """One extraction call. Returns (parsed_output, timing/usage info)."""
+    body = request_body(model, transcript)
+    hit = cache_lookup(body) if use_cache else None
+    if hit is not None:
+        return hit
     t0 = time.perf_counter()
-    resp = requests.post(
-        f"{base_url}/chat/completions",
-        json={
-            "model": model,
-            "messages": [
-                {"role": "system", "content": extraction_task.SYSTEM_MESSAGE},
-                {"role": "user",
-                 "content": extraction_task.USER_TEMPLATE.format(transcript=transcript)},
-            ],
-            "temperature": TEMPERATURE,
-            "max_tokens": 2048,
-            "response_format": {
-                "type": "json_schema",
-                "json_schema": {"name": "extraction", "strict": True,
-                                "schema": extraction_task.SCHEMA},
-            },
-        },
-        timeout=600,
-    )
+    resp = requests.post(f"{base_url}/chat/completions", json=body, timeout=600)
+    resp.raise_for_status()
+    latency = time.perf_counter() - t0
+    data = resp.json()
+    if use_cache:
+        cache_store(body, data, latency)
+    return parse_response(data, latency)
+
+
+def stream_body(model: str, transcript: str, cache_prompt: bool = True,
+                slot: int | None = None) -> dict:
+    # include_usage adds a final chunk with token counts; llama-server also
+    # attaches its prompt/predicted timings to the last content chunk
+    return {**request_body(model, transcript, cache_prompt, slot),
+            "stream": True, "stream_options": {"include_usage": True}}
+
+
+class StreamReader:
+    """Accumulates one SSE chat completion and notes when the first token arrived."""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.first_token: float | None = None
+        self.parts: list[str] = []
+        self.usage: dict = {}
+        self.timings: dict = {}
+
+    def feed(self, line: str) -> None:
+        if not line.startswith("data:"):
+            return
+        payload = line[len("data:"):].strip()
+        if payload == "[DONE]":
+            return
+        chunk = json.loads(payload)
+        self.usage = chunk.get("usage") or self.usage
+        self.timings = chunk.get("timings") or self.timings
+        for choice in chunk.get("choices", []):
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                if self.first_token is None:
+                    self.first_token = time.perf_counter()
+                self.parts.append(content)
+
+    def finish(self) -> tuple[dict, dict]:
+        latency = time.perf_counter() - self.started
+        output, info = parse_response(
+            {"choices": [{"message": {"content": "".join(self.parts)}}], "usage": self.usage}, latency)
+        ttft = (self.first_token or time.perf_counter()) - self.started
+        if info["prompt_tokens"] is None:
+            info["prompt_tokens"] = self.timings.get("prompt_n")
+        if not info["completion_tokens"]:
+            info["completion_tokens"] = self.timings.get("predicted_n", 0)
+        info["ttft_s"] = round(ttft, 3)
+        if self.timings.get("prompt_per_second") and self.timings.get("predicted_per_second"):
+            # server-side: excludes HTTP/SSE overhead, and prompt_n counts only
+            # the tokens actually evaluated (not those reused from the KV cache)
+            info["prefill_tokens_per_s"] = round(self.timings["prompt_per_second"], 1)
+            info["decode_tokens_per_s"] = round(self.timings["predicted_per_second"], 1)
+            info["phase_timing"] = "server"
+            # prompt tokens actually run through the model; the rest came from the KV cache
+            info["prompt_evaluated"] = self.timings.get("prompt_n")
+            info["prompt_ms"] = round(self.timings.get("prompt_ms", 0), 1)
+        else:
+            # client-side: prefill ends at the first token, decode covers the rest
+            prompt, completion = info["prompt_tokens"], info["completion_tokens"]
+            info["prefill_tokens_per_s"] = round(prompt / ttft, 1) if prompt and ttft > 0 else None
+            decode_s = latency - ttft
+            info["decode_tokens_per_s"] = (round((completion - 1) / decode_s, 1)
+                                           if completion and completion > 1 and decode_s > 0 else None)
+            info["phase_timing"] = "client"
+        return output, info
+
+
+def extract_stream(base_url: str, model: str, transcript: str, cache_prompt: bool = True,
+                   slot: int | None = None) -> tuple[dict, dict]:
+    """extract() over SSE, adding TTFT and the prefill/decode split."""
+    reader = StreamReader(time.perf_counter())
+    with requests.post(f"{base_url}/chat/completions", json=stream_body(model, transcript, cache_prompt, slot),
+                       stream=True, timeout=600) as resp:
+        resp.raise_for_status()
+        # SSE is UTF-8 but text/event-stream carries no charset, so decode by hand
+        for line in resp.iter_lines():
+            reader.feed(line.decode())
+    return reader.finish()
+
+
+async def extract_async(client, base_url: str, model: str, transcript: str,
+                        stream: bool = False) -> tuple[dict, dict]:
+    """extract()/extract_stream() for the concurrent runner.
+
+    `client` is an httpx.AsyncClient, or None to run the blocking call on a
+    worker thread. Either way the clock starts once the request is actually
+    sent, not while it waits for a free in-flight slot.
+    """
+    if client is None:
+        return await asyncio.to_thread(extract_stream if stream else extract, base_url, model, transcript)
+    if stream:
+        reader = StreamReader(time.perf_counter())
+        async with client.stream("POST", f"{base_url}/chat/completions",
+                                 json=stream_body(model, transcript), timeout=600) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                reader.feed(line)
+        return reader.finish()
+    body = request_body(model, transcript)
+    hit = cache_lookup(body)
+    if hit is not None:
+        return hit
+    t0 = time.perf_counter()
+    resp = await client.post(f"{base_url}/chat/completions", json=body, timeout=600)
     resp.raise_for_status()
     latency = time.perf_counter() - t0
     data = resp.json()
+    cache_store(body, data, latency)
+    return parse_response(data, latency)
+
+
+def parse_response(data: dict, latency: float) -> tuple[dict, dict]:
     usage = data.get("usage", {})
     output = json.loads(data["choices"][0]["message"]["content"])
     completion = usage.get("completion_tokens", 0)
@@ -109,6 +329,29 @@ def extract(base_url: str, model: str, transcript: str) -> tuple[dict, dict]:
     }
 
 
+def percentiles(values: list[float]) -> dict | None:
+    """Nearest-rank PERCENTILES of the non-null values, or None if there are none."""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return {f"p{q}": values[min(len(values) - 1, max(0, -(-q * len(values) // 100) - 1))]
+            for q in PERCENTILES}
+
+
+def summarize(rows_by_slice: dict[str, list[dict]]) -> dict:
+    """{"all" | slice: {metric: {p50, p90, p99}}} over successful live (uncached) rows."""
+    def live(rows):
+        return [r for r in rows if "output" in r and not r.get("cached")]
+
+    scopes = {"all": live(r for rows in rows_by_slice.values() for r in rows)}
+    scopes.update({name: live(rows) for name, rows in rows_by_slice.items()})
+    summary = {}
+    for scope, rows in scopes.items():
+        metrics = {m: percentiles([r.get(m) for r in rows]) for m in SUMMARY_METRICS}
+        summary[scope] = {m: p for m, p in metrics.items() if p is not None}
+    return summary
+
+
 KEBAB_RE = re.compile(r"^[a-z0-9]+(-[a-z0-9]+)*$")
 FALLBACK_TITLE = "Unclear memo"
 
@@ -138,8 +381,101 @@ def code_grade(output: dict) -> dict:
     }
 
 
+async def run_records(model: str, base_url: str, slices: dict[str, list[dict]],
+                      concurrency: int, stream: bool = False) -> tuple[dict[str, list[dict]], float]:
+    """Extract every record of every slice with `concurrency` requests in flight.
+
+    One pool across slices, so llama-server's slots stay busy at slice
+    boundaries. Rows keep their slice order. Returns (rows per slice, wall
+    seconds for the whole pass).
+    """
+    results = {name: [None] * len(records) for name, records in slices.items()}
+    queue: asyncio.Queue = asyncio.Queue()
+    for name, records in slices.items():
+        for i, rec in enumerate(records):
+            queue.put_nowait((name, i, rec))
+    total, done = queue.qsize(), 0
+
+    async def worker(client):
+        nonlocal done
+        while not queue.empty():
+            slice_name, i, rec = queue.get_nowait()
+            try:
+                output, timing = await extract_async(client, base_url, model, rec["text"], stream)
+                row = {"id": rec["id"], "output": output, "grade": code_grade(output), **timing}
+            except Exception as e:
+                print(f"  [{slice_name} {i + 1}/{len(slices[slice_name])}] {rec['id']} FAILED: {e}")
+                row = {"id": rec["id"], "error": str(e)}
+            results[slice_name][i] = row
+            done += 1
+            if done % 10 == 0 or done == total:
+                print(f"  {done}/{total}")
+
+    t0 = time.perf_counter()
+    if httpx is not None:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(limits=limits) as client:
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    else:
+        await asyncio.gather(*(worker(None) for _ in range(concurrency)))
+    return results, time.perf_counter() - t0
+
+
+def measure_prefix_cache(model: str, base_url: str, swap_root: str,
+                         slices: dict[str, list[dict]]) -> dict:
+    """Prefill saved by the pinned prompt prefix, per slice and overall.
+
+    Runs every record serially, streamed, twice: with cache_prompt off (the
+    whole prompt is evaluated) and with the prefix pinned in PREFIX_SLOT.
+    Evaluated-token and prefill-ms figures need llama-server's timings; TTFT
+    is measured client-side either way.
+    """
+    records = [(name, rec) for name, recs in slices.items() for rec in recs]
+    passes = {}
+    for mode in ("full", "pinned"):
+        if mode == "pinned":
+            how = pin_prefix(base_url, swap_root, model)
+            print(f"  prefix cache: prefix {how} in slot {PREFIX_SLOT}")
+        rows = []
+        for slice_name, rec in records:
+            try:
+                _, info = extract_stream(base_url, model, rec["text"], cache_prompt=mode == "pinned",
+                                         slot=PREFIX_SLOT if mode == "pinned" else None)
+            except Exception as e:
+                print(f"  prefix cache [{mode}] {rec['id']} FAILED: {e}")
+                rows.append(None)
+                continue
+            rows.append({"slice": slice_name, **{k: info.get(k) for k in (
+                "prompt_tokens", "prompt_evaluated", "prompt_ms", "ttft_s")}})
+        passes[mode] = rows
+
+    def median(values):
+        values = sorted(v for v in values if v is not None)
+        return values[len(values) // 2] if values else None
+
+    summary = {}
+    for scope in ["all", *slices]:
+        pairs = [(f, p) for f, p in zip(passes["full"], passes["pinned"])
+                 if f and p and scope in ("all", f["slice"])]
+        prompt = sum(p["prompt_tokens"] or 0 for _, p in pairs)
+        evaluated = [p["prompt_evaluated"] for _, p in pairs]
+        saved_ms = [f["prompt_ms"] - p["prompt_ms"] for f, p in pairs
+                    if f["prompt_ms"] is not None and p["prompt_ms"] is not None]
+        summary[scope] = {
+            "records": len(pairs),
+            "prompt_tokens_median": median(p["prompt_tokens"] for _, p in pairs),
+            "reused_share": round(1 - sum(evaluated) / prompt, 3)
+            if prompt and evaluated and None not in evaluated else None,
+            "prefill_ms_saved_median": median(saved_ms),
+            "ttft_full_median_s": median(f["ttft_s"] for f, _ in pairs),
+            "ttft_pinned_median_s": median(p["ttft_s"] for _, p in pairs),
+        }
+    return summary
+
+
 def run_condition(model: str, base_url: str, swap_root: str,
-                  slices: dict[str, list[dict]]) -> dict:
+                  slices: dict[str, list[dict]], concurrency: int = 1, stream: bool = False,
+                  prefix_cache: bool = False) -> dict:
     print(f"\n=== {model}")
     unload_all(swap_root)
     vram_idle = gpu_memory_mb()
@@ -147,34 +483,23 @@ def run_condition(model: str, base_url: str, swap_root: str,
     # cold start: first request after full unload includes model load time
     warm_probe = "Quick note, remember to water the plants tomorrow morning."
     t0 = time.perf_counter()
-    extract(base_url, model, warm_probe)
+    extract(base_url, model, warm_probe, use_cache=False)
     cold_start_s = round(time.perf_counter() - t0, 2)
     vram_loaded = gpu_memory_mb()
     print(f"  cold start {cold_start_s}s, VRAM {vram_idle} -> {vram_loaded} MiB")
 
-    results = {}
-    for slice_name, records in slices.items():
-        rows = []
-        for i, rec in enumerate(records, 1):
-            try:
-                output, timing = extract(base_url, model, rec["text"])
-            except Exception as e:
-                print(f"  [{slice_name} {i}/{len(records)}] {rec['id']} FAILED: {e}")
-                rows.append({"id": rec["id"], "error": str(e)})
-                continue
-            rows.append({"id": rec["id"], "output": output,
-                         "grade": code_grade(output), **timing})
-            if i % 10 == 0 or i == len(records):
-                print(f"  [{slice_name}] {i}/{len(records)}")
-        results[slice_name] = rows
+    results, wall_s = asyncio.run(run_records(model, base_url, slices, concurrency, stream))
 
     ok = [r for rows in results.values() for r in rows if "output" in r]
     grade_rates = {}
     for check in next(iter(ok))["grade"]:
         applicable = [r["grade"][check] for r in ok if r["grade"][check] is not None]
         grade_rates[check] = round(sum(applicable) / len(applicable), 3) if applicable else None
-    lat = sorted(r["latency_s"] for r in ok)
-    return {
+    # timing aggregates from live rows only; cached rows replay an older call's timing
+    live = [r for r in ok if not r.get("cached")]
+    lat = sorted(r["latency_s"] for r in live)
+    tok_s = sorted(r["tokens_per_s"] for r in live if r["tokens_per_s"])
+    condition = {
         "model": model,
         "cold_start_s": cold_start_s,
         "vram_loaded_mib": vram_loaded,
@@ -184,12 +509,25 @@ def run_condition(model: str, base_url: str, swap_root: str,
         if vram_loaded is not None and vram_idle is not None else None,
         "records_ok": len(ok),
         "records_failed": sum(len(rows) for rows in results.values()) - len(ok),
+        "records_cached": len(ok) - len(live),
         "grade_rates": grade_rates,
         # post-warm: the cold-start warmup call precedes all timed records
-        "postwarm_latency_median_s": lat[len(lat) // 2],
-        "tokens_per_s_median": sorted(r["tokens_per_s"] for r in ok if r["tokens_per_s"])[len(ok) // 2],
+        "postwarm_latency_median_s": lat[len(lat) // 2] if lat else None,
+        "tokens_per_s_median": tok_s[len(tok_s) // 2] if tok_s else None,
+        # aggregate throughput over the whole timed pass: what the lane sustains
+        # at this concurrency, as opposed to the per-request numbers above
+        "concurrency": concurrency,
+        "wall_s": round(wall_s, 2),
+        "memos_per_min": round(len(live) / wall_s * 60, 1) if live else None,
+        "total_tokens_per_s": round(sum(r["completion_tokens"] or 0 for r in live) / wall_s, 1)
+        if live else None,
+        "stream": stream,
+        "percentiles": summarize(results),
         "slices": results,
     }
+    if prefix_cache:
+        condition["prefix_cache"] = measure_prefix_cache(model, base_url, swap_root, slices)
+    return condition
 
 
 def main():
@@ -200,7 +538,18 @@ def main():
     parser.add_argument("--slices", default="real,stt,garbled")
     parser.add_argument("--limit", type=int, default=0,
                         help="cap records per slice (0 = all)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="requests in flight (match llama-server --parallel; 1 = serial)")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream responses to record TTFT and prefill/decode tok/s per record")
+    parser.add_argument("--prefix-cache", action="store_true",
+                        help="also measure the prefill saved by pinning the shared prompt prefix")
+    parser.add_argument("--use-cache", action="store_true",
+                        help="replay unchanged requests from the shared response cache "
+                             "(grading/report reruns; cached rows are not timed)")
     args = parser.parse_args()
+    # A cache hit replaces a measurement, so timing runs bypass it unless asked.
+    response_cache.ENABLED = response_cache.ENABLED and args.use_cache
 
     swap_root = args.base_url.rsplit("/v1", 1)[0]
     slices = {}
@@ -209,7 +558,8 @@ def main():
         slices[name] = records[: args.limit] if args.limit else records
     print("slices:", {k: len(v) for k, v in slices.items()})
 
-    conditions = [run_condition(m.strip(), args.base_url, swap_root, slices)
+    conditions = [run_condition(m.strip(), args.base_url, swap_root, slices,
+                                args.concurrency, args.stream, args.prefix_cache)
                   for m in args.models.split(",")]
 
     report = {
@@ -227,10 +577,23 @@ def main():
     (RESULTS_DIR / "extraction_latest.json").write_text(
         json.dumps(report, indent=1, ensure_ascii=False))
     print(f"\nresults -> {out}")
+    if response_cache.get_cache():
+        print(response_cache.get_cache().summary())
     for c in conditions:
         print(f"  {c['model']}: cold {c['cold_start_s']}s | VRAM net {c['vram_net_mib']} MiB "
-              f"(total {c['vram_loaded_mib']}) | post-warm median {c['postwarm_latency_median_s']}s/memo "
-              f"@ {c['tokens_per_s_median']} tok/s | grades {c['grade_rates']}")
+              f"(total {c['vram_loaded_mib']}) | {c['records_cached']} cached | post-warm median {c['postwarm_latency_median_s']}s/memo "
+              f"@ {c['tokens_per_s_median']} tok/s | x{c['concurrency']}: {c['memos_per_min']} memos/min, "
+              f"{c['total_tokens_per_s']} tok/s total | grades {c['grade_rates']}")
+        if c["stream"]:
+            for scope, metrics in c["percentiles"].items():
+                print(f"    {scope:<8} " + " | ".join(
+                    f"{m} p50 {metrics[m]['p50']} p90 {metrics[m]['p90']}"
+                    for m in ("ttft_s", "prefill_tokens_per_s", "decode_tokens_per_s") if m in metrics))
+        for scope, saved in c.get("prefix_cache", {}).items():
+            print(f"    prefix cache {scope:<8} reused {saved['reused_share']} of prompt tokens "
+                  f"(median prompt {saved['prompt_tokens_median']}), prefill saved "
+                  f"{saved['prefill_ms_saved_median']} ms/memo, TTFT {saved['ttft_full_median_s']}s -> "
+                  f"{saved['ttft_pinned_median_s']}s")
 
 
 if __name__ == "__main__":
@@ -1,17 +1,53 @@
 #!/usr/bin/env python3
-"""Benchmark script to compare Whisper server performance."""
+"""Benchmark script to compare Whisper server performance.
+
+Default mode sends one request at a time per file and server. --load switches
+to a load generator (closed loop with --concurrency workers, or open loop at
+--rate requests/sec) that runs for --duration seconds per server and reports
+latency percentiles, throughput, and error rate.
+
+Files with a reference transcript next to them (same stem, .txt) are scored
+for WER/CER. --models runs several models on the native server, and --pareto
+combines saved runs (e.g. one per COMPUTE_TYPE) into a speed-vs-accuracy
+report. --seed-references writes references from the STT eval slice.
+
+--sweep runs a parameter matrix against the native CUDA server: for each cell
+(e.g. model x compute_type x beam_size) it restarts the server with those
+flags, runs the sequential pass, reads the process's VRAM residency, and writes
+every cell to one sweep_*.json.
+
+--pcm decodes each file once into a cached 16 kHz float32 .npy (pcm_cache.py)
+and uploads that to the native servers, which skip their own decode, so the
+timings measure inference rather than codec work.
+"""
 
 import argparse
+import io
+import itertools
 import json
+import os
+import random
+import signal
+import socket
+import subprocess
 import sys
+import threading
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 
 import requests
 
+from pcm_cache import SAMPLE_RATE, cache_path, cached_pcm, npy_samples
 from system_info import get_audio_duration, get_system_info
+from wer import score
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+STT_EVAL = REPO_ROOT / "finetune" / "corpus" / "eval" / "eval_stt_voice_notes.jsonl"
+RESULTS_DIR = Path(__file__).parent / "benchmark_results"
 
 # Fix Windows console encoding
 if sys.platform == "win32":
@@ -37,11 +73,27 @@ def get_server_configs(speaches_port: int, native_port: int) -> dict:
             "base_url": f"http://localhost:{native_port}",
             "model_id": None,  # Native server, model loaded at startup
             "model_name": "base",  # Short name works for native server
+            "accepts_pcm": True,  # .npy uploads skip server-side decoding
         },
     }
 
+# Sweep axes (--sweep AXIS=v1,v2) and the server_cuda.py flag each one sets.
+SWEEP_AXES = {
+    "model": "--model",
+    "compute_type": "--compute-type",
+    "beam_size": "--beam-size",
+    "vad_min_silence_ms": "--vad-min-silence-ms",
+    "vad_threshold": "--vad-threshold",
+    "batch_window_ms": "--batch-window-ms",
+    "batch_size": "--batch-size",
+}
+SERVER_LAUNCHER = REPO_ROOT / "services" / "whisper-server" / "run_server.sh"
+# Generous: the first cell for a model downloads it from Hugging Face.
+SWEEP_STARTUP_TIMEOUT = 900
+
 # Audio files to test (will be sorted by size)
 AUDIO_DIR = Path(__file__).parent / "test_audio"
+AUDIO_SUFFIXES = (".mp3", ".flac", ".wav", ".m4a")
 
 
 def ensure_model_installed(server_name: str, server_config: dict) -> bool:
@@ -96,6 +148,13 @@ class BenchmarkResult:
     success: bool
     error: str | None = None
     transcript_preview: str | None = None
+    model: str | None = None
+    compute_type: str | None = None
+    warmup: bool = False
+    accuracy: dict | None = None  # wer.score() output when a reference exists
+    cell: str | None = None  # sweep cell label, e.g. "model=small beam_size=1"
+    pcm: bool = False  # uploaded pre-decoded samples (no server-side decode)
+    cached: bool = False  # answered from the server's transcript cache (X-Cache: hit)
 
     @property
     def realtime_factor(self) -> float | None:
@@ -104,34 +163,80 @@ class BenchmarkResult:
         return None
 
 
-def transcribe(transcribe_url: str, audio_path: Path, model_name: str) -> tuple[float, bool, str | None, str | None]:
-    """Send transcription request and measure time."""
+def transcribe(
+    transcribe_url: str, audio_path: Path, model_name: str, pcm: bool = False
+) -> tuple[float, bool, str | None, str | None, bool]:
+    """Send transcription request and measure time.
+
+    With pcm=True the cached decoded samples are uploaded instead of the file.
+    """
+    with open(cached_pcm(audio_path) if pcm else audio_path, "rb") as f:
+        return post_audio(transcribe_url, audio_path.name, f, model_name)
+
+
+_durations: dict[Path, float | None] = {}
+
+
+def audio_duration(audio_path: Path) -> float | None:
+    """Duration from the PCM cache's sample count when present, else mutagen/ffprobe (memoized)."""
+    if audio_path not in _durations:
+        pcm = cache_path(audio_path)
+        _durations[audio_path] = npy_samples(pcm) / SAMPLE_RATE if pcm.exists() else get_audio_duration(audio_path)
+    return _durations[audio_path]
+
+
+def post_audio(
+    transcribe_url: str, filename: str, fileobj, model_name: str, session: requests.Session | None = None
+) -> tuple[float, bool, str | None, str | None, bool]:
+    """POST one upload and measure time; returns (elapsed, success, error, text, cached).
+
+    `cached` is True when the server answered from its transcript cache, so
+    the elapsed time is a lookup rather than inference.
+    """
     start = time.perf_counter()
     try:
-        with open(audio_path, "rb") as f:
-            files = {"file": (audio_path.name, f, "audio/mpeg")}
-            data = {"model": model_name, "response_format": "json"}
-            response = requests.post(transcribe_url, files=files, data=data, timeout=600)
+        files = {"file": (filename, fileobj, "audio/mpeg")}
+        data = {"model": model_name, "response_format": "json"}
+        response = (session or requests).post(transcribe_url, files=files, data=data, timeout=600)
 
         elapsed = time.perf_counter() - start
 
         if response.status_code == 200:
             result = response.json()
-            text = result.get("text", "")
-            preview = text[:100] + "..." if len(text) > 100 else text
-            return elapsed, True, None, preview
+            return elapsed, True, None, result.get("text", ""), response.headers.get("X-Cache") == "hit"
         else:
-            return elapsed, False, f"HTTP {response.status_code}: {response.text[:200]}", None
+            return elapsed, False, f"HTTP {response.status_code}: {response.text[:200]}", None, False
 
     except requests.exceptions.RequestException as e:
         elapsed = time.perf_counter() - start
-        return elapsed, False, str(e), None
+        return elapsed, False, str(e), None, False
+
+
+def preview(text: str | None) -> str | None:
+    if text is None:
+        return None
+    return text[:100] + "..." if len(text) > 100 else text
+
+
+def load_reference(audio_path: Path) -> str | None:
+    """Reference transcript stored next to the audio as <stem>.txt, if any."""
+    ref = audio_path.with_suffix(".txt")
+    return ref.read_text().strip() if ref.exists() else None
+
+
+def server_health(server_config: dict) -> dict:
+    """The server's /health body ({} if unreachable); native servers report compute_type."""
+    try:
+        response = requests.get(f"{server_config['base_url']}/health", timeout=10)
+        return response.json()
+    except (requests.exceptions.RequestException, ValueError):
+        return {}
 
 
 def run_benchmark(
-    audio_files: list[Path], servers: dict[str, dict], warmup_file: Path | None = None
+    audio_files: list[Path], servers: dict[str, dict], warmup_file: Path | None = None, repeats: int = 1
 ) -> list[BenchmarkResult]:
-    """Run benchmarks on all files against all servers."""
+    """Run benchmarks on all files against all servers, each file `repeats` times."""
     results = []
 
     # Ensure models are installed on all servers
@@ -140,6 +245,13 @@ def run_benchmark(
     print(f"{'=' * 60}")
     for server_name, server_config in servers.items():
         ensure_model_installed(server_name, server_config)
+        health = server_health(server_config)
+        server_config["compute_type"] = health.get("compute_type")
+        if health.get("cache_enabled"):
+            # files transcribed by an earlier run (or an earlier repeat) come back
+            # as X-Cache hits; those rows are flagged and left out of the timings
+            print(f"  Warning: {server_name} has its transcript cache on; cache hits won't be timed"
+                  " (restart it with --cache-max-mb 0)")
 
     # Warmup run (first file, twice) to ensure models are loaded
     if warmup_file:
@@ -151,8 +263,10 @@ def run_benchmark(
             model_name = server_config["model_name"]
             print(f"\n[{server_name}] Warmup with {warmup_file.name}...")
             for i in range(2):
-                duration = get_audio_duration(warmup_file)
-                elapsed, success, error, preview = transcribe(transcribe_url, warmup_file, model_name)
+                duration = audio_duration(warmup_file)
+                elapsed, success, error, text, cached = transcribe(
+                    transcribe_url, warmup_file, model_name, server_config.get("pcm", False),
+                )
 
                 result = BenchmarkResult(
                     server=server_name,
@@ -162,7 +276,12 @@ def run_benchmark(
                     request_time_sec=elapsed,
                     success=success,
                     error=error,
-                    transcript_preview=preview,
+                    transcript_preview=preview(text),
+                    model=model_name,
+                    compute_type=server_config.get("compute_type"),
+                    warmup=True,
+                    pcm=server_config.get("pcm", False),
+                    cached=cached,
                 )
                 results.append(result)
 
@@ -180,8 +299,9 @@ def run_benchmark(
             continue  # Skip warmup file in main runs
 
         file_size = audio_file.stat().st_size
-        duration = get_audio_duration(audio_file)
+        duration = audio_duration(audio_file)
         duration_str = f"{duration:.1f}s" if duration else "unknown"
+        reference = load_reference(audio_file)
 
         print(f"\n[{audio_file.name}] Size: {file_size / 1024 / 1024:.2f} MB, Duration: {duration_str}")
         print("-" * 50)
@@ -189,26 +309,37 @@ def run_benchmark(
         for server_name, server_config in servers.items():
             transcribe_url = server_config["transcribe_url"]
             model_name = server_config["model_name"]
-            print(f"  {server_name}: ", end="", flush=True)
-            elapsed, success, error, preview = transcribe(transcribe_url, audio_file, model_name)
-
-            result = BenchmarkResult(
-                server=server_name,
-                file=audio_file.name,
-                file_size_bytes=file_size,
-                audio_duration_sec=duration,
-                request_time_sec=elapsed,
-                success=success,
-                error=error,
-                transcript_preview=preview,
-            )
-            results.append(result)
+            for run in range(repeats):
+                run_label = f" (run {run + 1})" if repeats > 1 else ""
+                print(f"  {server_name}{run_label}: ", end="", flush=True)
+                elapsed, success, error, text, cached = transcribe(
+                    transcribe_url, audio_file, model_name, server_config.get("pcm", False),
+                )
 
-            if success:
-                rtf = f"{result.realtime_factor:.1f}x" if result.realtime_factor else "N/A"
-                print(f"✓ {elapsed:.2f}s ({rtf} realtime)")
-            else:
-                print(f"✗ {elapsed:.2f}s - {error}")
+                result = BenchmarkResult(
+                    server=server_name,
+                    file=audio_file.name,
+                    file_size_bytes=file_size,
+                    audio_duration_sec=duration,
+                    request_time_sec=elapsed,
+                    success=success,
+                    error=error,
+                    transcript_preview=preview(text),
+                    model=model_name,
+                    compute_type=server_config.get("compute_type"),
+                    accuracy=score(reference, text) if success and reference else None,
+                    pcm=server_config.get("pcm", False),
+                    cached=cached,
+                )
+                results.append(result)
+
+                if success:
+                    rtf = f"{result.realtime_factor:.1f}x" if result.realtime_factor else "N/A"
+                    acc = f", WER {result.accuracy['wer']:.1%}" if result.accuracy and result.accuracy["wer"] is not None else ""
+                    hit = ", cache hit - not timed" if cached else ""
+                    print(f"✓ {elapsed:.2f}s ({rtf} realtime{acc}{hit})")
+                else:
+                    print(f"✗ {elapsed:.2f}s - {error}")
 
     return results
 
@@ -229,16 +360,17 @@ def print_summary(results: list[BenchmarkResult]) -> None:
         files[r.file][r.server].append(r)
 
     # Print comparison table
-    print(f"{'File':<30} {'Server':<15} {'Time (s)':<12} {'RTF':<12} {'Status'}")
-    print("-" * 80)
+    print(f"{'File':<30} {'Server':<15} {'Time (s)':<12} {'RTF':<12} {'WER':<8} {'Status'}")
+    print("-" * 88)
 
     for file_name in files:
         for server_name in files[file_name]:
             for i, r in enumerate(files[file_name][server_name]):
                 run_label = f" (run {i + 1})" if len(files[file_name][server_name]) > 1 else ""
                 rtf = f"{r.realtime_factor:.1f}x" if r.realtime_factor else "N/A"
-                status = "OK" if r.success else "FAIL"
-                print(f"{file_name + run_label:<30} {server_name:<15} {r.request_time_sec:<12.2f} {rtf:<12} {status}")
+                status = ("CACHED" if r.cached else "OK") if r.success else "FAIL"
+                wer = f"{r.accuracy['wer']:.1%}" if r.accuracy and r.accuracy["wer"] is not None else "-"
+                print(f"{file_name + run_label:<30} {server_name:<15} {r.request_time_sec:<12.2f} {rtf:<12} {wer:<8} {status}")
 
     # Calculate speedup
     print(f"\n{'=' * 60}")
@@ -246,8 +378,8 @@ def print_summary(results: list[BenchmarkResult]) -> None:
     print(f"{'=' * 60}\n")
 
     for file_name in files:
-        cpu_results = [r for r in files[file_name].get("speaches-cpu", []) if r.success]
-        gpu_results = [r for r in files[file_name].get("native-gpu", []) if r.success]
+        cpu_results = [r for r in files[file_name].get("speaches-cpu", []) if r.success and not r.cached]
+        gpu_results = [r for r in files[file_name].get("native-gpu", []) if r.success and not r.cached]
 
         if cpu_results and gpu_results:
             # Use last run (after warmup)
@@ -261,6 +393,446 @@ def print_summary(results: list[BenchmarkResult]) -> None:
             print(f"  Speedup: {speedup:.1f}x faster on GPU\n")
 
 
+@dataclass
+class LoadSample:
+    file: str
+    audio_duration_sec: float | None
+    scheduled_at: float  # seconds since the run started (intended send time)
+    latency_sec: float  # completion minus scheduled_at, so client-side queueing counts
+    success: bool
+    error: str | None = None
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    """Linear-interpolated percentile (q in 0..100) of an ascending list."""
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_load_test(
+    server_name: str,
+    server_config: dict,
+    audio_files: list[Path],
+    concurrency: int,
+    duration: float,
+    rate: float | None = None,
+    arrival: str = "poisson",
+    seed: int = 0,
+) -> tuple[list[LoadSample], float]:
+    """Drive one server for `duration` seconds; returns (samples, wall seconds).
+
+    Closed loop (rate=None): `concurrency` workers each send their next request
+    as soon as the previous one returns, so offered load adapts to the server.
+    Open loop: requests are scheduled at `rate`/sec (Poisson or evenly spaced
+    arrivals) regardless of how fast the server answers, with at most
+    `concurrency` in flight; latency is measured from the scheduled time, so a
+    backlog on the client shows up as latency instead of being hidden
+    (coordinated omission). Requests still in flight at the deadline are
+    waited for and counted.
+    """
+    pcm = server_config.get("pcm", False)
+    payloads = [(f.name, (cached_pcm(f) if pcm else f).read_bytes(), audio_duration(f)) for f in audio_files]
+    rng = random.Random(seed)
+    next_file = itertools.cycle(rng.sample(payloads, len(payloads)))
+    pick_lock = threading.Lock()
+    samples: list[LoadSample] = []
+    local = threading.local()
+    url, model = server_config["transcribe_url"], server_config["model_name"]
+
+    def send(scheduled_at: float, t0: float) -> None:
+        with pick_lock:
+            name, data, audio_s = next(next_file)
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        _, success, error, _, _ = post_audio(url, name, io.BytesIO(data), model, local.session)
+        latency = time.perf_counter() - t0 - scheduled_at
+        with pick_lock:
+            samples.append(LoadSample(name, audio_s, scheduled_at, latency, success, error))
+
+    t0 = time.perf_counter()
+    deadline = t0 + duration
+    if rate is None:
+        def worker() -> None:
+            while time.perf_counter() < deadline:
+                send(time.perf_counter() - t0, t0)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            at = 0.0
+            while at < duration:
+                delay = t0 + at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(send, at, t0)
+                at += rng.expovariate(rate) if arrival == "poisson" else 1 / rate
+    return samples, time.perf_counter() - t0
+
+
+def summarize_load(samples: list[LoadSample], wall_sec: float) -> dict:
+    """Latency percentiles, throughput, and error rate for one server's run."""
+    ok = [s for s in samples if s.success]
+    latencies = sorted(s.latency_sec for s in ok)
+    audio_sec = sum(s.audio_duration_sec or 0 for s in ok)
+    errors = Counter((s.error or "unknown").split(":")[0] for s in samples if not s.success)
+    return {
+        "requests": len(samples),
+        "succeeded": len(ok),
+        "error_rate": round(1 - len(ok) / len(samples), 4) if samples else None,
+        "errors": dict(errors),
+        "wall_sec": round(wall_sec, 2),
+        "requests_per_sec": round(len(ok) / wall_sec, 3) if wall_sec else None,
+        "audio_sec_per_sec": round(audio_sec / wall_sec, 2) if wall_sec else None,
+        "latency_sec": {
+            f"p{q}": round(v, 3) if (v := percentile(latencies, q)) is not None else None
+            for q in (50, 90, 99)
+        } | {"max": round(latencies[-1], 3) if latencies else None},
+    }
+
+
+def print_load_summary(summaries: dict[str, dict], config: dict) -> None:
+    def fmt(value: float | None) -> str:
+        return f"{value:.2f}" if value is not None else "N/A"
+
+    print(f"\n{'=' * 60}")
+    print(f"LOAD TEST SUMMARY ({config['mode']})")
+    print(f"{'=' * 60}\n")
+    print(f"{'Server':<15} {'Reqs':>6} {'Err%':>6} {'Req/s':>7} {'Audio s/s':>10} {'p50':>8} {'p90':>8} {'p99':>8}")
+    print("-" * 80)
+    for server_name, s in summaries.items():
+        lat = s["latency_sec"]
+        err = f"{s['error_rate'] * 100:.1f}" if s["error_rate"] is not None else "N/A"
+        print(
+            f"{server_name:<15} {s['requests']:>6} {err:>6} {fmt(s['requests_per_sec']):>7}"
+            f" {fmt(s['audio_sec_per_sec']):>10} {fmt(lat['p50']):>8} {fmt(lat['p90']):>8} {fmt(lat['p99']):>8}"
+        )
+        if s["errors"]:
+            print(f"{'':<15} errors: {', '.join(f'{k} x{v}' for k, v in s['errors'].items())}")
+
+
+def seed_references(audio_dir: Path, eval_path: Path = STT_EVAL) -> None:
+    """Write <stem>.txt references for audio files named after STT eval memos.
+
+    The eval slice carries each memo's ground-truth script (see
+    finetune/build_stt_eval.py); copy the dataset's recordings into the audio
+    dir under their memo names (e.g. 01_email_dictation.wav) and run this once.
+    Existing .txt files are left alone.
+    """
+    truths = {}
+    with open(eval_path) as f:
+        for line in f:
+            row = json.loads(line)
+            truths[row["memo"]] = row["ground_truth"]
+    written = 0
+    for audio in sorted(audio_dir.iterdir()):
+        ref = audio.with_suffix(".txt")
+        if audio.suffix.lower() in AUDIO_SUFFIXES and audio.stem in truths and not ref.exists():
+            ref.write_text(truths[audio.stem] + "\n")
+            written += 1
+    print(f"Wrote {written} reference transcripts to {audio_dir} ({len(truths)} memos in {eval_path.name})")
+
+
+def pool_results(results: list[dict]) -> dict:
+    """Aggregate speed and accuracy over successful, non-warmup result rows.
+
+    Pools errors over reference words (micro-average) rather than averaging
+    per-file WERs, so long files weigh in proportion to their length. Speed is
+    total audio seconds over total request seconds, from rows that weren't
+    transcript cache hits.
+    """
+    rows = [r for r in results if r.get("success") and not r.get("warmup")]
+    scored = [r["accuracy"] for r in rows if r.get("accuracy") and r["accuracy"].get("ref_words")]
+    timed = [r for r in rows if not r.get("cached")]
+    audio = sum(r.get("audio_duration_sec") or 0 for r in timed)
+    elapsed = sum(r["request_time_sec"] for r in timed)
+    ref_words = sum(a["ref_words"] for a in scored)
+    ref_chars = sum(a["ref_chars"] for a in scored)
+    return {
+        "files": len(rows),
+        "scored_files": len(scored),
+        "rtf": audio / elapsed if elapsed else None,
+        "wer": sum(a["word_errors"] for a in scored) / ref_words if ref_words else None,
+        "cer": sum(a["char_errors"] for a in scored) / ref_chars if ref_chars else None,
+    }
+
+
+def pareto_report(paths: list[Path]) -> None:
+    """Pool scored runs per configuration and print the speed/accuracy frontier.
+
+    A configuration is a sweep cell, or (server, model, compute_type) for plain
+    runs. It is on the Pareto frontier when no other one is both faster and
+    more accurate.
+    """
+    grouped: dict[str, list[dict]] = {}
+    for path in paths:
+        data = json.loads(path.read_text())
+        for r in data.get("results", []):
+            config = r.get("cell") or f"{r['server'].split('[')[0]} {r.get('model') or '?'} {r.get('compute_type') or '?'}"
+            grouped.setdefault(config, []).append(r)
+
+    rows = []
+    for config, results in grouped.items():
+        pooled = pool_results(results)
+        if pooled["wer"] is not None and pooled["rtf"]:
+            rows.append({"config": config, **pooled})
+    if not rows:
+        print("No scored results found (runs need reference .txt files next to the audio).")
+        return
+
+    rows.sort(key=lambda row: (-row["rtf"], row["wer"]))
+    best_wer = float("inf")
+    for row in rows:
+        row["frontier"] = row["wer"] < best_wer
+        best_wer = min(best_wer, row["wer"])
+
+    print(f"\n{'=' * 60}")
+    print(f"SPEED vs ACCURACY ({len(paths)} run file(s))")
+    print(f"{'=' * 60}\n")
+    print(f"{'Configuration':<40} {'Files':>5} {'RTF':>8} {'WER':>7} {'CER':>7}  Pareto")
+    print("-" * 80)
+    for row in rows:
+        cer = f"{row['cer']:.1%}" if row["cer"] is not None else "-"
+        mark = "★" if row["frontier"] else ""
+        print(f"{row['config']:<40} {row['scored_files']:>5} {row['rtf']:>7.1f}x {row['wer']:>7.1%} {cer:>7}  {mark}")
+    print("\n★ = no other configuration is both faster and more accurate")
+
+
+def expand_sweep(specs: list[str]) -> list[dict]:
+    """Turn ["model=small,large-v3", "beam_size=1,5"] into the cells of their product."""
+    axes = {}
+    for spec in specs:
+        axis, _, values = spec.partition("=")
+        axis = axis.strip().replace("-", "_")
+        if axis not in SWEEP_AXES or not values:
+            raise ValueError(f"Bad sweep axis '{spec}' (expected AXIS=v1,v2 with AXIS one of: {', '.join(SWEEP_AXES)})")
+        axes[axis] = [v.strip() for v in values.split(",") if v.strip()]
+    return [dict(zip(axes, combo)) for combo in itertools.product(*axes.values())]
+
+
+def start_server(cell: dict, port: int, log_path: Path) -> subprocess.Popen:
+    """Launch the native server with the cell's flags, logging to log_path.
+
+    The transcript cache is disabled: repeated files would otherwise be served
+    from it and time nothing.
+    """
+    cmd = ["bash", str(SERVER_LAUNCHER), "--port", str(port), "--cache-max-mb", "0"]
+    for axis, value in cell.items():
+        cmd += [SWEEP_AXES[axis], value]
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "w") as log:
+        # Own session, so stop_server can signal uv and the python it spawned together
+        return subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+
+
+def port_in_use(port: int) -> bool:
+    """True when something already listens on localhost:port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(1)
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+
+def cell_mismatches(cell: dict, health: dict) -> list[str]:
+    """Cell settings the answering server's /health doesn't report.
+
+    Catches a server that isn't the one this cell launched (or that ignored a
+    flag), so a cell never silently benchmarks someone else's config.
+    """
+    decoding = health.get("decoding") or {}
+    reported = {
+        "model": health.get("model"),
+        "compute_type": health.get("compute_type"),
+        "beam_size": decoding.get("beam_size"),
+        "vad_min_silence_ms": decoding.get("vad_min_silence_ms"),
+        "vad_threshold": decoding.get("vad_threshold"),
+        "batch_size": decoding.get("batch_size"),
+        "batch_window_ms": health.get("batching"),
+    }
+    mismatches = []
+    for axis, value in cell.items():
+        if axis == "model":
+            # the server reports Systran/faster-whisper-X as X
+            expected = value.rsplit("faster-whisper-", 1)[-1] if "/" in value else value
+        elif axis == "compute_type":
+            expected = value
+        elif axis == "vad_threshold":
+            expected = float(value)
+        elif axis == "batch_window_ms":
+            expected = int(value) > 0  # /health only reports whether batching is on
+        else:
+            expected = int(value)
+        if reported[axis] != expected:
+            mismatches.append(f"{axis}: expected {expected}, server reports {reported[axis]}")
+    return mismatches
+
+
+def wait_ready(base_url: str, proc: subprocess.Popen, timeout: float = SWEEP_STARTUP_TIMEOUT) -> dict | None:
+    """Poll /health until the server answers; None if it exits or times out."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            return None
+        try:
+            response = requests.get(f"{base_url}/health", timeout=2)
+            if response.status_code == 200:
+                return response.json()
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(1)
+    return None
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+    except ProcessLookupError:
+        pass
+
+
+def process_vram_mb(base_url: str) -> int | None:
+    """The server process's own VRAM residency, from its /vram endpoint."""
+    try:
+        return requests.get(f"{base_url}/vram", timeout=10).json().get("process_used_mb")
+    except (requests.exceptions.RequestException, ValueError):
+        return None
+
+
+def result_dict(r: BenchmarkResult) -> dict:
+    """One result row as saved to the JSON output."""
+    return {
+        "server": r.server,
+        "file": r.file,
+        "file_size_bytes": r.file_size_bytes,
+        "audio_duration_sec": r.audio_duration_sec,
+        "request_time_sec": round(r.request_time_sec, 3),
+        "realtime_factor": round(r.realtime_factor, 2) if r.realtime_factor else None,
+        "success": r.success,
+        "error": r.error,
+        "model": r.model,
+        "compute_type": r.compute_type,
+        "warmup": r.warmup,
+        "accuracy": r.accuracy,
+        "cell": r.cell,
+        "pcm": r.pcm,
+        "cached": r.cached,
+    }
+
+
+def run_sweep(args: argparse.Namespace, audio_files: list[Path], system_info) -> None:
+    """Restart the native server once per cell, benchmark it, and save one file."""
+    if sys.platform != "linux":
+        # macOS runs the MLX server, which has no --compute-type, batching or
+        # decoding flags; Windows has no run_server.sh
+        print("--sweep drives run_server.sh with CUDA-server flags and needs Linux")
+        return
+    try:
+        cells = expand_sweep(args.sweep)
+    except ValueError as e:
+        print(e)
+        return
+    if port_in_use(args.native_port):
+        print(f"Port {args.native_port} is already in use: stop the running native server "
+              f"(make whisper-native-stop) or pass a free --native-port for the sweep")
+        return
+    native = get_server_configs(args.speaches_port, args.native_port)["native-gpu"]
+    native["pcm"] = args.pcm
+    log_dir = RESULTS_DIR / "sweep_logs"
+    print(f"\nSweep: {len(cells)} cell(s) over {', '.join(cells[0]) if cells[0] else 'server defaults'}")
+
+    summaries, all_results = [], []
+    for i, cell in enumerate(cells, 1):
+        label = " ".join(f"{axis}={value}" for axis, value in cell.items()) or "defaults"
+        print(f"\n{'#' * 60}")
+        print(f"CELL {i}/{len(cells)}: {label}")
+        print(f"{'#' * 60}")
+        log_path = log_dir / f"cell_{i:02d}.log"
+        summary = {"cell": label, "params": cell, "log": str(log_path)}
+        if port_in_use(args.native_port):
+            # the cell's server couldn't bind, and /health would come from the squatter
+            print(f"  Port {args.native_port} is still in use (previous cell's server didn't exit?)")
+            summaries.append({**summary, "error": f"port {args.native_port} in use"})
+            continue
+        proc = start_server(cell, args.native_port, log_path)
+        try:
+            started = time.monotonic()
+            health = wait_ready(native["base_url"], proc)
+            if health is None:
+                print(f"  Server did not come up; see {log_path}")
+                summaries.append({**summary, "error": "server did not start"})
+                continue
+            mismatches = cell_mismatches(cell, health)
+            if mismatches:
+                print(f"  Server does not match the cell ({'; '.join(mismatches)}); see {log_path}")
+                summaries.append({**summary, "error": "server config mismatch: " + "; ".join(mismatches)})
+                continue
+            summary["startup_sec"] = round(time.monotonic() - started, 1)
+            summary["decoding"] = health.get("decoding")
+            server_config = {**native, "model_name": cell.get("model") or health.get("model") or native["model_name"]}
+            results = run_benchmark(
+                audio_files, {f"native-gpu[{label}]": server_config}, warmup_file=audio_files[0], repeats=args.repeats,
+            )
+            summary["vram_mb"] = process_vram_mb(native["base_url"])
+        finally:
+            stop_server(proc)
+
+        for r in results:
+            r.cell = label
+        rows = [result_dict(r) for r in results]
+        all_results.extend(rows)
+        ok = sorted(r["request_time_sec"] for r in rows if r["success"] and not r["warmup"] and not r["cached"])
+        warmups = [r["request_time_sec"] for r in rows if r["warmup"]]
+        summaries.append({
+            **summary,
+            "compute_type": server_config.get("compute_type"),
+            "failed": sum(1 for r in rows if not r["success"] and not r["warmup"]),
+            "cold_request_sec": warmups[0] if warmups else None,
+            "latency_p50_sec": percentile(ok, 50),
+            "latency_p90_sec": percentile(ok, 90),
+            **pool_results(rows),
+        })
+
+    print_sweep_summary(summaries)
+    save_results({
+        "timestamp": system_info.timestamp,
+        "system": system_info.to_dict(),
+        "sweep": {"axes": args.sweep, "files": [f.name for f in audio_files]},
+        "cells": summaries,
+        "results": all_results,
+    }, "sweep")
+
+
+def print_sweep_summary(summaries: list[dict]) -> None:
+    print(f"\n{'=' * 60}")
+    print("SWEEP SUMMARY")
+    print(f"{'=' * 60}\n")
+    print(f"{'Cell':<48} {'VRAM':>9} {'p50':>7} {'p90':>7} {'RTF':>8} {'WER':>7}")
+    print("-" * 92)
+    for s in summaries:
+        if "error" in s:
+            print(f"{s['cell']:<48} {s['error']}")
+            continue
+
+        def fmt(value, spec):
+            return "-" if value is None else format(value, spec)
+
+        vram = f"{s['vram_mb']} MiB" if s.get("vram_mb") is not None else "-"
+        rtf = f"{s['rtf']:.1f}x" if s["rtf"] else "-"
+        print(f"{s['cell']:<48} {vram:>9} {fmt(s['latency_p50_sec'], '.2f'):>7} {fmt(s['latency_p90_sec'], '.2f'):>7}"
+              f" {rtf:>8} {fmt(s['wer'], '.1%'):>7}")
+    print("\nVRAM is the server process's residency after the run (weights + CUDA context).")
+
+
 def parse_args() -> argparse.Namespace:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
@@ -285,14 +857,83 @@ def parse_args() -> argparse.Namespace:
         default=AUDIO_DIR,
         help="Directory containing audio files to benchmark",
     )
+    parser.add_argument(
+        "--servers",
+        default=None,
+        help="Comma-separated subset of servers to run (speaches-cpu, native-gpu)",
+    )
+    parser.add_argument(
+        "--models",
+        default=None,
+        help="Comma-separated models to run on the native server (e.g. base,small,large-v3)",
+    )
+    parser.add_argument(
+        "--pareto",
+        nargs="*",
+        type=Path,
+        default=None,
+        help="Print the speed/accuracy report from saved runs (default: all benchmark_*.json) and exit",
+    )
+    parser.add_argument(
+        "--seed-references",
+        action="store_true",
+        help="Write reference .txt files from the STT eval slice into --audio-dir and exit",
+    )
+    parser.add_argument(
+        "--pcm",
+        action="store_true",
+        help="Upload cached pre-decoded 16 kHz PCM to servers that accept it (native), timing inference only",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=1,
+        help="Transcribe each file this many times per server (>= 3 gives compare_benchmarks.py intervals)",
+    )
+    parser.add_argument(
+        "--sweep",
+        action="append",
+        metavar="AXIS=V1,V2",
+        help=f"Restart the native server per cell of a parameter matrix; repeat per axis ({', '.join(SWEEP_AXES)})",
+    )
+    load = parser.add_argument_group("load test")
+    load.add_argument("--load", action="store_true", help="Run the load generator instead of the sequential pass")
+    load.add_argument("--concurrency", type=int, default=4, help="Closed-loop workers / open-loop in-flight cap")
+    load.add_argument("--rate", type=float, default=None, help="Open-loop arrival rate in requests/sec (unset = closed loop)")
+    load.add_argument("--arrival", choices=["poisson", "uniform"], default="poisson", help="Open-loop arrival process")
+    load.add_argument("--duration", type=float, default=60, help="Seconds to generate load per server")
+    load.add_argument("--seed", type=int, default=0, help="Seed for file order and Poisson arrivals")
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
 
+    if args.pareto is not None:
+        paths = args.pareto or sorted(
+            p for pattern in ("benchmark_*.json", "sweep_*.json") for p in RESULTS_DIR.glob(pattern)
+            if not p.name.endswith("_latest.json")
+        )
+        pareto_report(paths)
+        return
+    if args.seed_references:
+        seed_references(args.audio_dir)
+        return
+
     # Build server configs with specified ports
     servers = get_server_configs(args.speaches_port, args.native_port)
+    if args.servers:
+        wanted = [name.strip() for name in args.servers.split(",")]
+        unknown = [name for name in wanted if name not in servers]
+        if unknown:
+            print(f"Unknown server(s): {', '.join(unknown)} (choose from {', '.join(servers)})")
+            return
+        servers = {name: servers[name] for name in wanted}
+    if args.models and "native-gpu" in servers:
+        # The native server picks the model per request (multi-model registry)
+        native = servers.pop("native-gpu")
+        for model in args.models.split(","):
+            servers[f"native-gpu[{model.strip()}]"] = {**native, "model_name": model.strip()}
 
     # Gather system info first
     system_info = get_system_info()
@@ -300,12 +941,20 @@ def main():
     # Find and sort audio files by size
     audio_dir = args.audio_dir
     audio_files = sorted(audio_dir.glob("*"), key=lambda f: f.stat().st_size if f.is_file() else 0)
-    audio_files = [f for f in audio_files if f.is_file() and f.suffix.lower() in (".mp3", ".flac", ".wav", ".m4a")]
+    audio_files = [f for f in audio_files if f.is_file() and f.suffix.lower() in AUDIO_SUFFIXES]
 
     if not audio_files:
         print(f"No audio files found in {audio_dir}")
         return
 
+    if args.pcm:
+        # Decode up front so no request timing includes it
+        print(f"Decoding {len(audio_files)} file(s) to the PCM cache...")
+        for f in audio_files:
+            cached_pcm(f)
+        for cfg in servers.values():
+            cfg["pcm"] = cfg.get("accepts_pcm", False)
+
     print("WHISPER SERVER BENCHMARK")
     print(f"{'=' * 60}")
 
@@ -325,12 +974,19 @@ def main():
     print(f"Audio files ({len(audio_files)}):")
     for f in audio_files:
         size = f.stat().st_size / 1024 / 1024
-        duration = get_audio_duration(f)
+        duration = audio_duration(f)
         duration_str = f"{duration:.1f}s ({duration / 60:.1f} min)" if duration else "unknown"
         print(f"  - {f.name}: {size:.2f} MB, {duration_str}")
 
+    if args.load:
+        run_load_mode(args, servers, audio_files, system_info)
+        return
+    if args.sweep:
+        run_sweep(args, audio_files, system_info)
+        return
+
     # Run benchmarks
-    results = run_benchmark(audio_files, servers, warmup_file=audio_files[0])
+    results = run_benchmark(audio_files, servers, warmup_file=audio_files[0], repeats=args.repeats)
 
     # Print summary
     print_summary(results)
@@ -340,33 +996,25 @@ def main():
         "timestamp": system_info.timestamp,
         "system": system_info.to_dict(),
         "servers": {name: {"url": cfg["base_url"], "model": cfg["model_name"]} for name, cfg in servers.items()},
-        "results": [
-            {
-                "server": r.server,
-                "file": r.file,
-                "file_size_bytes": r.file_size_bytes,
-                "audio_duration_sec": r.audio_duration_sec,
-                "request_time_sec": round(r.request_time_sec, 3),
-                "realtime_factor": round(r.realtime_factor, 2) if r.realtime_factor else None,
-                "success": r.success,
-                "error": r.error,
-            }
-            for r in results
-        ],
+        "results": [result_dict(r) for r in results],
     }
 
-    # Save results to timestamped JSON file
+    save_results(output_data, "benchmark")
+
+
+def save_results(output_data: dict, prefix: str) -> None:
+    """Write results to a timestamped JSON file and to <prefix>_latest.json."""
     timestamp_str = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    results_dir = Path(__file__).parent / "benchmark_results"
+    results_dir = RESULTS_DIR
     results_dir.mkdir(exist_ok=True)
 
-    output_file = results_dir / f"benchmark_{timestamp_str}.json"
+    output_file = results_dir / f"{prefix}_{timestamp_str}.json"
     with open(output_file, "w") as f:
         json.dump(output_data, f, indent=2)
         f.write("\n")  # Ensure newline at end of file
 
     # Also save as latest
-    latest_file = results_dir / "benchmark_latest.json"
+    latest_file = results_dir / f"{prefix}_latest.json"
     with open(latest_file, "w") as f:
         json.dump(output_data, f, indent=2)
         f.write("\n")  # Ensure newline at end of file
@@ -376,5 +1024,52 @@ def main():
     print(f"  {latest_file}")
 
 
+def run_load_mode(args: argparse.Namespace, servers: dict[str, dict], audio_files: list[Path], system_info) -> None:
+    """Load-test each server in turn, then summarize and save."""
+    config = {
+        "mode": f"open loop, {args.rate}/s {args.arrival}" if args.rate else f"closed loop, {args.concurrency} workers",
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "arrival": args.arrival if args.rate else None,
+        "duration_sec": args.duration,
+        "files": [f.name for f in audio_files],
+    }
+    summaries, raw = {}, {}
+    for server_name, server_config in servers.items():
+        print(f"\n{'=' * 60}")
+        print(f"LOAD TEST: {server_name} ({config['mode']}, {args.duration:.0f}s)")
+        print(f"{'=' * 60}")
+        ensure_model_installed(server_name, server_config)
+        if server_health(server_config).get("cache_enabled"):
+            # the generator cycles a handful of files, so after one pass every
+            # request would be an X-Cache hit and the percentiles would time lookups
+            print(f"  Skipping {server_name}: its transcript cache is on; restart it with --cache-max-mb 0")
+            continue
+        # One untimed request so model load doesn't land in the percentiles
+        transcribe(server_config["transcribe_url"], audio_files[0], server_config["model_name"],
+                   server_config.get("pcm", False))
+        samples, wall = run_load_test(
+            server_name, server_config, audio_files, args.concurrency, args.duration,
+            rate=args.rate, arrival=args.arrival, seed=args.seed,
+        )
+        summaries[server_name] = summarize_load(samples, wall)
+        raw[server_name] = [asdict(s) for s in samples]
+        print(f"  {len(samples)} requests in {wall:.1f}s")
+
+    if not summaries:
+        print("\nNo server was load-tested.")
+        return
+    print_load_summary(summaries, config)
+    save_results({
+        "timestamp": system_info.timestamp,
+        "system": system_info.to_dict(),
+        "servers": {name: {"url": cfg["base_url"], "model": cfg["model_name"]}
+                    for name, cfg in servers.items() if name in summaries},
+        "load": config,
+        "summary": summaries,
+        "samples": raw,
+    }, "loadtest")
+
+
 if __name__ == "__main__":
     main()
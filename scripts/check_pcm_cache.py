@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Round-trip known samples through pcm_cache.cached_pcm() and load().
+
+A stub `ffmpeg` on PATH prints a fixed float32 ramp in place of decoding, and
+PCM_CACHE_DIR points at a scratch directory, so this needs neither ffmpeg nor
+real audio. It checks that the header's sample count matches and that every
+sample survives, first and last included:
+    uv run python check_pcm_cache.py
+"""
+
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+import pcm_cache
+
+SAMPLES = 1000
+
+STUB_FFMPEG = f"""#!{sys.executable}
+import struct, sys
+sys.stdout.buffer.write(struct.pack("<{SAMPLES}f", *(i / {SAMPLES} - 0.5 for i in range({SAMPLES}))))
+"""
+
+
+def main():
+    expected = [struct.unpack("<f", struct.pack("<f", i / SAMPLES - 0.5))[0] for i in range(SAMPLES)]
+    failures: list[str] = []
+    with tempfile.TemporaryDirectory() as scratch:
+        scratch = Path(scratch)
+        stub = scratch / "bin" / "ffmpeg"
+        stub.parent.mkdir()
+        stub.write_text(STUB_FFMPEG)
+        stub.chmod(0o755)
+        os.environ["PATH"] = f"{stub.parent}{os.pathsep}{os.environ['PATH']}"
+        pcm_cache.PCM_CACHE_DIR = scratch / "cache"
+        source = scratch / "clip.m4a"
+        source.write_bytes(b"not really audio")
+
+        cached = pcm_cache.cached_pcm(source)
+        count = pcm_cache.npy_samples(cached)
+        if count != SAMPLES:
+            failures.append(f"header says {count} samples, expected {SAMPLES}")
+        body = cached.read_bytes()[pcm_cache._HEADER_LEN:]
+        if len(body) != SAMPLES * 4:
+            failures.append(f"{len(body)} bytes of samples, expected {SAMPLES * 4}")
+        else:
+            stored = list(struct.unpack(f"<{SAMPLES}f", body))
+            wrong = [i for i, (a, b) in enumerate(zip(stored, expected)) if a != b]
+            if wrong:
+                failures.append(f"{len(wrong)} samples differ, first at index {wrong[0]}")
+        if pcm_cache.cached_pcm(source) != cached:
+            failures.append("second call did not reuse the cached file")
+
+        if pcm_cache.np is None:
+            print("numpy not installed; skipping load()")
+        else:
+            loaded = pcm_cache.load(source)
+            if loaded.shape != (SAMPLES,) or loaded.tolist() != expected:
+                failures.append(f"load() returned shape {loaded.shape} with different samples")
+            del loaded  # release the memory map before the directory goes
+
+    if failures:
+        print("FAIL")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Compare benchmark result files and fail on significant regressions.
+
+Loads a baseline and one or more candidate result files from
+benchmark_results/ and matches their samples:
+- whisper runs (benchmark_*.json, sweep_*.json) by server and file, plus a
+  pooled per-server RTF across the files both runs share;
+- load tests (loadtest_*.json) by server;
+- extraction runs (extraction_*.json) by model and eval slice.
+
+For each match it bootstraps a confidence interval for the ratio of medians
+(candidate / baseline) of latency and throughput (RTF, tok/s; TTFT and the
+prefill/decode rates for streamed extraction runs). A change is a
+regression when the whole interval lies on the bad side of 1. The script exits
+1 when a regression is also larger than --threshold, so it can gate a whisper
+or llama.cpp version bump:
+
+    uv run python compare_benchmarks.py benchmark_results/benchmark_20260801_101500.json
+    uv run python compare_benchmarks.py old.json new.json --threshold 0.05
+
+With a single file, the baseline is the newest earlier run of the same kind
+(<kind>_<stamp>.json, by its recorded timestamp); <kind>_latest.json is
+rewritten by every run, so right after a run it is the candidate itself. Run the
+candidate with the transcript cache off (--cache-max-mb 0) and --repeats >= 3
+so every file has enough samples for an interval. Rows answered from a cache
+(transcript cache hits, extraction rows replayed from the response cache) are
+skipped with a warning, and a comparison left with no live samples fails
+rather than passing.
+"""
+
+import argparse
+import json
+import random
+import re
+import statistics
+import sys
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent / "benchmark_results"
+
+# Fix Windows console encoding
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding="utf-8")
+
+# Metric name -> True when higher is better.
+HIGHER_IS_BETTER = {
+    "latency_s": False, "rtf": True, "tokens_per_s": True,
+    # benchmark_extraction.py --stream only
+    "ttft_s": False, "prefill_tokens_per_s": True, "decode_tokens_per_s": True,
+}
+
+# Fewer samples than this on either side and the match is reported, not judged.
+MIN_SAMPLES = 3
+
+
+def load_samples(path: Path) -> dict[tuple[str, str], dict[str, list[float]]]:
+    """Map (subject, scope) -> metric -> samples for any result file kind."""
+    data = json.loads(path.read_text())
+    samples: dict[tuple[str, str], dict[str, list[float]]] = {}
+
+    def add(key, metric, value):
+        if value is not None:
+            samples.setdefault(key, {}).setdefault(metric, []).append(float(value))
+
+    if "conditions" in data:  # benchmark_extraction.py
+        for condition in data["conditions"]:
+            for slice_name, records in condition.get("slices", {}).items():
+                for record in records:
+                    if "latency_s" not in record or record.get("cached"):  # failed, or replayed from cache
+                        continue
+                    add((condition["model"], slice_name), "latency_s", record["latency_s"])
+                    add((condition["model"], slice_name), "tokens_per_s", record.get("tokens_per_s"))
+                    for metric in ("ttft_s", "prefill_tokens_per_s", "decode_tokens_per_s"):
+                        add((condition["model"], slice_name), metric, record.get(metric))
+    elif "samples" in data:  # benchmark_whisper.py --load
+        for server, rows in data["samples"].items():
+            for row in rows:
+                if row["success"]:
+                    add((server, "load"), "latency_s", row["latency_sec"])
+    else:  # benchmark_whisper.py sequential pass or --sweep
+        for row in data.get("results", []):
+            if not row["success"] or row.get("warmup") or row.get("cached"):  # cached: transcript cache hit
+                continue
+            server = row.get("cell") or row["server"]
+            add((server, row["file"]), "latency_s", row["request_time_sec"])
+            add((server, row["file"]), "rtf", row.get("realtime_factor"))
+    return samples
+
+
+def cached_rows(path: Path) -> int:
+    """Rows answered from a cache, which load_samples skips.
+
+    Extraction rows replayed from the LLM response cache, and whisper rows that
+    were transcript cache hits.
+    """
+    data = json.loads(path.read_text())
+    rows = [record for condition in data.get("conditions", [])
+            for records in condition.get("slices", {}).values() for record in records]
+    rows += data.get("results", [])
+    return sum(1 for row in rows if row.get("cached"))
+
+
+def pool_files(base: dict, cand: dict) -> None:
+    """Add a per-server RTF match pooled over the files both runs have.
+
+    RTF is comparable across files of different lengths (latency is not), so
+    pooling gives the sequential pass a usable sample count even when each file
+    was only transcribed once.
+    """
+    shared = [key for key in base if key in cand and key[1] != "load" and "rtf" in base[key]]
+    for side in (base, cand):
+        for server, file in shared:
+            side.setdefault((server, "* (all files)"), {}).setdefault("rtf", []).extend(side[(server, file)]["rtf"])
+
+
+def bootstrap_ratio(base: list[float], cand: list[float], resamples: int, confidence: float,
+                    rng: random.Random) -> tuple[float, float, float]:
+    """Median ratio cand/base and its percentile bootstrap interval."""
+    ratios = sorted(
+        statistics.median(rng.choices(cand, k=len(cand))) / statistics.median(rng.choices(base, k=len(base)))
+        for _ in range(resamples)
+    )
+    tail = (1 - confidence) / 2
+    lo = ratios[int(tail * (resamples - 1))]
+    hi = ratios[int((1 - tail) * (resamples - 1))]
+    return statistics.median(cand) / statistics.median(base), lo, hi
+
+
+def compare(base_path: Path, cand_path: Path, threshold: float, resamples: int, confidence: float,
+            seed: int) -> list[dict]:
+    """One row per (subject, scope, metric) present in both files."""
+    base, cand = load_samples(base_path), load_samples(cand_path)
+    pool_files(base, cand)
+    rng = random.Random(seed)
+    rows = []
+    for key in sorted(set(base) & set(cand)):
+        for metric in sorted(set(base[key]) & set(cand[key])):
+            b, c = base[key][metric], cand[key][metric]
+            row = {
+                "subject": key[0], "scope": key[1], "metric": metric, "n": (len(b), len(c)),
+                "base": statistics.median(b), "cand": statistics.median(c),
+            }
+            if min(len(b), len(c)) < MIN_SAMPLES or row["base"] <= 0:
+                row["verdict"] = f"n<{MIN_SAMPLES}"
+                rows.append(row)
+                continue
+            ratio, lo, hi = bootstrap_ratio(b, c, resamples, confidence, rng)
+            # Express everything as "how much worse": > 0 is a slowdown either way.
+            if HIGHER_IS_BETTER[metric]:
+                change, worse_lo, better_hi = 1 / ratio - 1, 1 / hi - 1, 1 / lo - 1
+            else:
+                change, worse_lo, better_hi = ratio - 1, lo - 1, hi - 1
+            row.update(ratio=ratio, ci=(lo, hi))
+            if worse_lo > 0:
+                row["verdict"] = "REGRESSION" if change > threshold else "slower"
+            elif better_hi < 0:
+                row["verdict"] = "faster"
+            else:
+                row["verdict"] = "ok"
+            rows.append(row)
+    return rows
+
+
+def print_rows(rows: list[dict], base_path: Path, cand_path: Path, confidence: float) -> None:
+    print(f"\n{'=' * 60}")
+    print(f"{base_path.name} -> {cand_path.name}")
+    print(f"{'=' * 60}\n")
+    if not rows:
+        print("No matching server/file or model/slice pairs between these files.")
+        return
+    ci_label = f"{confidence:.0%} CI"
+    print(f"{'Subject':<28} {'Scope':<24} {'Metric':<13} {'n':>7} {'Base':>9} {'Cand':>9} "
+          f"{'Ratio':>7} {ci_label:>15}  Verdict")
+    print("-" * 130)
+    for row in rows:
+        n = f"{row['n'][0]}/{row['n'][1]}"
+        ratio = f"{row['ratio']:.3f}" if "ratio" in row else "-"
+        ci = f"[{row['ci'][0]:.3f}, {row['ci'][1]:.3f}]" if "ci" in row else "-"
+        print(f"{row['subject'][:28]:<28} {row['scope'][:24]:<24} {row['metric']:<13} {n:>7} "
+              f"{row['base']:>9.3f} {row['cand']:>9.3f} {ratio:>7} {ci:>15}  {row['verdict']}")
+
+
+RESULT_NAME = re.compile(r"^(?P<kind>.+?)_(?:\d{8}_\d{6}|latest)\.json$")
+
+
+def run_timestamp(path: Path) -> str | None:
+    """The ISO timestamp a result file records for its run (UTC, so comparable as text)."""
+    return json.loads(path.read_text()).get("timestamp")
+
+
+def default_baseline(candidate: Path) -> Path | None:
+    """Newest <kind>_<stamp>.json in the candidate's directory recorded before it."""
+    match = RESULT_NAME.match(candidate.name)
+    cand_time = run_timestamp(candidate)
+    if match is None or cand_time is None:
+        return None
+    earlier = []
+    for path in candidate.parent.glob(f"{match['kind']}_*.json"):
+        other = RESULT_NAME.match(path.name)
+        if other is None or other["kind"] != match["kind"] or path.name.endswith("_latest.json"):
+            continue
+        when = run_timestamp(path)
+        if when is not None and when < cand_time:
+            earlier.append((when, path))
+    return max(earlier)[1] if earlier else None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare benchmark result files; exit 1 on significant regressions",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("files", nargs="+", type=Path,
+                        help="BASELINE CANDIDATE [CANDIDATE...], or just CANDIDATE to compare against the previous run")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Fail when a significant slowdown exceeds this fraction")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Bootstrap interval coverage")
+    parser.add_argument("--resamples", type=int, default=2000, help="Bootstrap resamples")
+    parser.add_argument("--seed", type=int, default=0, help="Bootstrap RNG seed (results are reproducible)")
+    args = parser.parse_args()
+
+    if len(args.files) == 1:
+        if not args.files[0].exists():
+            parser.error(f"{args.files[0]} not found")
+        baseline, candidates = default_baseline(args.files[0]), args.files
+        if baseline is None:
+            parser.error(f"no earlier run of the same kind next to {args.files[0]}; pass BASELINE explicitly")
+        print(f"baseline: {baseline.name}")
+    else:
+        baseline, candidates = args.files[0], args.files[1:]
+    for path in (baseline, *candidates):
+        if not path.exists():
+            parser.error(f"{path} not found")
+    base_time = run_timestamp(baseline)
+    for candidate in candidates:
+        if base_time is not None and run_timestamp(candidate) == base_time:
+            parser.error(f"{baseline.name} and {candidate.name} are the same run (timestamp {base_time})")
+
+    for path in (baseline, *candidates):
+        if skipped := cached_rows(path):
+            print(f"WARNING: {path.name}: skipped {skipped} cached rows (not measured; rerun with "
+                  f"the transcript cache off or benchmark_extraction.py without --use-cache)")
+
+    failed, unmatched = [], []
+    for candidate in candidates:
+        rows = compare(baseline, candidate, args.threshold, args.resamples, args.confidence, args.seed)
+        print_rows(rows, baseline, candidate, args.confidence)
+        failed += [(candidate, row) for row in rows if row["verdict"] == "REGRESSION"]
+        if not rows:
+            unmatched.append(candidate)
+
+    if failed or unmatched:
+        if failed:
+            print(f"\nFAIL: {len(failed)} regression(s) beyond {args.threshold:.0%}:")
+            for candidate, row in failed:
+                print(f"  {candidate.name}: {row['subject']} / {row['scope']} {row['metric']} "
+                      f"{row['base']:.3f} -> {row['cand']:.3f}")
+        # Nothing measured is not a pass: all rows failed, were cached, or don't overlap.
+        for candidate in unmatched:
+            print(f"\nFAIL: no live samples to compare between {baseline.name} and {candidate.name}")
+        sys.exit(1)
+    print(f"\nPASS: no significant regression beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,32 +15,57 @@ reference, never by the judge.
 The judge must come from a different model family than the teacher (default
 gemma-3-27b vs the Qwen teacher). Constrained decoding ON for both phases.
 
+Both phases run as one bounded-concurrency work queue across all conditions
+(--concurrency, match the judge's llama-server --parallel). Reference jobs
+go first and each one releases the grading jobs for its transcript, so
+workers move between phases on their own without a barrier. Progress is
+checkpointed every CHECKPOINT_EVERY jobs: references to judge_reference.json,
+graded rows to <results>.judge_checkpoint.json. A rerun after a crash
+resumes from that checkpoint.
+
 Aggregation notes:
 - The stt slice is 16 memos x 4 STT systems = 64 rows that are NOT
   independent; it is aggregated per memo first, then across memos (n=16).
 - Quality scores (1-5) saturate on easy slices; the discriminating metrics
   are hallucinated_items, action-item recall, and the code grades.
 
+Both phases go through the shared response cache (finetune/response_cache.py,
+keyed on judge model + prompt + schema), so re-judging a report after adding a
+condition or touching aggregation only calls the judge for new rows.
+--no-cache forces fresh judgements.
+
 Usage:
     uv run judge_extraction.py benchmark_results/extraction_latest.json
     uv run judge_extraction.py <results.json> --judge-model gemma-3-27b
+    uv run judge_extraction.py <results.json> --concurrency 8
 """
 
 import argparse
+import asyncio
+import hashlib
+import itertools
 import json
 import sys
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 import requests
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "finetune"))
+import response_cache  # noqa: E402
 
 CORPUS = Path(__file__).parent.parent / "finetune" / "corpus"
 RESULTS_DIR = Path(__file__).parent / "benchmark_results"
 REFERENCE_PATH = RESULTS_DIR / "judge_reference.json"
 
+# Judge calls between checkpoint writes.
+CHECKPOINT_EVERY = 20
+# Queue priorities: a finished reference unlocks grading jobs, so build them first.
+REF_PRIORITY, GRADE_PRIORITY = 0, 1
+
 SLICE_FILES = {
     "real": CORPUS / "eval_real.jsonl",
     "stt": CORPUS / "eval" / "eval_stt_voice_notes.jsonl",
@@ -105,46 +130,149 @@ def load_jsonl(path: Path) -> dict[str, dict]:
 
 
 def chat_json(base_url: str, model: str, system: str, user: str, schema: dict) -> dict:
-    resp = requests.post(
-        f"{base_url}/chat/completions",
-        json={
-            "model": model,
-            "messages": [{"role": "system", "content": system},
-                         {"role": "user", "content": user}],
-            "temperature": 0.0,
-            "max_tokens": 512,
-            "response_format": {
-                "type": "json_schema",
-                "json_schema": {"name": "judgement", "strict": True, "schema": schema},
-            },
+    body = {
+        "model": model,
+        "messages": [{"role": "system", "content": system},
+                     {"role": "user", "content": user}],
+        "temperature": 0.0,
+        "max_tokens": 512,
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "judgement", "strict": True, "schema": schema},
         },
-        timeout=600,
-    )
-    resp.raise_for_status()
-    return json.loads(resp.json()["choices"][0]["message"]["content"])
-
-
-def build_reference(base_url: str, model: str,
-                    transcripts: dict[str, dict[str, dict]]) -> dict[str, list[str]]:
-    """Phase 1: blind expected-action-item extraction, cached across runs."""
-    cache = {"judge_model": model, "refs": {}}
+    }
+    cache = response_cache.get_cache()
+    hit = cache.get(body) if cache else None
+    if hit is not None:
+        data = hit[0]
+    else:
+        t0 = time.perf_counter()
+        resp = requests.post(f"{base_url}/chat/completions", json=body, timeout=600)
+        resp.raise_for_status()
+        data = resp.json()
+        if cache:
+            cache.put(body, data, time.perf_counter() - t0)
+    return json.loads(data["choices"][0]["message"]["content"])
+
+
+def load_reference_cache(model: str) -> dict:
+    """Phase 1 cache: blind expected action items per transcript, per judge model."""
     if REFERENCE_PATH.exists():
         prior = json.loads(REFERENCE_PATH.read_text())
         if prior.get("judge_model") == model:
-            cache = prior
-    refs = cache["refs"]
-    todo = [(sl, rid, rec) for sl, recs in transcripts.items()
-            for rid, rec in recs.items() if rid not in refs]
-    print(f"reference: {len(refs)} cached, {len(todo)} to build")
-    for n, (sl, rid, rec) in enumerate(todo, 1):
-        refs[rid] = chat_json(base_url, model, REF_SYSTEM,
-                              REF_TEMPLATE.format(transcript=rec["text"]),
-                              REF_SCHEMA)["action_items"]
-        if n % 10 == 0 or n == len(todo):
-            print(f"  reference {n}/{len(todo)}")
-            REFERENCE_PATH.write_text(json.dumps(cache, indent=1, ensure_ascii=False))
-    REFERENCE_PATH.write_text(json.dumps(cache, indent=1, ensure_ascii=False))
-    return refs
+            return prior
+    return {"judge_model": model, "refs": {}}
+
+
+def write_json(path: Path, data: dict) -> None:
+    # write-then-rename so a crash mid-write never leaves a truncated checkpoint
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=1, ensure_ascii=False))
+    tmp.replace(path)
+
+
+async def run_judge(base_url: str, model: str, transcripts: dict[str, dict[str, dict]],
+                    report: dict, ref_cache: dict, concurrency: int, checkpoint_path: Path) -> None:
+    """Build missing references and grade every unjudged row, `concurrency` calls at a time.
+
+    Rows are mutated in place on the event loop, so checkpoints always see
+    a consistent report. Rows whose reference can't be built stay unjudged.
+    """
+    refs = ref_cache["refs"]
+    queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+    order = itertools.count()  # tie-breaker: never compare job payloads
+    waiting: dict[str, list[tuple[str, dict]]] = defaultdict(list)
+
+    n_refs = 0
+    for slice_name, recs in transcripts.items():
+        for rid in recs:
+            if rid not in refs:
+                queue.put_nowait((REF_PRIORITY, next(order), ("ref", slice_name, rid)))
+                n_refs += 1
+    n_grades = 0
+    for condition in report["conditions"]:
+        for slice_name, rows in condition["slices"].items():
+            for row in rows:
+                if "output" not in row or "judgement" in row:
+                    continue
+                n_grades += 1
+                if row["id"] in refs:
+                    queue.put_nowait((GRADE_PRIORITY, next(order), ("grade", slice_name, row)))
+                else:
+                    waiting[row["id"]].append((slice_name, row))
+    print(f"reference: {len(refs)} cached, {n_refs} to build | grading: {n_grades} rows "
+          f"| concurrency {concurrency}")
+
+    done = {"ref": 0, "grade": 0, "errors": 0}
+    since_checkpoint = 0
+
+    def checkpoint():
+        write_json(REFERENCE_PATH, ref_cache)
+        write_json(checkpoint_path, report)
+
+    async def handle(kind: str, slice_name: str, item):
+        if kind == "ref":
+            rec = transcripts[slice_name][item]
+            try:
+                result = await asyncio.to_thread(
+                    chat_json, base_url, model, REF_SYSTEM,
+                    REF_TEMPLATE.format(transcript=rec["text"]), REF_SCHEMA)
+            except Exception as e:
+                dropped = waiting.pop(item, [])
+                print(f"  reference {item} FAILED: {e} ({len(dropped)} rows left unjudged)")
+                return
+            refs[item] = result["action_items"]
+            for grade_slice, row in waiting.pop(item, []):
+                queue.put_nowait((GRADE_PRIORITY, next(order), ("grade", grade_slice, row)))
+            return
+        row = item
+        rec = transcripts[slice_name][row["id"]]
+        reference = refs[row["id"]]
+        row["expected_action_items"] = len(reference)
+        ref_text = "\n".join(f"- {a}" for a in reference) or "(none)"
+        try:
+            row["judgement"] = await asyncio.to_thread(
+                chat_json, base_url, model, JUDGE_SYSTEM,
+                JUDGE_TEMPLATE.format(
+                    transcript=rec["text"], reference=ref_text,
+                    output=json.dumps(row["output"], ensure_ascii=False)),
+                JUDGE_SCHEMA)
+        except Exception as e:
+            print(f"  [{slice_name}] {row['id']} judge FAILED: {e}")
+
+    async def worker():
+        nonlocal since_checkpoint
+        while True:
+            _, _, (kind, slice_name, item) = await queue.get()
+            # a job must never take its worker down: with every worker gone,
+            # queue.join() below would wait forever
+            try:
+                await handle(kind, slice_name, item)
+                done[kind] += 1
+                if (done["ref"] + done["grade"]) % 10 == 0:
+                    print(f"  reference {done['ref']}/{n_refs} | graded {done['grade']}/{n_grades}")
+                since_checkpoint += 1
+                if since_checkpoint >= CHECKPOINT_EVERY:
+                    since_checkpoint = 0
+                    checkpoint()
+            except Exception as e:
+                done["errors"] += 1
+                label = item if kind == "ref" else item.get("id")
+                print(f"  {kind} job {slice_name}/{label} ERROR: {e!r}")
+            finally:
+                queue.task_done()
+
+    # to_thread's default pool is sized by CPU count, not by what the server can take
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    # grading jobs are queued by reference jobs before those are marked done,
+    # so join() only returns once both phases have drained
+    await queue.join()
+    for w in workers:
+        w.cancel()
+    checkpoint()
+    print(f"  reference {done['ref']}/{n_refs} | graded {done['grade']}/{n_grades}"
+          + (f" | {done['errors']} job errors (see above)" if done["errors"] else ""))
 
 
 def aggregate(rows: list[dict], cluster_of: dict[str, str] | None = None) -> dict:
@@ -187,9 +315,32 @@ def main():
     parser.add_argument("results", type=Path)
     parser.add_argument("--judge-model", default="gemma-3-27b")
     parser.add_argument("--base-url", default="http://localhost:9292/v1")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="judge calls in flight (match the judge's llama-server --parallel)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always call the judge, bypassing the shared response cache")
     args = parser.parse_args()
-
-    report = json.loads(args.results.read_text())
+    if args.no_cache:
+        response_cache.ENABLED = False
+
+    source = args.results.read_bytes()
+    report = json.loads(source)
+    # the checkpoint belongs to this exact report: extraction_latest.json is
+    # rewritten by every benchmark run, so a stale checkpoint from a crashed
+    # judge of an older run must not graft old judgements onto new outputs
+    marker = {"model": args.judge_model, "source": str(args.results),
+              "source_sha256": hashlib.sha256(source).hexdigest()}
+    checkpoint_path = args.results.with_name(f"{args.results.stem}.judge_checkpoint.json")
+    if checkpoint_path.exists():
+        prior = json.loads(checkpoint_path.read_text())
+        if prior.get("judge_checkpoint") == marker:
+            report = prior
+            judged = sum("judgement" in r for c in report["conditions"]
+                         for rows in c["slices"].values() for r in rows)
+            print(f"resuming from {checkpoint_path.name}: {judged} rows already judged")
+        else:
+            print(f"ignoring {checkpoint_path.name}: made for a different report or judge model")
+    report["judge_checkpoint"] = marker
     transcripts = {name: load_jsonl(path)
                    for name, path in SLICE_FILES.items() if path.exists()}
 
@@ -198,38 +349,22 @@ def main():
         print(f"WARNING: judge '{args.judge_model}' shares the teacher's model "
               f"family — scores will not be family-independent.")
 
-    refs = build_reference(args.base_url, args.judge_model, transcripts)
+    ref_cache = load_reference_cache(args.judge_model)
+    asyncio.run(run_judge(args.base_url, args.judge_model, transcripts, report,
+                          ref_cache, args.concurrency, checkpoint_path))
 
     # stt rows cluster by underlying memo (16 memos x 4 STT systems)
     stt_cluster = {rid: rec.get("memo", rid)
                    for rid, rec in transcripts.get("stt", {}).items()}
 
     for condition in report["conditions"]:
-        print(f"\n=== judging {condition['model']} with {args.judge_model}")
         for slice_name, rows in condition["slices"].items():
-            for i, row in enumerate(rows, 1):
-                if "output" not in row or "judgement" in row:
-                    continue
-                rec = transcripts[slice_name][row["id"]]
-                reference = refs[row["id"]]
-                row["expected_action_items"] = len(reference)
-                ref_text = "\n".join(f"- {a}" for a in reference) or "(none)"
-                try:
-                    row["judgement"] = chat_json(
-                        args.base_url, args.judge_model, JUDGE_SYSTEM,
-                        JUDGE_TEMPLATE.format(
-                            transcript=rec["text"], reference=ref_text,
-                            output=json.dumps(row["output"], ensure_ascii=False)),
-                        JUDGE_SCHEMA)
-                except Exception as e:
-                    print(f"  [{slice_name} {i}] {row['id']} judge FAILED: {e}")
-                if i % 10 == 0 or i == len(rows):
-                    print(f"  [{slice_name}] {i}/{len(rows)}")
             cluster = stt_cluster if slice_name == "stt" else None
             condition.setdefault("judged", {})[slice_name] = aggregate(rows, cluster)
         condition["judged"]["all_rows_unclustered"] = aggregate(
             [r for rows in condition["slices"].values() for r in rows])
 
+    del report["judge_checkpoint"]
     report["judge"] = {
         "model": args.judge_model,
         "design": "two-phase: blind reference action items, then grading",
@@ -238,7 +373,10 @@ def main():
     stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     out = RESULTS_DIR / f"extraction_judged_{stamp}.json"
     out.write_text(json.dumps(report, indent=1, ensure_ascii=False))
+    checkpoint_path.unlink(missing_ok=True)
     print(f"\njudged results -> {out}")
+    if response_cache.get_cache():
+        print(response_cache.get_cache().summary())
     for c in report["conditions"]:
         print(f"  {c['model']}:")
         for sl, agg in c["judged"].items():
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Decode-once PCM cache for benchmark audio.
+
+Each test file is decoded by ffmpeg once into 16 kHz mono float32 samples,
+stored as a .npy file under PCM_CACHE_DIR and keyed on the source's name, size
+and mtime, so editing or replacing a file re-decodes it. The .npy is written
+and parsed with the stdlib (numpy isn't a benchmark dependency):
+- the duration comes from the sample count in its header, with no mutagen or
+  ffprobe call;
+- the file is uploaded as-is to servers that accept raw PCM, so runs time
+  inference rather than the server's codec.
+
+With numpy installed, load() memory-maps the samples for local use.
+"""
+
+import ast
+import struct
+import subprocess
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # optional: only load() needs it
+    np = None
+
+SAMPLE_RATE = 16000
+PCM_CACHE_DIR = Path.home() / ".cache" / "lima-whisper" / "bench-pcm"
+# Part of every cache file name; bumped to 2 when files written before the
+# header-flush fix (first samples overwritten by the header) had to be retired.
+FORMAT_VERSION = 2
+
+NPY_MAGIC = b"\x93NUMPY"
+# Fixed header size (magic + version + length + dict, padded), so the header
+# can be written before the sample count is known and rewritten in place.
+_HEADER_LEN = 128
+
+
+def _npy_header(samples: int) -> bytes:
+    header = repr({"descr": "<f4", "fortran_order": False, "shape": (samples,)})
+    prefix = NPY_MAGIC + b"\x01\x00"
+    pad = _HEADER_LEN - len(prefix) - 2 - len(header) - 1
+    return prefix + struct.pack("<H", _HEADER_LEN - len(prefix) - 2) + header.encode() + b" " * pad + b"\n"
+
+
+def npy_samples(path: Path) -> int:
+    """Sample count from a 1-D float32 .npy header."""
+    with open(path, "rb") as f:
+        if f.read(6) != NPY_MAGIC:
+            raise ValueError(f"{path} is not a .npy file")
+        major = f.read(2)[0]
+        (length,) = struct.unpack("<H" if major == 1 else "<I", f.read(2 if major == 1 else 4))
+        header = ast.literal_eval(f.read(length).decode())
+    return header["shape"][0]
+
+
+def cache_path(source: Path) -> Path:
+    stat = source.stat()
+    return PCM_CACHE_DIR / f"{source.stem}-{stat.st_size}-{stat.st_mtime_ns}-v{FORMAT_VERSION}.npy"
+
+
+def cached_pcm(source: Path) -> Path:
+    """Path of the decoded .npy for `source`, decoding it on first use."""
+    target = cache_path(source)
+    if target.exists():
+        return target
+    PCM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    partial = target.with_suffix(".partial")
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error", "-i", str(source),
+        "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-",
+    ]
+    with open(partial, "wb") as out:
+        out.write(_npy_header(0))
+        # ffmpeg writes through the same fd; flush the placeholder first or it
+        # lands on top of the samples when the buffer drains.
+        out.flush()
+        proc = subprocess.run(cmd, stdout=out, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            out.close()
+            partial.unlink()
+            raise RuntimeError(f"ffmpeg could not decode {source.name}: {proc.stderr.decode(errors='replace')[:300]}")
+        samples = (out.tell() - _HEADER_LEN) // 4
+        out.seek(0)
+        out.write(_npy_header(samples))
+    partial.rename(target)
+    return target
+
+
+def pcm_duration(source: Path) -> float:
+    """Duration in seconds from the cached sample count (decodes on first use)."""
+    return npy_samples(cached_pcm(source)) / SAMPLE_RATE
+
+
+def load(source: Path):
+    """Memory-mapped float32 samples for `source` (requires numpy)."""
+    if np is None:
+        raise RuntimeError("numpy is required to load PCM samples")
+    return np.load(cached_pcm(source), mmap_mode="r")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Word and character error rate for transcript accuracy scoring.
+
+Both texts are normalized first (lowercase, punctuation dropped, whitespace
+collapsed) so formatting differences between STT systems don't count as
+errors. The edit distance is computed one DP row at a time with numpy when it
+is installed (each row is a handful of vector ops, fast enough for hour-long
+meetings); otherwise a plain-Python DP gives the same numbers, slower.
+"""
+
+import re
+import unicodedata
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python fallback below
+    np = None
+
+_PUNCT = re.compile(r"[^\w\s']|_")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents-insensitive punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = text.replace("’", "'")
+    text = _PUNCT.sub(" ", text)
+    text = re.sub(r"(?<!\w)'|'(?!\w)", " ", text)  # quotes, not apostrophes
+    return " ".join(text.split())
+
+
+def edit_distance(ref: list, hyp: list) -> int:
+    """Levenshtein distance between two token sequences."""
+    if not ref:
+        return len(hyp)
+    if not hyp:
+        return len(ref)
+    if np is not None:
+        return _edit_distance_numpy(ref, hyp)
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        row = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = row
+    return prev[-1]
+
+
+def _edit_distance_numpy(ref: list, hyp: list) -> int:
+    # Map tokens to ints so each row's substitution costs are one comparison.
+    vocab: dict = {}
+    ref_ids = np.array([vocab.setdefault(t, len(vocab)) for t in ref])
+    hyp_ids = np.array([vocab.setdefault(t, len(vocab)) for t in hyp])
+    idx = np.arange(len(hyp) + 1)
+    prev = idx.copy()
+    for i, r in enumerate(ref_ids, 1):
+        # Deletion/substitution don't depend on the current row...
+        best = np.empty_like(prev)
+        best[0] = i
+        best[1:] = np.minimum(prev[1:] + 1, prev[:-1] + (hyp_ids != r))
+        # ...insertion does: row[j] = min_k<=j (best[k] + j - k), a running
+        # minimum of best[k] - k shifted back by j.
+        prev = np.minimum.accumulate(best - idx) + idx
+    return int(prev[-1])
+
+
+def score(reference: str, hypothesis: str) -> dict:
+    """WER/CER plus the raw counts needed to pool them across files."""
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    ref_words, hyp_words = ref.split(), hyp.split()
+    word_errors = edit_distance(ref_words, hyp_words)
+    char_errors = edit_distance(list(ref), list(hyp))
+    return {
+        "wer": word_errors / len(ref_words) if ref_words else None,
+        "cer": char_errors / len(ref) if ref else None,
+        "word_errors": word_errors,
+        "ref_words": len(ref_words),
+        "char_errors": char_errors,
+        "ref_chars": len(ref),
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score a transcript against a reference")
+    parser.add_argument("reference", help="Reference transcript file")
+    parser.add_argument("hypothesis", help="Hypothesis transcript file")
+    args = parser.parse_args()
+    with open(args.reference) as f:
+        reference = f.read()
+    with open(args.hypothesis) as f:
+        hypothesis = f.read()
+    result = score(reference, hypothesis)
+    print(f"WER: {result['wer']:.2%} ({result['word_errors']}/{result['ref_words']} words)")
+    print(f"CER: {result['cer']:.2%} ({result['char_errors']}/{result['ref_chars']} chars)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Priority admission control shared by the LIMA whisper servers.
+
+Requests pass through an AdmissionQueue before they contend for the model
+lock. Each request belongs to a priority class (interactive recorder uploads vs
+batch/backfill imports); waiters are admitted highest class first, each class
+has its own concurrency limit, and the number of waiting requests is bounded so
+an overloaded server answers 429 + Retry-After instead of queueing for minutes.
+
+Admission only decides *order*: once admitted, a request still takes the model
+lock as before. With the default limits (one in flight per class) an
+interactive memo waits behind at most one backfill transcription.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+from contextlib import asynccontextmanager
+from typing import Optional
+
+# Lower value = admitted first.
+PRIORITY_CLASSES = {"interactive": 0, "batch": 1}
+
+# Accepted spellings for the X-Priority header / priority form field.
+PRIORITY_ALIASES = {
+    "interactive": "interactive",
+    "high": "interactive",
+    "realtime": "interactive",
+    "batch": "batch",
+    "low": "batch",
+    "backfill": "batch",
+    "bulk": "batch",
+}
+
+
+class QueueFull(Exception):
+    """Raised when the waiting queue is at its bound."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Transcription queue full; retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def parse_priority(value: Optional[str], default: str = "interactive") -> str:
+    """Map a header/form value to a priority class; raises ValueError if unknown."""
+    if not value:
+        return default
+    try:
+        return PRIORITY_ALIASES[value.strip().lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown priority '{value}' (expected one of: {', '.join(sorted(PRIORITY_ALIASES))})"
+        ) from None
+
+
+class AdmissionQueue:
+    """Bounded priority queue with per-class concurrency limits.
+
+    Single event loop only (no thread safety needed): acquire/release are
+    called from request handlers, never from executor threads.
+    """
+
+    def __init__(self, limits: dict[str, int], max_waiting: int):
+        self.limits = limits
+        self.max_waiting = max_waiting  # 0 = unbounded
+        self.active = {name: 0 for name in PRIORITY_CLASSES}
+        self._waiting: list[tuple[int, int, str, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # Moving average of admitted-request hold time, for Retry-After.
+        self._avg_hold_s = 10.0
+
+    def waiting(self, priority: Optional[str] = None) -> int:
+        return sum(1 for _, _, cls, fut in self._waiting
+                   if not fut.done() and (priority is None or cls == priority))
+
+    def full(self) -> bool:
+        return self.max_waiting > 0 and self.waiting() >= self.max_waiting
+
+    def retry_after(self) -> int:
+        """Rough seconds until a slot frees up, from the queue depth."""
+        slots = max(1, sum(self.limits.values()))
+        return max(1, math.ceil((self.waiting() + 1) * self._avg_hold_s / slots))
+
+    def _dispatch(self) -> None:
+        """Admit waiters in priority order while their class has capacity.
+
+        A full class doesn't block a lower one: backfill still runs alongside
+        interactive work up to its own limit.
+        """
+        blocked = []
+        while self._waiting:
+            entry = heapq.heappop(self._waiting)
+            _, _, cls, fut = entry
+            if fut.done():  # cancelled while waiting
+                continue
+            if self.active[cls] < self.limits[cls]:
+                self.active[cls] += 1
+                fut.set_result(None)
+            else:
+                blocked.append(entry)
+        for entry in blocked:
+            heapq.heappush(self._waiting, entry)
+
+    async def acquire(self, priority: str, bounded: bool = True) -> None:
+        """Wait for admission; raises QueueFull if the queue is at its bound.
+
+        bounded=False skips the depth check, for requests that already passed
+        it (a streaming response admits inside its body generator).
+        """
+        if bounded and self.full():
+            raise QueueFull(self.retry_after())
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (PRIORITY_CLASSES[priority], next(self._seq), priority, fut))
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Admitted in the same tick the waiter was cancelled.
+                self.release(priority)
+            else:
+                fut.cancel()
+            raise
+
+    def release(self, priority: str, held_s: Optional[float] = None) -> None:
+        self.active[priority] -= 1
+        if held_s is not None:
+            self._avg_hold_s = 0.8 * self._avg_hold_s + 0.2 * held_s
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: str, bounded: bool = True):
+        """`async with queue.slot(priority):` — admission for the block's duration."""
+        await self.acquire(priority, bounded)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            yield
+        finally:
+            self.release(priority, loop.time() - started)
+
+    def stats(self) -> dict:
+        return {
+            name: {"active": self.active[name], "waiting": self.waiting(name), "limit": self.limits[name]}
+            for name in PRIORITY_CLASSES
+        }
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Check the batched transcription path against plain per-clip runs.
+
+Runs two short clips through _transcribe_batch (what coalesced requests use)
+and checks that each gets its own text and timestamps on its own clock:
+non-empty, close to a solo transcribe() of the same clip, and within the
+clip's duration. It then joins the clips with silence and runs them through
+_transcribe_chunked, checking that the stitched segments start near zero,
+never go backwards and put the second clip after the first.
+
+Needs a real model and speech, so it is a manual check rather than a test:
+    uv run python check_batching.py                     # two shortest scripts/test_audio files
+    uv run python check_batching.py a.wav b.m4a --model small --device cuda
+
+_transcribe_chunked takes the batched branch unless DEVICE=cpu is set.
+"""
+
+import argparse
+import difflib
+import sys
+from pathlib import Path
+
+import numpy as np
+from faster_whisper import WhisperModel, decode_audio
+
+import server_cuda
+from server_cuda import SAMPLE_RATE
+
+TEST_AUDIO = Path(__file__).parent.parent.parent / "scripts" / "test_audio"
+
+# Solo and batched decodes differ a little (VAD cuts, batched beam search), so
+# only require most of the words to agree.
+MIN_SIMILARITY = 0.6
+GAP_SECONDS = 2.0
+SLACK_SECONDS = 0.5  # segment ends may overshoot the last speech sample slightly
+
+
+def similarity(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, a.lower().split(), b.lower().split()).ratio()
+
+
+def check_times(label: str, segments: list[dict], duration: float, failures: list[str]) -> None:
+    previous = 0.0
+    for segment in segments:
+        if not (0 <= segment["start"] <= segment["end"] <= duration + SLACK_SECONDS):
+            failures.append(f"{label}: segment {segment['start']}-{segment['end']}s outside 0-{duration:.1f}s")
+        if segment["start"] < previous:
+            failures.append(f"{label}: segment at {segment['start']}s goes back from {previous}s")
+        previous = segment["start"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check batched and chunked transcription offsets")
+    parser.add_argument("clips", nargs="*", type=Path, help="Two audio files (default: two shortest test files)")
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--device", default="cuda")
+    parser.add_argument("--compute-type", default="default")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Trim each clip to this length")
+    args = parser.parse_args()
+
+    clips = args.clips or sorted((f for f in TEST_AUDIO.glob("*") if f.suffix != ".txt"),
+                                 key=lambda f: f.stat().st_size)[:2]
+    if len(clips) != 2:
+        parser.error(f"need two clips (found {len(clips)} in {TEST_AUDIO})")
+    audios = [decode_audio(str(c), sampling_rate=SAMPLE_RATE)[: int(args.seconds * SAMPLE_RATE)] for c in clips]
+    durations = [len(a) / SAMPLE_RATE for a in audios]
+    model = WhisperModel(args.model, device=args.device, compute_type=args.compute_type)
+    failures: list[str] = []
+
+    solo = []
+    for audio in audios:
+        segments, _ = model.transcribe(audio, language=args.language, beam_size=server_cuda.WHISPER_BEAM_SIZE)
+        solo.append(" ".join(s.text.strip() for s in segments))
+
+    batched = server_cuda._transcribe_batch(model, audios, args.language)
+    texts = [" ".join(s["text"].strip() for s in segments) for segments in batched]
+    for clip, segments, text, reference, duration in zip(clips, batched, texts, solo, durations):
+        print(f"{clip.name} ({duration:.1f}s): {len(segments)} batched segments")
+        print(f"  solo:    {reference[:100]}")
+        print(f"  batched: {text[:100]}")
+        if not segments:
+            failures.append(f"{clip.name}: no batched segments")
+            continue
+        if similarity(text, reference) < MIN_SIMILARITY:
+            failures.append(f"{clip.name}: batched text differs from solo (similarity {similarity(text, reference):.2f})")
+        check_times(f"{clip.name} batched", segments, duration, failures)
+    if texts[0] and texts[0] == texts[1]:
+        failures.append("both clips got the same batched text")
+
+    joined = np.concatenate([audios[0], np.zeros(int(GAP_SECONDS * SAMPLE_RATE), dtype=np.float32), audios[1]])
+    second_starts = durations[0] + GAP_SECONDS
+    stitched, _ = server_cuda._transcribe_chunked(model, joined, args.language)
+    print(f"chunked ({len(joined) / SAMPLE_RATE:.1f}s): {len(stitched)} segments, "
+          f"starts {[s['start'] for s in stitched]}")
+    if not stitched:
+        failures.append("chunked: no segments")
+    else:
+        check_times("chunked", stitched, len(joined) / SAMPLE_RATE, failures)
+        if stitched[0]["start"] >= durations[0]:
+            failures.append(f"chunked: first segment starts at {stitched[0]['start']}s, after the first clip")
+        if not any(s["start"] >= second_starts - SLACK_SECONDS for s in stitched):
+            failures.append(f"chunked: nothing placed in the second clip (from {second_starts:.1f}s)")
+        if [s["id"] for s in stitched] != list(range(len(stitched))):
+            failures.append("chunked: segment ids are not sequential")
+
+    if failures:
+        print("\nFAIL")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nPASS")
+
+
+if __name__ == "__main__":
+    main()
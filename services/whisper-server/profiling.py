@@ -0,0 +1,123 @@
+"""
+Opt-in per-request profiling for the LIMA whisper servers.
+
+A request is profiled when it sends an X-Profile header (or WHISPER_PROFILE=1
+profiles every request). Its stages — upload receive, hashing, admission wait,
+decode, model lock, VAD/feature prep, encoder, decoder, serialization — are
+timed into a RequestProfile and returned as a standard Server-Timing header,
+which browser devtools and curl -v both show.
+
+A sampled subset of profiled requests (WHISPER_PROFILE_SAMPLE_RATE, or
+X-Profile: cprofile for this request) also runs its heavy stages under
+cProfile and writes one .prof file per stage to WHISPER_PROFILE_DIR, for
+snakeviz or `python -m pstats`. cProfile only sees Python frames; the
+CTranslate2/MLX kernels show up as single calls, which is what the encoder and
+decoder stage timings are for (use `py-spy record --native` for the rest).
+"""
+
+import cProfile
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+_ids = itertools.count(1)
+
+
+class RequestProfile:
+    """Stage timings for one request; a no-op recorder unless enabled."""
+
+    def __init__(self, enabled: bool = False, dump_dir: Optional[Path] = None):
+        self.enabled = enabled
+        self.dump_dir = dump_dir  # set only for requests sampled for cProfile
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{next(_ids)}"
+        self.stages: list[tuple[str, float]] = []
+
+    def add(self, name: str, seconds: float) -> None:
+        if self.enabled:
+            self.stages.append((name, seconds))
+
+    @contextmanager
+    def stage(self, name: str):
+        """`with profile.stage("serialize"):` — time the block on the event loop."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def call(self, name: str, fn, *args, **kwargs):
+        """Run fn in the calling thread, timed as `name`; under cProfile if sampled.
+
+        Meant to be the callable handed to a worker thread, so the timing covers
+        the work itself and not the wait for the thread.
+        """
+        started = time.perf_counter()
+        profiler = None
+        if self.dump_dir is not None:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:  # another thread's profiler is active (3.12+ is process-wide)
+                profiler = None
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self.dump_dir.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(self.dump_dir / f"{self.id}-{name}.prof")
+            self.add(name, time.perf_counter() - started)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value; durations in milliseconds."""
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages)
+
+    def headers(self) -> dict:
+        if not self.enabled:
+            return {}
+        headers = {"Server-Timing": self.server_timing(), "X-Profile-Id": self.id}
+        if self.dump_dir is not None:
+            headers["X-Profile-Dump"] = str(self.dump_dir)
+        return headers
+
+
+def request_profile(header: Optional[str], always: bool, sample_rate: float, dump_dir: Path) -> RequestProfile:
+    """Build the profile for a request from its X-Profile header and the server settings.
+
+    Any X-Profile value other than 0/false/off turns timing on; "cprofile"
+    also forces a cProfile dump. Otherwise a profiled request is dumped with
+    probability sample_rate.
+    """
+    value = (header or "").strip().lower()
+    enabled = always or value not in ("", "0", "false", "off", "no")
+    if not enabled:
+        return RequestProfile()
+    sampled = value == "cprofile" or (sample_rate > 0 and random.random() < sample_rate)
+    return RequestProfile(enabled=True, dump_dir=dump_dir if sampled else None)
+
+
+class ArrivalStamp:
+    """ASGI middleware noting when each HTTP request arrived, before its body is read.
+
+    The gap to the handler's start is the upload stage: receiving the body and
+    the multipart parser spooling it to memory or a temp file. Pure ASGI rather
+    than @app.middleware("http"), which would wrap streaming responses and
+    break request.is_disconnected().
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["profile_arrival"] = time.perf_counter()
+        await self.app(scope, receive, send)
+
+
+def upload_seconds(scope: dict, handler_started: float) -> Optional[float]:
+    """Seconds between arrival (see ArrivalStamp) and the handler starting."""
+    arrival = scope.get("state", {}).get("profile_arrival")
+    return handler_started - arrival if arrival is not None else None
@@ -8,20 +8,46 @@ OpenAI-compatible API at /v1/audio/transcriptions
 """
 
 import asyncio
+import functools
 import gc
-import tempfile
+import json
+import multiprocessing
 import os
 import argparse
+import subprocess
+import threading
 import time
+import urllib.request
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
-from faster_whisper import WhisperModel
-from fastapi import FastAPI, File, Form, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
+import numpy as np
+from faster_whisper import BatchedInferencePipeline, WhisperModel, decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+from fastapi import FastAPI, File, Form, Header, Request, UploadFile, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 import uvicorn
 
+try:
+    import msgpack  # optional: binary encoding for response_format=compact
+except ImportError:
+    msgpack = None
+
+try:
+    import pynvml  # optional (nvidia-ml-py): free-VRAM reads; nvidia-smi is the fallback
+except ImportError:
+    pynvml = None
+
+from admission import PRIORITY_CLASSES, AdmissionQueue, QueueFull, parse_priority
+from profiling import ArrivalStamp, RequestProfile, request_profile, upload_seconds
+from server_metrics import Gauge, WhisperMetrics
+from transcript_cache import DEFAULT_PATH as DEFAULT_CACHE_PATH, TranscriptCache, cache_key, hash_upload
+
 # Model configuration
 # Available: tiny, base, small, medium, large-v1, large-v2, large-v3
 # Distilled: distil-small.en, distil-medium.en, distil-large-v2, distil-large-v3
@@ -42,6 +68,39 @@ DEFAULT_MODEL = normalize_model_name(os.environ.get("WHISPER_MODEL", "base"))
 COMPUTE_TYPE = os.environ.get("COMPUTE_TYPE", "float16")  # float16, int8, int8_float16
 DEVICE = os.environ.get("DEVICE", "cuda")  # cuda or cpu
 
+# Multi-model residency. The `model` form field selects which model serves a
+# request (unset or OpenAI's "whisper-1" means DEFAULT_MODEL), so a cheap
+# distil-small.en lane and a large-v3 lane can share one server. Models load on
+# demand and stay resident while their estimated footprints fit in
+# WHISPER_MODEL_BUDGET_MB; loading past the budget evicts the least recently
+# used. 0 (default) keeps exactly one model resident, the original behaviour.
+WHISPER_MODEL_BUDGET_MB = int(os.environ.get("WHISPER_MODEL_BUDGET_MB", "0") or "0")
+
+# Models a request may select by name (comma-separated). Empty (default) allows
+# the known registry names in MODEL_FOOTPRINT_MB; DEFAULT_MODEL is always
+# allowed. Anything else is a 400, so a client can't make the server download
+# and load an arbitrary repo into VRAM.
+WHISPER_MODELS = [m.strip() for m in os.environ.get("WHISPER_MODELS", "").split(",") if m.strip()]
+
+# Approximate float16 weight residency per model, excluding the ~300MB CUDA
+# context (docs/benchmarks.md measurements minus context; distil sizes scaled
+# from their parameter counts). int8 variants take roughly half.
+MODEL_FOOTPRINT_MB = {
+    "tiny": 150,
+    "base": 360,
+    "small": 810,
+    "medium": 2060,
+    "large-v1": 3880,
+    "large-v2": 3880,
+    "large-v3": 3880,
+    "large-v3-turbo": 2220,
+    "distil-small.en": 420,
+    "distil-medium.en": 850,
+    "distil-large-v2": 1700,
+    "distil-large-v3": 1700,
+}
+UNKNOWN_MODEL_FOOTPRINT_MB = 2000
+
 # Seconds of inactivity after which the model is unloaded to free VRAM.
 # 0 (default) disables the idle timer. The explicit POST /unload endpoint is the
 # primary VRAM-release mechanism (the memo pipeline unloads deterministically
@@ -49,63 +108,770 @@ DEVICE = os.environ.get("DEVICE", "cuda")  # cuda or cpu
 # ad-hoc callers outside the pipeline.
 WHISPER_IDLE_TIMEOUT = int(os.environ.get("WHISPER_IDLE_TIMEOUT", "0") or "0")
 
-# Lazy-load model on first request. On a 24GB GPU shared with a large LLM, the
+# Cross-request batching. When WHISPER_BATCH_WINDOW_MS > 0, non-streaming
+# requests that arrive within the window (up to WHISPER_MAX_BATCH of them) are
+# transcribed together as one BatchedInferencePipeline run instead of queueing
+# one after another on _model_lock. WHISPER_BATCH_SIZE is the number of 30s
+# windows per GPU forward pass. 0 (default) keeps the one-request-at-a-time path.
+WHISPER_BATCH_WINDOW_MS = int(os.environ.get("WHISPER_BATCH_WINDOW_MS", "0") or "0")
+WHISPER_MAX_BATCH = int(os.environ.get("WHISPER_MAX_BATCH", "8"))
+WHISPER_BATCH_SIZE = int(os.environ.get("WHISPER_BATCH_SIZE", "16"))
+
+# Decoding settings: beam search width and the Silero VAD options used both by
+# vad_filter=True and by the chunked-mode splitter. The defaults are the values
+# LIMA has always used (VAD threshold 0.5 is faster-whisper's own default).
+# Exposed so `benchmark_whisper.py --sweep` can restart the server per setting.
+WHISPER_BEAM_SIZE = int(os.environ.get("WHISPER_BEAM_SIZE", "5"))
+WHISPER_VAD_MIN_SILENCE_MS = int(os.environ.get("WHISPER_VAD_MIN_SILENCE_MS", "500"))
+WHISPER_VAD_THRESHOLD = float(os.environ.get("WHISPER_VAD_THRESHOLD", "0.5"))
+
+# Long-audio chunked mode. Requests with chunked=true — or any upload at least
+# WHISPER_CHUNKED_MIN_SECONDS long (0 = only on request) — are split at VAD
+# silences and the chunks transcribed in parallel, then stitched back onto the
+# global timeline. On CUDA the chunks go through one BatchedInferencePipeline
+# run; with DEVICE=cpu they fan out over WHISPER_CHUNK_WORKERS model workers,
+# each transcribing a ~WHISPER_CHUNK_SECONDS slice.
+WHISPER_CHUNKED_MIN_SECONDS = int(os.environ.get("WHISPER_CHUNKED_MIN_SECONDS", "0") or "0")
+WHISPER_CHUNK_SECONDS = int(os.environ.get("WHISPER_CHUNK_SECONDS", "45"))
+WHISPER_CHUNK_WORKERS = int(os.environ.get("WHISPER_CHUNK_WORKERS", "4"))
+
+# CPU replica pool (DEVICE=cpu only). With WHISPER_CPU_REPLICAS >= 2, buffered
+# transcriptions run in that many separate worker processes, each holding its
+# own model replica with WHISPER_CPU_THREADS intra-op threads (0 = cores split
+# evenly across replicas) and one CTranslate2 worker. Each request goes to the
+# replica with the fewest in flight, and chunked requests spread their chunks
+# across all replicas, so throughput scales with core count instead of being
+# capped by one model instance. Streaming requests stay on the in-process model.
+WHISPER_CPU_REPLICAS = int(os.environ.get("WHISPER_CPU_REPLICAS", "0") or "0")
+WHISPER_CPU_THREADS = int(os.environ.get("WHISPER_CPU_THREADS", "0") or "0")
+
+# Predictive warm-up. POST /preload loads a model ahead of the next request so
+# the first memo after an /unload doesn't pay the load on its request path. With
+# WHISPER_PRELOAD_POLL_URL set to the llama-swap root (e.g. http://localhost:9292),
+# a background task polls its /running list every WHISPER_PRELOAD_INTERVAL
+# seconds and restores the models /unload released once an LLM has been seen
+# running and has then stopped. The restore is edge-triggered: the pipeline
+# unloads whisper *before* its LLM request reaches llama-swap, so an empty list
+# right after /unload means "LLM not loaded yet", not "LLM done". If no LLM
+# shows up within WHISPER_PRELOAD_GRACE_SECONDS, the models are restored anyway.
+# Idle-timer unloads are deliberately not restored (that would defeat the timer).
+WHISPER_PRELOAD_POLL_URL = os.environ.get("WHISPER_PRELOAD_POLL_URL", "").rstrip("/")
+WHISPER_PRELOAD_INTERVAL = float(os.environ.get("WHISPER_PRELOAD_INTERVAL", "5"))
+WHISPER_PRELOAD_GRACE_SECONDS = float(os.environ.get("WHISPER_PRELOAD_GRACE_SECONDS", "300"))
+
+# VRAM guard (CUDA only). Before loading a model, check free device memory
+# (NVML, else nvidia-smi) against the model's footprint plus
+# WHISPER_VRAM_HEADROOM_MB, net of whatever the budget would evict anyway. If a
+# co-resident LLM leaves too little, wait up to WHISPER_VRAM_WAIT_SECONDS for
+# memory to free up, then answer 503 + Retry-After instead of OOMing. With
+# WHISPER_LLAMA_SWAP_URL set (llama-swap root), first ask llama-swap to unload
+# its models — the automatic version of the /unload timesharing contract, for
+# callers outside the memo pipeline. Headroom 0 disables the guard; so does a
+# box where neither NVML nor nvidia-smi can be read.
+WHISPER_VRAM_HEADROOM_MB = int(os.environ.get("WHISPER_VRAM_HEADROOM_MB", "512") or "0")
+WHISPER_VRAM_WAIT_SECONDS = float(os.environ.get("WHISPER_VRAM_WAIT_SECONDS", "10"))
+WHISPER_LLAMA_SWAP_URL = os.environ.get("WHISPER_LLAMA_SWAP_URL", "").rstrip("/")
+WHISPER_GPU_INDEX = int(os.environ.get("WHISPER_GPU_INDEX", "0"))  # NVML/nvidia-smi index
+
+# Content-hash transcript cache (see transcript_cache.py). Size budget in MB for
+# the on-disk SQLite store; 0 disables caching. Keys include the model, compute
+# type, and decoding options, so changing any of them never returns a stale
+# transcript. Purge with POST /cache/purge.
+WHISPER_CACHE_MAX_MB = int(os.environ.get("WHISPER_CACHE_MAX_MB", "256") or "0")
+WHISPER_CACHE_PATH = os.environ.get("WHISPER_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+
+# Admission control (see admission.py). Each transcription carries a priority
+# class from the X-Priority header or `priority` form field: "interactive"
+# (default — recorder uploads) or "batch" (bulk imports/backfills). Waiting
+# requests are admitted interactive-first, each class is capped at its own
+# concurrency, and once WHISPER_MAX_QUEUE requests are waiting new ones get
+# 429 + Retry-After (0 = unbounded). A class limit of 0 means auto: one in
+# flight, or WHISPER_MAX_BATCH when request batching is on so batches can form.
+WHISPER_MAX_QUEUE = int(os.environ.get("WHISPER_MAX_QUEUE", "32") or "0")
+WHISPER_INTERACTIVE_CONCURRENCY = int(os.environ.get("WHISPER_INTERACTIVE_CONCURRENCY", "0") or "0")
+WHISPER_BATCH_CONCURRENCY = int(os.environ.get("WHISPER_BATCH_CONCURRENCY", "0") or "0")
+
+# Opt-in profiling (see profiling.py). Requests sending an X-Profile header — or
+# every request with WHISPER_PROFILE=1 — get per-stage timings back in a
+# Server-Timing header. WHISPER_PROFILE_SAMPLE_RATE (0-1, default 0) of those
+# also write cProfile dumps to WHISPER_PROFILE_DIR; X-Profile: cprofile forces
+# one. Off by default: unprofiled requests only pay for a few perf_counter calls.
+WHISPER_PROFILE = os.environ.get("WHISPER_PROFILE", "0") == "1"
+WHISPER_PROFILE_SAMPLE_RATE = float(os.environ.get("WHISPER_PROFILE_SAMPLE_RATE", "0") or "0")
+WHISPER_PROFILE_DIR = Path(os.environ.get(
+    "WHISPER_PROFILE_DIR", str(Path.home() / ".cache" / "lima-whisper" / "profiles")))
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30  # Whisper's fixed encoder window
+
+# How often a buffered request checks whether its client is still connected.
+# Streams check between segments instead.
+DISCONNECT_POLL_SECONDS = 1.0
+
+# Lazy-load models on first request. On a 24GB GPU shared with a large LLM, a
 # model can be released mid-session via POST /unload (or the idle timer) and is
 # lazily reloaded on the next transcription. All load/unload transitions are
 # serialized by _model_lock so concurrent requests can't double-load or observe
-# a half-torn-down model.
-_whisper_model = None
+# a half-torn-down model. _models is kept in LRU order (most recent last).
+_models: "OrderedDict[str, WhisperModel]" = OrderedDict()
 _model_lock = asyncio.Lock()
-_last_used_monotonic: Optional[float] = None
+_last_used_monotonic: dict[str, float] = {}
+_transcript_cache: Optional[TranscriptCache] = None
+_pending_restore: set[str] = set()  # models released by /unload, for the preloader
+_restore_armed_at = 0.0  # monotonic time of the /unload that filled _pending_restore
+_llm_seen_since_unload = False  # an LLM was resident at some poll since that /unload
+_admission: Optional[AdmissionQueue] = None  # created in lifespan
 
+# Model loads, unloads, and inference run on one dedicated thread, never on the
+# event loop, so /health, /metrics, and /unload answer while a transcription is
+# in flight (CTranslate2 releases the GIL while it decodes). One thread is
+# enough: _model_lock already serializes inference, and a fixed thread keeps
+# CUDA work off the default executor that upload decoding and hashing use.
+# Because unloads queue on the same thread, a request cancelled mid-step (which
+# drops _model_lock at once) can never have its model torn down under the step
+# still finishing on the thread.
+_inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper-inference")
 
-def _load_model_locked():
-    """Load the model if needed. Caller MUST hold _model_lock."""
-    global _whisper_model
-    if _whisper_model is None:
-        print(f"Loading model: {DEFAULT_MODEL} (device={DEVICE}, compute_type={COMPUTE_TYPE})")
-        _whisper_model = WhisperModel(
-            DEFAULT_MODEL,
-            device=DEVICE,
-            compute_type=COMPUTE_TYPE,
+
+async def _run_inference(fn, *args, **kwargs):
+    """Run a blocking model call on the inference thread and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_inference_executor, functools.partial(fn, *args, **kwargs))
+
+
+def allowed_models() -> set[str]:
+    return set(WHISPER_MODELS or MODEL_FOOTPRINT_MB) | {DEFAULT_MODEL}
+
+
+def resolve_model_name(model: Optional[str]) -> str:
+    """Map the request's `model` field to a registry name.
+
+    Hub repo ids ("Systran/faster-whisper-base", as the seed workflows and
+    Speaches-style clients send) name the client's idea of the model, not a
+    lane on this server, so they get DEFAULT_MODEL like "whisper-1" does. Only
+    a bare allowed name selects another model; unknown names are rejected.
+    """
+    if not model or model == "whisper-1" or "/" in model:
+        return DEFAULT_MODEL
+    if model not in allowed_models():
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown model '{model}'; this server serves: {', '.join(sorted(allowed_models()))}",
         )
-        print("Model loaded successfully")
-    return _whisper_model
+    return model
 
 
-def _unload_model_locked() -> bool:
-    """Drop the model and force VRAM release. Caller MUST hold _model_lock.
+def model_footprint_mb(name: str) -> int:
+    """Estimated resident size of a model at the configured compute type."""
+    mb = MODEL_FOOTPRINT_MB.get(name, UNKNOWN_MODEL_FOOTPRINT_MB)
+    return mb // 2 if COMPUTE_TYPE.startswith("int8") else mb
 
-    Returns True if a model was actually unloaded, False if none was loaded.
 
-    Setting the sole reference to None and running gc.collect() triggers the
+def _resident_bytes() -> list[tuple[dict, float]]:
+    """Estimated resident memory per loaded model, for the /metrics gauge."""
+    samples = [
+        ({"model": name, "compute_type": COMPUTE_TYPE}, model_footprint_mb(name) * 1024 * 1024)
+        for name in _models
+    ]
+    if _cpu_pool is not None:
+        samples += [
+            ({"model": name, "compute_type": COMPUTE_TYPE, "replica": str(i)}, model_footprint_mb(name) * 1024 * 1024)
+            for i, names in enumerate(_cpu_pool.models)
+            for name in names
+        ]
+    return samples
+
+
+METRICS = WhisperMetrics(_resident_bytes)
+METRICS.registry.register(Gauge(
+    "whisper_queue_depth", "Requests waiting for admission, by priority class",
+    lambda: [({"priority": name}, _admission.waiting(name) if _admission else 0) for name in PRIORITY_CLASSES],
+))
+
+
+def _labels(name: str) -> dict:
+    return {"model": name, "compute_type": COMPUTE_TYPE}
+
+
+@asynccontextmanager
+async def _timed_model_lock(name: str):
+    """Acquire _model_lock, recording the wait as lock contention; yields the wait."""
+    t0 = time.perf_counter()
+    async with _model_lock:
+        waited = time.perf_counter() - t0
+        METRICS.lock_wait.inc(waited, **_labels(name))
+        yield waited
+
+
+def _touch(name: str) -> None:
+    """Record a model as just used (LRU order and idle timer)."""
+    if name in _models:
+        _models.move_to_end(name)
+    _last_used_monotonic[name] = time.monotonic()
+
+
+def _eviction_plan(name: str) -> list[str]:
+    """Models (LRU first) that loading `name` would evict to stay within budget."""
+    needed = model_footprint_mb(name)
+    resident = list(_models)
+    victims = []
+    while resident and (
+        WHISPER_MODEL_BUDGET_MB <= 0
+        or sum(model_footprint_mb(m) for m in resident) + needed > WHISPER_MODEL_BUDGET_MB
+    ):
+        victims.append(resident.pop(0))
+    return victims
+
+
+def _load_model_locked(name: str):
+    """Load `name` if needed, evicting LRU models over budget. Caller MUST hold _model_lock."""
+    if name in _models:
+        _models.move_to_end(name)
+        return _models[name]
+
+    for victim in _eviction_plan(name):
+        print(f"Evicting {victim} to make room for {name} (budget {WHISPER_MODEL_BUDGET_MB or 'single-model'})")
+        _unload_model_locked(victim)
+
+    print(f"Loading model: {name} (device={DEVICE}, compute_type={COMPUTE_TYPE})")
+    cpu_options = {}
+    if DEVICE == "cpu" and WHISPER_CHUNK_WORKERS > 1:
+        # One CTranslate2 worker per parallel chunk; split the cores between them
+        # so the workers don't oversubscribe each other.
+        cpu_options = dict(
+            num_workers=WHISPER_CHUNK_WORKERS,
+            cpu_threads=max(1, (os.cpu_count() or 1) // WHISPER_CHUNK_WORKERS),
+        )
+    t0 = time.perf_counter()
+    _models[name] = WhisperModel(
+        name,
+        device=DEVICE,
+        compute_type=COMPUTE_TYPE,
+        **cpu_options,
+    )
+    load_s = time.perf_counter() - t0
+    METRICS.model_loads.inc(**_labels(name))
+    METRICS.model_load_seconds.observe(load_s, **_labels(name))
+    print(f"Model loaded successfully ({load_s:.1f}s)")
+    return _models[name]
+
+
+def _unload_model_locked(name: Optional[str] = None) -> list[str]:
+    """Drop one model (or all, with name=None) and force VRAM release.
+
+    Caller MUST hold _model_lock. Returns the names actually unloaded.
+
+    Dropping the registry's sole reference and running gc.collect() triggers the
     CTranslate2 model's C++ destructor, which returns device memory to the
     driver. Verified with nvidia-smi: process residency falls from the model's
     footprint (e.g. large-v3 int8_float16 ~2.2GB) back to roughly the CUDA
     context size (~300MB), not merely dropping a Python reference.
     """
-    global _whisper_model
-    if _whisper_model is None:
-        return False
-    model = _whisper_model
-    _whisper_model = None
-    del model
+    names = list(_models) if name is None else [name] if name in _models else []
+    for victim in names:
+        model = _models.pop(victim)
+        _last_used_monotonic.pop(victim, None)
+        METRICS.model_unloads.inc(**_labels(victim))
+        del model
+    if not names:
+        return []
     gc.collect()
-    print("Model unloaded — VRAM released back to CUDA-context baseline")
-    return True
+    print(f"Unloaded {', '.join(names)} — VRAM released")
+    return names
+
+
+class VRAMUnavailable(Exception):
+    """Not enough free device memory to load a model, even after waiting."""
+
+    def __init__(self, name: str, needed_mb: int, free_mb: int):
+        super().__init__(
+            f"Not enough free VRAM to load {name}: need {needed_mb}MB, {free_mb}MB free"
+            " (is an LLM still resident?)"
+        )
+        self.retry_after = max(5, int(WHISPER_VRAM_WAIT_SECONDS))
+
+
+def _gpu_free_mb() -> Optional[int]:
+    """Free memory on the GPU in MB, via NVML or nvidia-smi; None if neither works."""
+    if pynvml is not None:
+        try:
+            pynvml.nvmlInit()
+            handle = pynvml.nvmlDeviceGetHandleByIndex(WHISPER_GPU_INDEX)
+            return pynvml.nvmlDeviceGetMemoryInfo(handle).free // (1024 * 1024)
+        except pynvml.NVMLError:
+            pass
+    try:
+        out = subprocess.run(
+            ["nvidia-smi", "--query-gpu=memory.free", "--format=csv,noheader,nounits", "-i", str(WHISPER_GPU_INDEX)],
+            capture_output=True, text=True, timeout=5, check=True,
+        ).stdout
+        return int(out.split()[0])
+    except (OSError, subprocess.SubprocessError, ValueError, IndexError):
+        return None
+
+
+def _process_vram_mb() -> Optional[int]:
+    """Device memory held by this server process in MB (model weights + CUDA context)."""
+    pid = os.getpid()
+    if pynvml is not None:
+        try:
+            pynvml.nvmlInit()
+            handle = pynvml.nvmlDeviceGetHandleByIndex(WHISPER_GPU_INDEX)
+            for proc in pynvml.nvmlDeviceGetComputeRunningProcesses(handle):
+                if proc.pid == pid and proc.usedGpuMemory is not None:
+                    return proc.usedGpuMemory // (1024 * 1024)
+            return 0
+        except pynvml.NVMLError:
+            pass
+    try:
+        out = subprocess.run(
+            ["nvidia-smi", "--query-compute-apps=pid,used_memory", "--format=csv,noheader,nounits",
+             "-i", str(WHISPER_GPU_INDEX)],
+            capture_output=True, text=True, timeout=5, check=True,
+        ).stdout
+        for line in out.splitlines():
+            proc_pid, used = (field.strip() for field in line.split(","))
+            if int(proc_pid) == pid:
+                return int(used)
+        return 0
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+
+def _unload_llm() -> bool:
+    """Ask llama-swap to unload every model; False if it can't be reached."""
+    try:
+        req = urllib.request.Request(f"{WHISPER_LLAMA_SWAP_URL}/api/models/unload", method="POST")
+        with urllib.request.urlopen(req, timeout=30):
+            return True
+    except Exception as e:
+        print(f"llama-swap unload failed: {e}")
+        return False
+
+
+async def _ensure_vram(name: str) -> None:
+    """Wait until loading `name` fits in free VRAM; raise VRAMUnavailable if it never does.
+
+    Caller holds _model_lock, so no other whisper load can race the check.
+    """
+    reclaimed = sum(model_footprint_mb(victim) for victim in _eviction_plan(name))
+    needed = model_footprint_mb(name) + WHISPER_VRAM_HEADROOM_MB - reclaimed
+    deadline = time.monotonic() + WHISPER_VRAM_WAIT_SECONDS
+    asked_llm = False
+    while True:
+        free = await asyncio.to_thread(_gpu_free_mb)
+        if free is None or free >= needed:
+            return  # fits, or unmeasurable (load and hope, as before)
+        if WHISPER_LLAMA_SWAP_URL and not asked_llm:
+            # Once per load: llama-swap's unload returns after the LLM process
+            # has stopped, so re-check right away.
+            print(f"Loading {name} needs {needed}MB, {free}MB free — asking llama-swap to unload")
+            asked_llm = True
+            if await asyncio.to_thread(_unload_llm):
+                METRICS.llm_unloads.inc()
+                continue
+        if time.monotonic() >= deadline:
+            METRICS.vram_refusals.inc(**_labels(name))
+            raise VRAMUnavailable(name, needed, free)
+        await asyncio.sleep(1)
+
+
+async def _load_model(name: str):
+    """Load `name` on the inference thread once VRAM allows. Caller MUST hold _model_lock."""
+    if name not in _models and DEVICE == "cuda" and WHISPER_VRAM_HEADROOM_MB > 0:
+        await _ensure_vram(name)
+    return await _run_inference(_load_model_locked, name)
+
+
+def _speech_chunks(audio: np.ndarray, max_chunk_s: float) -> list[tuple[int, int]]:
+    """Split audio at silence into (start, end) sample ranges of <= max_chunk_s.
+
+    Uses the same Silero VAD faster-whisper applies with vad_filter=True, then
+    greedily merges consecutive speech regions while the merged span still fits,
+    so every cut lands in a pause rather than mid-word.
+    """
+    max_samples = int(max_chunk_s * SAMPLE_RATE)
+    regions = get_speech_timestamps(
+        audio,
+        VadOptions(
+            threshold=WHISPER_VAD_THRESHOLD,
+            min_silence_duration_ms=WHISPER_VAD_MIN_SILENCE_MS,
+            max_speech_duration_s=max_chunk_s,
+        ),
+    )
+    chunks: list[tuple[int, int]] = []
+    for region in regions:
+        start, end = region["start"], region["end"]
+        if chunks and end - chunks[-1][0] <= max_samples:
+            chunks[-1] = (chunks[-1][0], end)
+        else:
+            chunks.append((start, end))
+    return chunks
+
+
+def _transcribe_batch(
+    whisper, audios: list[np.ndarray], language: str, words: bool = False,
+    cancel: Optional[threading.Event] = None,
+) -> list[list[dict]]:
+    """Transcribe several requests' audio in one BatchedInferencePipeline run.
+
+    Each request is cut into <=30s speech chunks, and every chunk is zero-padded
+    to a full 30s window before the windows are concatenated. The pipeline only
+    merges neighbouring clips while their combined length fits in one window, so
+    full-window clips are never merged — text from two requests cannot land in
+    one segment — and zero padding is exactly what Whisper applies to a short
+    input anyway. Segment times come back on the concatenated timeline and are
+    mapped back to each request's own clock here.
+    """
+    window = WINDOW_SECONDS * SAMPLE_RATE
+    layout = []  # per window: (request index, chunk start sample, chunk end sample)
+    pieces = []
+    for i, audio in enumerate(audios):
+        for start, end in _speech_chunks(audio, WINDOW_SECONDS):
+            piece = np.zeros(window, dtype=np.float32)
+            piece[: end - start] = audio[start:end]
+            pieces.append(piece)
+            layout.append((i, start, end))
+
+    results: list[list[dict]] = [[] for _ in audios]
+    if not pieces:
+        return results
+
+    segments, _ = BatchedInferencePipeline(model=whisper).transcribe(
+        np.concatenate(pieces),
+        language=language,
+        beam_size=WHISPER_BEAM_SIZE,
+        batch_size=WHISPER_BATCH_SIZE,
+        word_timestamps=words,
+        # seconds on the concatenated timeline; the pipeline converts to samples itself
+        clip_timestamps=[
+            {"start": k * WINDOW_SECONDS, "end": (k + 1) * WINDOW_SECONDS} for k in range(len(pieces))
+        ],
+    )
+    for segment in segments:
+        if cancel is not None and cancel.is_set():
+            segments.close()
+            break
+        k = min(int(segment.start // WINDOW_SECONDS), len(layout) - 1)
+        i, start, end = layout[k]
+        window_start = k * WINDOW_SECONDS
+        speech_end = window_start + (end - start) / SAMPLE_RATE
+        if segment.start >= speech_end:
+            continue  # decoded from the zero padding
+        offset = start / SAMPLE_RATE - window_start
+        results[i].append(_segment_dict(segment, len(results[i]), offset, speech_end))
+    return results
+
+
+def _transcribe_chunked(
+    whisper, audio: np.ndarray, language: Optional[str], words: bool = False,
+    cancel: Optional[threading.Event] = None,
+) -> tuple[list[dict], str]:
+    """Transcribe long audio as parallel VAD-bounded chunks on one global clock.
+
+    Language is detected once up front so every chunk decodes with the same
+    token (per-chunk detection can flip on a short or noisy slice). Once
+    `cancel` is set, remaining chunks are skipped.
+    """
+    language = language or whisper.detect_language(audio, vad_filter=True)[0]
+    if DEVICE != "cpu":
+        return _transcribe_batch(whisper, [audio], language, words, cancel)[0], language
+
+    def run(chunk: tuple[int, int]) -> list[dict]:
+        if cancel is not None and cancel.is_set():
+            return []
+        start, end = chunk
+        offset = start / SAMPLE_RATE
+        segments, _ = whisper.transcribe(audio[start:end], **_transcribe_options(language, words))
+        return [_segment_dict(s, 0, offset) for s in segments]
+
+    chunks = _speech_chunks(audio, WHISPER_CHUNK_SECONDS)
+    with ThreadPoolExecutor(max_workers=WHISPER_CHUNK_WORKERS) as pool:
+        parts = list(pool.map(run, chunks))
+    stitched = [segment for part in parts for segment in part]
+    return [{**segment, "id": i} for i, segment in enumerate(stitched)], language
+
+
+@dataclass
+class _BatchItem:
+    audio: np.ndarray
+    model: str
+    language: Optional[str]
+    words: bool
+    future: asyncio.Future
+    enqueued: float  # perf_counter() at enqueue, for queue-wait metrics
+
+
+_batch_queue: Optional[asyncio.Queue] = None
+
+
+def _run_batch(name: str, model_items: list[_BatchItem]) -> tuple[float, list]:
+    """Inference-thread half of _batch_worker; caller holds _model_lock.
+
+    Returns (start time, [(items, per-item segments, language, inference_s)]);
+    the futures are resolved back on the event loop.
+    """
+    whisper = _load_model_locked(name)
+    started = time.perf_counter()
+    groups = defaultdict(list)
+    for item in model_items:
+        language = item.language or whisper.detect_language(item.audio, vad_filter=True)[0]
+        groups[language, item.words].append(item)
+    if len(model_items) > 1:
+        print(f"Batching {len(model_items)} {name} requests"
+              f" ({', '.join(f'{k[0]}={len(v)}' for k, v in groups.items())})")
+    runs = []
+    for (language, words), group in groups.items():
+        results = _transcribe_batch(whisper, [item.audio for item in group], language, words)
+        runs.append((group, results, language, time.perf_counter() - started))
+    return started, runs
+
+
+async def _batch_worker():
+    """Background task: drain _batch_queue in windows and run them as batches.
+
+    The first queued request opens a WHISPER_BATCH_WINDOW_MS window; whatever
+    else arrives before it closes (up to WHISPER_MAX_BATCH) joins the batch.
+    Requests without an explicit language get it detected individually first,
+    then the batch is split into one pipeline run per (model, language, word
+    timestamps), because the pipeline decodes every window with a single model
+    and language token.
+    Each future resolves to (segments, language, queue_wait_s, inference_s).
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await _batch_queue.get()]
+        deadline = loop.time() + WHISPER_BATCH_WINDOW_MS / 1000
+        while len(items) < WHISPER_MAX_BATCH:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(_batch_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        by_model = defaultdict(list)
+        for item in items:
+            by_model[item.model].append(item)
+        for name, model_items in by_model.items():
+            async with _timed_model_lock(name):
+                try:
+                    await _load_model(name)
+                    started, runs = await _run_inference(_run_batch, name, model_items)
+                    for group, results, language, inference_s in runs:
+                        for item, segments in zip(group, results):
+                            if not item.future.done():
+                                item.future.set_result((segments, language, started - item.enqueued, inference_s))
+                    _touch(name)
+                except Exception as e:
+                    for item in model_items:
+                        if not item.future.done():
+                            item.future.set_exception(e)
+
+
+# --- CPU replica pool ---------------------------------------------------------
+# The _replica_* functions run inside the worker processes. Workers are spawned
+# (not forked: the parent has an event loop and executor threads), so they
+# re-import this module and get the parent's effective settings through
+# _replica_init rather than from CLI flags they never saw.
+
+_replica_models: dict[str, WhisperModel] = {}
+_replica_config: dict = {}
+
+
+def _replica_init(compute_type: str, cpu_threads: int, decoding: dict) -> None:
+    global WHISPER_BEAM_SIZE, WHISPER_VAD_MIN_SILENCE_MS, WHISPER_VAD_THRESHOLD
+    _replica_config.update(compute_type=compute_type, cpu_threads=cpu_threads)
+    WHISPER_BEAM_SIZE = decoding["beam_size"]
+    WHISPER_VAD_MIN_SILENCE_MS = decoding["vad_min_silence_ms"]
+    WHISPER_VAD_THRESHOLD = decoding["vad_threshold"]
+
+
+def _replica_model(name: str) -> WhisperModel:
+    if name not in _replica_models:
+        print(f"[replica {os.getpid()}] Loading model: {name}"
+              f" (compute_type={_replica_config['compute_type']}, cpu_threads={_replica_config['cpu_threads']})")
+        _replica_models[name] = WhisperModel(
+            name,
+            device="cpu",
+            compute_type=_replica_config["compute_type"],
+            cpu_threads=_replica_config["cpu_threads"],
+            num_workers=1,
+        )
+    return _replica_models[name]
+
+
+def _replica_load(name: str) -> None:
+    _replica_model(name)
+
+
+def _replica_detect_language(name: str, audio: np.ndarray) -> str:
+    return _replica_model(name).detect_language(audio, vad_filter=True)[0]
+
+
+def _replica_transcribe(
+    name: str, audio: np.ndarray, language: Optional[str], words: bool, offset: float = 0.0, cancel=None,
+) -> tuple[list[dict], str, float]:
+    """`cancel` is the request's Manager Event proxy; it is checked per segment."""
+    if cancel is not None and cancel.is_set():
+        return [], language, len(audio) / SAMPLE_RATE
+    segments, info = _replica_model(name).transcribe(audio, **_transcribe_options(language, words))
+    collected = []
+    for segment in segments:
+        if cancel is not None and cancel.is_set():
+            segments.close()
+            break
+        collected.append(_segment_dict(segment, None, offset))
+    return collected, info.language, info.duration
+
+
+class _CpuPool:
+    """Model replicas in worker processes, with least-loaded dispatch.
+
+    One single-process executor per replica (rather than one shared pool) so
+    the parent knows which replica a call lands on and can count in-flight work
+    per replica; a replica that dies is replaced on its next failure.
+
+    A threading.Event can't reach another process, so each transcription gets
+    an Event from a Manager process instead. Replicas check it between
+    segments, and the in-flight count drops when the replica actually finishes
+    a call, not when the request that made it is abandoned.
+    """
+
+    def __init__(self, replicas: int, cpu_threads: int):
+        self.cpu_threads = cpu_threads
+        self.workers = [self._spawn() for _ in range(replicas)]
+        self.inflight = [0] * replicas
+        self.models: list[set[str]] = [set() for _ in range(replicas)]
+        self.manager = multiprocessing.get_context("spawn").Manager()
+
+    def _spawn(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_replica_init,
+            initargs=(COMPUTE_TYPE, self.cpu_threads, _decoding_settings()),
+        )
+
+    async def _call(self, i: int, fn, name: str, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.workers[i].submit(fn, name, *args)
+            self.inflight[i] += 1
+            future.add_done_callback(lambda _: loop.is_closed() or loop.call_soon_threadsafe(self._finished, i))
+            result = await asyncio.wrap_future(future)
+            self.models[i].add(name)
+            return result
+        except BrokenProcessPool:
+            print(f"CPU replica {i} died — respawning it")
+            self.workers[i] = self._spawn()
+            self.models[i].clear()
+            raise
+
+    def _finished(self, i: int) -> None:
+        self.inflight[i] -= 1
+
+    async def submit(self, fn, name: str, *args):
+        """Run fn(name, *args) on the replica with the least work in flight."""
+        i = min(range(len(self.workers)), key=lambda k: (self.inflight[k], name not in self.models[k]))
+        return await self._call(i, fn, name, *args)
+
+    async def warm(self, name: str) -> None:
+        """Load `name` on every replica (spawns the processes)."""
+        await asyncio.gather(*(self._call(i, _replica_load, name) for i in range(len(self.workers))))
+
+    async def transcribe(
+        self, name: str, audio: np.ndarray, language: Optional[str], words: bool, chunked: bool,
+    ) -> tuple[list[dict], str, float]:
+        """Whole request on one replica, or (chunked) VAD chunks fanned across all of them.
+
+        When the awaiting task is cancelled (client disconnect, see
+        _until_disconnect), the request's cancel Event is set so the replicas
+        stop at their next segment and skip chunks they haven't started.
+        """
+        cancel = await asyncio.to_thread(self.manager.Event)
+        try:
+            if not chunked:
+                return await self.submit(_replica_transcribe, name, audio, language, words, 0.0, cancel)
+            # Same contract as _transcribe_chunked: one language for every chunk.
+            language = language or await self.submit(_replica_detect_language, name, audio)
+            chunks = await asyncio.to_thread(_speech_chunks, audio, WHISPER_CHUNK_SECONDS)
+            parts = await asyncio.gather(*(
+                self.submit(_replica_transcribe, name, audio[start:end], language, words, start / SAMPLE_RATE, cancel)
+                for start, end in chunks
+            ))
+        except asyncio.CancelledError:
+            cancel.set()
+            raise
+        stitched = [segment for part, _, _ in parts for segment in part]
+        segments = [{**segment, "id": i} for i, segment in enumerate(stitched)]
+        return segments, language, len(audio) / SAMPLE_RATE
+
+    def stats(self) -> list[dict]:
+        return [
+            {"replica": i, "in_flight": self.inflight[i], "models": sorted(self.models[i])}
+            for i in range(len(self.workers))
+        ]
+
+    def shutdown(self) -> None:
+        for worker in self.workers:
+            worker.shutdown(wait=False, cancel_futures=True)
+        self.manager.shutdown()
+
+
+_cpu_pool: Optional[_CpuPool] = None
+
+
+def _llm_running() -> Optional[bool]:
+    """Ask llama-swap whether any model is resident; None if it can't be reached."""
+    try:
+        with urllib.request.urlopen(f"{WHISPER_PRELOAD_POLL_URL}/running", timeout=5) as resp:
+            running = json.loads(resp.read()).get("running", [])
+    except Exception:
+        return None
+    return any(entry.get("state", "ready") not in ("stopped", "shutdown") for entry in running)
+
+
+async def _preload_monitor():
+    """Background task: restore /unload-released models once the LLM has come and gone."""
+    global _llm_seen_since_unload
+    while True:
+        await asyncio.sleep(WHISPER_PRELOAD_INTERVAL)
+        if not _pending_restore:
+            continue
+        running = await asyncio.to_thread(_llm_running)
+        if running is not False:
+            _llm_seen_since_unload |= running is True
+            continue  # LLM still resident (or llama-swap unreachable) — keep waiting
+        waited = time.monotonic() - _restore_armed_at
+        if not _llm_seen_since_unload and waited < WHISPER_PRELOAD_GRACE_SECONDS:
+            continue  # the LLM step hasn't started yet
+        if not _llm_seen_since_unload:
+            print(f"No LLM ran within {waited:.0f}s of /unload — restoring anyway")
+        async with _timed_model_lock(DEFAULT_MODEL):
+            for name in list(_pending_restore):
+                _pending_restore.discard(name)
+                if name not in _models:
+                    print(f"llama-swap idle — preloading {name}")
+                    try:
+                        await _load_model(name)
+                        _touch(name)
+                    except Exception as e:
+                        print(f"Preload of {name} failed: {e}")
 
 
 async def _idle_monitor():
-    """Background task: unload the model after WHISPER_IDLE_TIMEOUT idle seconds."""
+    """Background task: unload each model after WHISPER_IDLE_TIMEOUT idle seconds."""
     interval = min(WHISPER_IDLE_TIMEOUT, 15)
     while True:
         await asyncio.sleep(interval)
         async with _model_lock:
-            if _whisper_model is None or _last_used_monotonic is None:
-                continue
-            idle = time.monotonic() - _last_used_monotonic
-            if idle >= WHISPER_IDLE_TIMEOUT and _unload_model_locked():
-                print(f"Idle {idle:.0f}s >= {WHISPER_IDLE_TIMEOUT}s — unloaded model")
+            now = time.monotonic()
+            for name, last_used in list(_last_used_monotonic.items()):
+                idle = now - last_used
+                if idle >= WHISPER_IDLE_TIMEOUT and await _run_inference(_unload_model_locked, name):
+                    print(f"Idle {idle:.0f}s >= {WHISPER_IDLE_TIMEOUT}s — unloaded {name}")
 
 
 @asynccontextmanager
@@ -113,17 +879,59 @@ async def lifespan(app: FastAPI):
     """Log the effective configuration; start the idle-unload monitor if enabled."""
     print(
         f"Configured: model={DEFAULT_MODEL} device={DEVICE} compute_type={COMPUTE_TYPE}"
+        f" model_budget={f'{WHISPER_MODEL_BUDGET_MB}MB' if WHISPER_MODEL_BUDGET_MB > 0 else 'single-model'}"
         f" idle_timeout={WHISPER_IDLE_TIMEOUT or 'off'} (lazy-load on first request)"
     )
-    task = None
+    global _admission, _batch_queue, _cpu_pool, _transcript_cache
+    tasks = []
+    if WHISPER_CPU_REPLICAS > 1:
+        if DEVICE == "cpu":
+            threads = WHISPER_CPU_THREADS or max(1, (os.cpu_count() or 1) // WHISPER_CPU_REPLICAS)
+            _cpu_pool = _CpuPool(WHISPER_CPU_REPLICAS, threads)
+            print(f"CPU replica pool: {WHISPER_CPU_REPLICAS} processes x {threads} threads")
+            tasks.append(asyncio.create_task(_cpu_pool.warm(DEFAULT_MODEL)))
+        else:
+            print(f"Ignoring WHISPER_CPU_REPLICAS={WHISPER_CPU_REPLICAS}: only applies with --device cpu")
+    if WHISPER_BATCH_WINDOW_MS > 0:
+        auto_limit = WHISPER_MAX_BATCH
+    elif _cpu_pool is not None:
+        auto_limit = WHISPER_CPU_REPLICAS
+    else:
+        auto_limit = 1
+    _admission = AdmissionQueue(
+        {
+            "interactive": WHISPER_INTERACTIVE_CONCURRENCY or auto_limit,
+            "batch": WHISPER_BATCH_CONCURRENCY or auto_limit,
+        },
+        WHISPER_MAX_QUEUE,
+    )
+    print(
+        f"Admission: limits={_admission.limits}"
+        f" max_queue={WHISPER_MAX_QUEUE or 'unbounded'}"
+    )
+    if WHISPER_CACHE_MAX_MB > 0:
+        _transcript_cache = TranscriptCache(WHISPER_CACHE_PATH, WHISPER_CACHE_MAX_MB * 1024 * 1024)
+        print(f"Transcript cache: {WHISPER_CACHE_PATH} (max {WHISPER_CACHE_MAX_MB}MB)")
     if WHISPER_IDLE_TIMEOUT > 0:
         print(f"Idle unload enabled: model releases VRAM after {WHISPER_IDLE_TIMEOUT}s idle")
-        task = asyncio.create_task(_idle_monitor())
+        tasks.append(asyncio.create_task(_idle_monitor()))
+    if WHISPER_PRELOAD_POLL_URL:
+        print(f"Preloader enabled: restores unloaded models after an LLM on {WHISPER_PRELOAD_POLL_URL} has run and stopped")
+        tasks.append(asyncio.create_task(_preload_monitor()))
+    if WHISPER_BATCH_WINDOW_MS > 0:
+        print(
+            f"Request batching enabled: window={WHISPER_BATCH_WINDOW_MS}ms"
+            f" max_batch={WHISPER_MAX_BATCH} batch_size={WHISPER_BATCH_SIZE}"
+        )
+        _batch_queue = asyncio.Queue()
+        tasks.append(asyncio.create_task(_batch_worker()))
     try:
         yield
     finally:
-        if task is not None:
+        for task in tasks:
             task.cancel()
+        if _cpu_pool is not None:
+            _cpu_pool.shutdown()
 
 
 app = FastAPI(
@@ -132,6 +940,7 @@ app = FastAPI(
     version="0.3.0",
     lifespan=lifespan,
 )
+app.add_middleware(ArrivalStamp)
 
 
 @app.get("/health")
@@ -140,22 +949,85 @@ async def health():
     return {
         "status": "ok",
         "device": DEVICE,
+        "compute_type": COMPUTE_TYPE,
+        "decoding": _decoding_settings(),
+        "batching": WHISPER_BATCH_WINDOW_MS > 0,
         "model": DEFAULT_MODEL,
-        "model_loaded": _whisper_model is not None,
+        "model_loaded": bool(_models),
+        "loaded_models": list(_models),
+        "cache_enabled": _transcript_cache is not None,
+        "queue": _admission.stats() if _admission else None,
+        "cpu_pool": _cpu_pool.stats() if _cpu_pool else None,
+    }
+
+
+@app.get("/vram")
+async def vram():
+    """Free device memory as the VRAM guard sees it (None if unreadable)."""
+    free = await asyncio.to_thread(_gpu_free_mb) if DEVICE == "cuda" else None
+    process = await asyncio.to_thread(_process_vram_mb) if DEVICE == "cuda" else None
+    return {
+        "free_mb": free,
+        "process_used_mb": process,
+        "headroom_mb": WHISPER_VRAM_HEADROOM_MB,
+        "guard_enabled": DEVICE == "cuda" and WHISPER_VRAM_HEADROOM_MB > 0,
+        "resident_models_mb": {name: model_footprint_mb(name) for name in _models},
+        "llama_swap_url": WHISPER_LLAMA_SWAP_URL or None,
     }
 
 
 @app.post("/unload")
-async def unload():
-    """Unload the model and release its VRAM.
+async def unload(model: Optional[str] = Query(None)):
+    """Unload models and release their VRAM.
 
     Deterministic timesharing hook: the memo pipeline calls this between the
     transcription step and the LLM step so whisper and a large LLM never hold
-    the GPU at the same instant. The next transcription lazily reloads.
+    the GPU at the same instant. The next transcription lazily reloads. With
+    ?model=NAME only that model is unloaded; without it, every resident model.
     """
+    global _restore_armed_at, _llm_seen_since_unload
     async with _model_lock:
-        unloaded = _unload_model_locked()
-    return {"unloaded": unloaded}
+        names = await _run_inference(_unload_model_locked, resolve_model_name(model) if model else None)
+    if WHISPER_PRELOAD_POLL_URL and names:
+        _pending_restore.update(names)
+        _restore_armed_at = time.monotonic()
+        _llm_seen_since_unload = False
+    return {"unloaded": bool(names), "models": names}
+
+
+@app.post("/preload")
+async def preload(model: Optional[str] = Query(None)):
+    """Load a model now so the next transcription skips the load.
+
+    The warm-up hook for the end of the LLM step: the memo pipeline (or any
+    caller that knows the GPU is free again) calls this after the LLM finishes,
+    moving model load off the next request's critical path.
+    """
+    name = resolve_model_name(model)
+    async with _timed_model_lock(name):
+        already = name in _models
+        t0 = time.perf_counter()
+        try:
+            await _load_model(name)
+        except VRAMUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        _touch(name)
+    _pending_restore.discard(name)
+    return {"model": name, "already_loaded": already, "load_seconds": round(time.perf_counter() - t0, 3)}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text-format metrics (latency histograms, RTF, model residency)."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/cache/purge")
+async def purge_cache():
+    """Drop every cached transcript (e.g. after swapping model files on disk)."""
+    if _transcript_cache is None:
+        raise HTTPException(status_code=404, detail="Transcript cache is disabled")
+    return {"purged": await asyncio.to_thread(_transcript_cache.purge)}
 
 
 @app.get("/v1/models")
@@ -175,76 +1047,516 @@ async def list_models():
     }
 
 
+def _decoding_settings() -> dict:
+    """Effective decoding settings, as reported by /health and sent to replicas."""
+    return {
+        "beam_size": WHISPER_BEAM_SIZE,
+        "vad_min_silence_ms": WHISPER_VAD_MIN_SILENCE_MS,
+        "vad_threshold": WHISPER_VAD_THRESHOLD,
+        "batch_size": WHISPER_BATCH_SIZE,
+    }
+
+
+def _transcribe_options(language: Optional[str], words: bool = False) -> dict:
+    """Decoding options shared by the buffered and streaming paths."""
+    return dict(
+        language=language if language else None,
+        beam_size=WHISPER_BEAM_SIZE,
+        vad_filter=True,  # Voice activity detection
+        vad_parameters=dict(threshold=WHISPER_VAD_THRESHOLD, min_silence_duration_ms=WHISPER_VAD_MIN_SILENCE_MS),
+        word_timestamps=words,
+    )
+
+
+def _segment_dict(segment, id: Optional[int] = None, offset: float = 0.0, limit: Optional[float] = None) -> dict:
+    """Serialize a faster-whisper Segment to the verbose_json segment shape.
+
+    `offset` shifts times onto the request's own clock (chunked and batched
+    runs); `limit`, on the pipeline's clock, clips the end and drops words
+    decoded from zero padding. Word timestamps, when requested, ride along as
+    a `words` list and are flattened by _format_response.
+    """
+    end = segment.end if limit is None else min(segment.end, limit)
+    result = {
+        "id": segment.id if id is None else id,
+        "start": round(segment.start + offset, 3),
+        "end": round(end + offset, 3),
+        "text": segment.text,
+    }
+    if segment.words is not None:
+        result["words"] = [
+            {
+                "word": word.word,
+                "start": round(word.start + offset, 3),
+                "end": round(word.end + offset, 3),
+                "probability": round(word.probability, 3),
+            }
+            for word in segment.words
+            if limit is None or word.start < limit
+        ]
+    return result
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+NPY_MAGIC = b"\x93NUMPY"
+
+
+def _read_pcm(fileobj) -> Optional[np.ndarray]:
+    """Samples from a raw-PCM .npy upload, or None if the upload isn't one.
+
+    Benchmarks (scripts/pcm_cache.py) upload audio already decoded to 16kHz
+    mono float32 so their timings exclude the codec; the sample rate can't be
+    checked and is the client's responsibility. allow_pickle stays off, so only
+    plain numeric arrays are accepted.
+    """
+    fileobj.seek(0)
+    if fileobj.read(len(NPY_MAGIC)) != NPY_MAGIC:
+        fileobj.seek(0)
+        return None
+    fileobj.seek(0)
+    audio = np.lib.format.read_array(fileobj, allow_pickle=False)
+    if audio.ndim != 1 or audio.size == 0:
+        raise ValueError(f"PCM upload must be a non-empty 1-D array, got shape {audio.shape}")
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) / 32768.0
+    if audio.dtype.kind != "f":
+        raise ValueError(f"PCM upload must be float32 or int16 samples, got {audio.dtype}")
+    return audio.astype(np.float32, copy=False)
+
+
+def _decode_upload(file: UploadFile) -> np.ndarray:
+    """Decode the upload straight to 16kHz mono float32 samples.
+
+    PyAV reads the multipart parser's own spooled file object (memory for small
+    uploads, one spill file for large ones) and seeks as the container needs, so
+    m4a files with a trailing moov atom work. There is no extra `file.read()`
+    copy and no NamedTemporaryFile round-trip; the resulting array is handed to
+    faster-whisper directly.
+
+    A .npy upload of 16kHz mono samples skips decoding (see _read_pcm).
+    """
+    pcm = _read_pcm(file.file)
+    if pcm is not None:
+        return pcm
+    file.file.seek(0)
+    return decode_audio(file.file, sampling_rate=SAMPLE_RATE)
+
+
+def _columns(items: list[dict], key: str) -> dict:
+    """Columnar form of segments or words: parallel start/end arrays plus text.
+
+    `text` is every item's text concatenated; `offset` has one more entry than
+    there are items, so item i is text[offset[i]:offset[i + 1]].
+    """
+    offsets = [0]
+    for item in items:
+        offsets.append(offsets[-1] + len(item[key]))
+    return {
+        "text": "".join(item[key] for item in items),
+        "start": [item["start"] for item in items],
+        "end": [item["end"] for item in items],
+        "offset": offsets,
+    }
+
+
+def _format_response(
+    result: dict, response_format: Optional[str], cache_status: Optional[str], accept: Optional[str] = None,
+):
+    """Render a {segments, language, duration} result in the requested format.
+
+    verbose_json follows OpenAI's shape: word timestamps (if requested) appear
+    as one top-level `words` list rather than nested per segment. `compact`
+    returns the same data as parallel arrays (see _columns), which for a long
+    meeting with tens of thousands of words is a fraction of the per-word
+    object JSON; it is msgpack-encoded when the client sends
+    Accept: application/msgpack and the msgpack package is installed.
+    """
+    headers = {"X-Cache": cache_status} if cache_status else None
+    segments = result["segments"]
+    text = " ".join(segment["text"] for segment in segments).strip()
+    has_words = any("words" in segment for segment in segments)
+    if response_format == "text":
+        return JSONResponse(content=text, headers=headers)
+    elif response_format == "verbose_json":
+        content = {
+            "text": text,
+            **result,
+            "segments": [{k: v for k, v in segment.items() if k != "words"} for segment in segments],
+        }
+        if has_words:
+            content["words"] = [
+                {"word": w["word"], "start": w["start"], "end": w["end"]}
+                for segment in segments for w in segment.get("words", ())
+            ]
+        return JSONResponse(content=content, headers=headers)
+    elif response_format == "compact":
+        content = {
+            "language": result["language"],
+            "duration": result["duration"],
+            "segments": _columns(segments, "text"),
+        }
+        if has_words:
+            words = [w for segment in segments for w in segment.get("words", ())]
+            content["words"] = _columns(words, "word")
+            content["words"]["probability"] = [w["probability"] for w in words]
+        if msgpack is not None and accept and "msgpack" in accept:
+            return Response(msgpack.packb(content), media_type="application/msgpack", headers=headers)
+        return JSONResponse(content=content, headers=headers)
+    else:
+        return JSONResponse(content={"text": text}, headers=headers)
+
+
+def _respond(
+    result: dict, response_format: Optional[str], cache_status: Optional[str], accept: Optional[str],
+    profile: RequestProfile,
+):
+    """_format_response, timed as the serialize stage, plus any profiling headers."""
+    with profile.stage("serialize"):
+        response = _format_response(result, response_format, cache_status, accept)
+    response.headers.update(profile.headers())
+    return response
+
+
+async def _replay_stream(result: dict):
+    """Emit a cached result with the same SSE event sequence as a live stream."""
+    yield _sse("transcript.info", {"language": result["language"], "duration": result["duration"]})
+    for segment in result["segments"]:
+        yield _sse("transcript.segment", segment)
+    yield _sse("transcript.done", {
+        "text": " ".join(segment["text"] for segment in result["segments"]).strip(),
+        "language": result["language"],
+        "duration": result["duration"],
+        "segments": len(result["segments"]),
+    })
+
+
+async def _stream_transcription(
+    audio: np.ndarray, model_name: str, language: Optional[str], key: Optional[str],
+    t_request: float, decode_s: float, priority: str, words: bool, request: Request,
+):
+    """Yield SSE events as the lazy `segments` generator produces them.
+
+    Event sequence: one `transcript.info` (language/duration, known as soon as
+    decoding and language detection finish), one `transcript.segment` per
+    segment, then a final `transcript.done` carrying the joined text. Errors
+    after the response has started can no longer become an HTTP status, so they
+    are reported as an `error` event instead. A stream that runs to completion
+    is stored in the transcript cache under `key`.
+
+    Admission happens here rather than in the handler so the slot is released
+    by the generator that holds it; the handler already did the depth check.
+    If the client disconnects, iteration stops at the next segment boundary and
+    the lock and admission slot are released.
+    """
+    segments = None
+    try:
+        t_admit = time.perf_counter()
+        # Same locking contract as the buffered path: the lock covers the whole
+        # iteration, since inference runs lazily inside the generator.
+        async with _admission.slot(priority, bounded=False), _timed_model_lock(model_name):
+            METRICS.queue_wait.observe(time.perf_counter() - t_admit, **_labels(model_name))
+            whisper = await _load_model(model_name)
+            started = time.perf_counter()
+            segments, info = await _run_inference(whisper.transcribe, audio, **_transcribe_options(language, words))
+            yield _sse("transcript.info", {"language": info.language, "duration": info.duration})
+
+            # Each next() decodes the following window, so step the generator
+            # on the inference thread too.
+            all_segments = []
+            while (segment := await _run_inference(next, segments, None)) is not None:
+                if await request.is_disconnected():
+                    _note_cancelled(model_name, len(all_segments))
+                    return
+                all_segments.append(_segment_dict(segment))
+                yield _sse("transcript.segment", all_segments[-1])
+
+            _touch(model_name)
+            # Includes time the client took to accept each event.
+            inference_s = time.perf_counter() - started
+
+        METRICS.observe_request(_labels(model_name), info.duration, decode_s, inference_s,
+                                time.perf_counter() - t_request)
+
+        if key is not None:
+            await asyncio.to_thread(_transcript_cache.put, key, {
+                "segments": all_segments, "language": info.language, "duration": info.duration,
+            })
+        yield _sse("transcript.done", {
+            "text": " ".join(segment["text"] for segment in all_segments).strip(),
+            "language": info.language,
+            "duration": info.duration,
+            "segments": len(all_segments),
+        })
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+    finally:
+        if segments is not None:
+            # Queued behind any step still running on the inference thread;
+            # closing a finished generator is a no-op.
+            _inference_executor.submit(segments.close)
+
+
+def _note_cancelled(model_name: str, segments_done: int) -> None:
+    METRICS.cancelled.inc(**_labels(model_name))
+    print(f"Client disconnected — abandoned {model_name} transcription after {segments_done} segments")
+
+
+async def _until_disconnect(request: Request, cancel: threading.Event, work, model_name: str):
+    """Await the `work` coroutine, abandoning it if the client goes away first.
+
+    On disconnect, `cancel` is set so loops on the inference thread stop at
+    their next segment/chunk, and the awaiting task is cancelled so the model
+    lock and admission slot are released immediately for queued requests.
+    """
+    task = asyncio.ensure_future(work)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            cancel.set()
+            task.cancel()
+            _note_cancelled(model_name, 0)
+            # 499 (nginx's "client closed request"): nobody reads it, but it
+            # keeps the access log honest.
+            raise HTTPException(status_code=499, detail="Client disconnected")
+
+
+def _queue_full(e: QueueFull) -> HTTPException:
+    print(f"Admission queue full ({_admission.waiting()} waiting) — 429, retry after {e.retry_after}s")
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+async def _decode_or_400(file: UploadFile, profile: RequestProfile) -> tuple[np.ndarray, float]:
+    t_decode = time.perf_counter()
+    try:
+        audio = await asyncio.to_thread(profile.call, "decode", _decode_upload, file)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not decode audio: {e}")
+    return audio, time.perf_counter() - t_decode
+
+
+async def _transcribe_admitted(
+    audio: np.ndarray, model_name: str, language: Optional[str], words: bool,
+    response_format: Optional[str], accept: Optional[str], chunked: bool,
+    key: Optional[str], cache_status: Optional[str],
+    t_request: float, decode_s: float, admission_wait_s: float, cancel: threading.Event,
+    profile: RequestProfile,
+):
+    """Buffered (non-streaming) transcription of an admitted request.
+
+    Loops on the inference thread poll `cancel` (see _until_disconnect). When
+    profiled, the plain path splits inference into prepare (VAD, log-mel
+    features, language detection — all eager in transcribe()), encoder, and
+    decoder; the batched, chunked, and replica paths report it as one stage.
+    """
+    labels = _labels(model_name)
+    try:
+        duration = len(audio) / SAMPLE_RATE
+        chunked = chunked or 0 < WHISPER_CHUNKED_MIN_SECONDS <= duration
+        if _cpu_pool is not None:
+            # Replicas hold their own models, outside the registry and its lock.
+            queue_wait_s = 0.0
+            started = time.perf_counter()
+            all_segments, detected_language, duration = await _cpu_pool.transcribe(
+                model_name, audio, language, words, chunked,
+            )
+            inference_s = time.perf_counter() - started
+            profile.add("inference", inference_s)
+        elif chunked:
+            async with _timed_model_lock(model_name) as queue_wait_s:
+                profile.add("lock", queue_wait_s)
+                with profile.stage("load"):
+                    whisper = await _load_model(model_name)
+                started = time.perf_counter()
+                all_segments, detected_language = await _run_inference(
+                    profile.call, "inference", _transcribe_chunked, whisper, audio, language, words, cancel,
+                )
+                inference_s = time.perf_counter() - started
+                _touch(model_name)
+        elif _batch_queue is not None:
+            # Batched path: hand the decoded samples to _batch_worker.
+            future = asyncio.get_running_loop().create_future()
+            await _batch_queue.put(_BatchItem(
+                audio=audio, model=model_name, language=language, words=words, future=future,
+                enqueued=time.perf_counter(),
+            ))
+            all_segments, detected_language, queue_wait_s, inference_s = await future
+            profile.add("batch_wait", queue_wait_s)
+            profile.add("inference", inference_s)
+        else:
+            # Hold the lock across the whole transcription: the faster-whisper
+            # `segments` generator runs inference lazily as it is iterated, so a
+            # concurrent /unload must not tear the model down mid-iteration.
+            async with _timed_model_lock(model_name) as queue_wait_s:
+                profile.add("lock", queue_wait_s)
+                with profile.stage("load"):
+                    whisper = await _load_model(model_name)
+                started = time.perf_counter()
+
+                def run():
+                    # Transcribe with faster-whisper, then collect all segments
+                    # (drives the lazy generator to completion, or until the
+                    # client has gone away)
+                    t0 = time.perf_counter()
+                    segments, info = whisper.transcribe(audio, **_transcribe_options(language, words))
+                    profile.add("prepare", time.perf_counter() - t0)
+                    encoder_s = 0.0
+                    if profile.enabled:
+                        # generate_segments calls self.encode once per window;
+                        # shadow it on the instance for this request only (the
+                        # inference thread runs one request at a time).
+                        encode = whisper.encode
+
+                        def timed_encode(features):
+                            nonlocal encoder_s
+                            t = time.perf_counter()
+                            try:
+                                return encode(features)
+                            finally:
+                                encoder_s += time.perf_counter() - t
+
+                        whisper.encode = timed_encode
+                    t0 = time.perf_counter()
+                    collected = []
+                    try:
+                        for segment in segments:
+                            if cancel.is_set():
+                                segments.close()
+                                break
+                            collected.append(_segment_dict(segment))
+                    finally:
+                        if profile.enabled:
+                            del whisper.encode
+                    profile.add("encoder", encoder_s)
+                    profile.add("decoder", time.perf_counter() - t0 - encoder_s)
+                    return collected, info
+
+                all_segments, info = await _run_inference(profile.call, "inference", run)
+                inference_s = time.perf_counter() - started
+                _touch(model_name)
+            detected_language, duration = info.language, info.duration
+
+        METRICS.queue_wait.observe(admission_wait_s + queue_wait_s, **labels)
+        METRICS.observe_request(labels, duration, decode_s, inference_s, time.perf_counter() - t_request)
+
+        result = {"segments": all_segments, "language": detected_language, "duration": duration}
+        if key is not None:
+            await asyncio.to_thread(_transcript_cache.put, key, result)
+        return _respond(result, response_format, cache_status, accept, profile)
+
+    except VRAMUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/v1/audio/transcriptions")
 async def transcribe(
+    request: Request,
     file: UploadFile = File(...),
     model: Optional[str] = Form(None),
     language: Optional[str] = Form(None),
     response_format: Optional[str] = Form("json"),
+    stream: bool = Form(False),
+    chunked: bool = Form(False),
+    timestamp_granularities: Optional[list[str]] = Form(None, alias="timestamp_granularities[]"),
+    priority: Optional[str] = Form(None),
+    x_priority: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None),
 ):
     """
     Transcribe audio file using faster-whisper with CUDA.
 
-    OpenAI-compatible endpoint.
-    """
-    # Save uploaded file temporarily
-    suffix = Path(file.filename).suffix if file.filename else ".mp3"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    OpenAI-compatible endpoint. With stream=true the response is a
+    text/event-stream that emits each segment as soon as it is decoded
+    (response_format is ignored in that mode). chunked=true transcribes long
+    audio as parallel VAD chunks (ignored when streaming). When the transcript
+    cache is enabled, the X-Cache response header reports hit or miss.
+
+    timestamp_granularities[]=word adds word-level timestamps (verbose_json,
+    compact, and stream segment events). response_format=compact returns
+    columnar arrays instead of per-segment objects, as msgpack when the Accept
+    header asks for it.
 
+    Priority comes from the X-Priority header (or the `priority` form field):
+    "interactive" (default) or "batch". A full queue answers 429 with a
+    Retry-After header; cache hits never queue.
+
+    An X-Profile header (see profiling.py) returns per-stage timings in a
+    Server-Timing header; streams only carry the stages before the first byte.
+    """
+    t_request = time.perf_counter()
+    profile = request_profile(x_profile, WHISPER_PROFILE, WHISPER_PROFILE_SAMPLE_RATE, WHISPER_PROFILE_DIR)
+    if profile.enabled and (upload_s := upload_seconds(request.scope, t_request)) is not None:
+        profile.add("upload", upload_s)
     try:
-        global _last_used_monotonic
-        # Hold the lock across the whole transcription: the faster-whisper
-        # `segments` generator runs inference lazily as it is iterated, so a
-        # concurrent /unload must not tear the model down mid-iteration.
-        async with _model_lock:
-            whisper = _load_model_locked()
-
-            # Transcribe with faster-whisper
-            segments, info = whisper.transcribe(
-                tmp_path,
-                language=language if language else None,
-                beam_size=5,
-                vad_filter=True,  # Voice activity detection
-                vad_parameters=dict(min_silence_duration_ms=500),
-            )
+        priority_class = parse_priority(x_priority or priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    words = "word" in (timestamp_granularities or ())
+    model_name = resolve_model_name(model)
+    labels = _labels(model_name)
+    key = None
+    cache_status = None
+    if _transcript_cache is not None:
+        key = cache_key(
+            await asyncio.to_thread(profile.call, "hash", hash_upload, file.file),
+            model=model_name,
+            compute_type=COMPUTE_TYPE,
+            batched=_batch_queue is not None and _cpu_pool is None and not stream,
+            chunked=None if stream else (chunked, WHISPER_CHUNKED_MIN_SECONDS, WHISPER_CHUNK_SECONDS),
+            **_transcribe_options(language, words),
+        )
+        cached = await asyncio.to_thread(_transcript_cache.get, key)
+        METRICS.cache_requests.inc(result="hit" if cached is not None else "miss", **labels)
+        if cached is not None:
+            if stream:
+                return StreamingResponse(
+                    _replay_stream(cached),
+                    media_type="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Cache": "hit"},
+                )
+            return _respond(cached, response_format, "hit", accept, profile)
+        cache_status = "miss"
 
-            # Collect all segments (drives the lazy generator to completion)
-            all_segments = []
-            full_text = []
-
-            for segment in segments:
-                all_segments.append({
-                    "id": segment.id,
-                    "start": segment.start,
-                    "end": segment.end,
-                    "text": segment.text,
-                })
-                full_text.append(segment.text)
-
-            _last_used_monotonic = time.monotonic()
-
-        text = " ".join(full_text).strip()
-
-        if response_format == "text":
-            return text
-        elif response_format == "verbose_json":
-            return JSONResponse(content={
-                "text": text,
-                "segments": all_segments,
-                "language": info.language,
-                "duration": info.duration,
-            })
-        else:
-            return {"text": text}
+    if stream:
+        # Streams are admitted inside the body generator; only the depth check
+        # can still become an HTTP status.
+        if _admission.full():
+            raise _queue_full(QueueFull(_admission.retry_after()))
+        audio, decode_s = await _decode_or_400(file, profile)
+        headers = {"Cache-Control": "no-cache", **profile.headers()}
+        if cache_status:
+            headers["X-Cache"] = cache_status
+        return StreamingResponse(
+            _stream_transcription(
+                audio, model_name, language, key, t_request, decode_s, priority_class, words, request,
+            ),
+            media_type="text/event-stream",
+            headers=headers,
+        )
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        # Clean up temp file
-        os.unlink(tmp_path)
+    t_admit = time.perf_counter()
+    try:
+        async with _admission.slot(priority_class):
+            admission_wait_s = time.perf_counter() - t_admit
+            profile.add("admission", admission_wait_s)
+            # Decode only once admitted, so a deep queue doesn't hold every
+            # waiting upload as PCM.
+            audio, decode_s = await _decode_or_400(file, profile)
+            cancel = threading.Event()
+            return await _until_disconnect(request, cancel, _transcribe_admitted(
+                audio, model_name, language, words, response_format, accept, chunked, key, cache_status,
+                t_request, decode_s, admission_wait_s, cancel, profile,
+            ), model_name)
+    except QueueFull as e:
+        raise _queue_full(e)
 
 
 def main():
@@ -252,34 +1564,113 @@ def main():
     parser = argparse.ArgumentParser(description="LIMA Faster-Whisper Server (CUDA)")
     parser.add_argument("--port", type=int, default=9001, help="Port to run server on (default: 9001)")
     parser.add_argument("--host", type=str, default="0.0.0.0", help="Host to bind to (default: 0.0.0.0)")
-    parser.add_argument("--model", type=str, default=None, help="Whisper model to use (overrides env var)")
+    parser.add_argument("--model", type=str, default=None, help="Default Whisper model (overrides env var)")
+    parser.add_argument("--models", type=str, default=None,
+                        help="Comma-separated models requests may select (default: known registry names)")
+    parser.add_argument("--model-budget-mb", type=int, default=None,
+                        help="Keep several models resident within this many MB (0/unset = one model)")
     parser.add_argument("--device", type=str, default=None, choices=["cuda", "cpu"], help="Device to use (default: cuda)")
     parser.add_argument("--compute-type", type=str, default=None, choices=["float16", "int8", "int8_float16"],
                         help="Compute type for inference (default: float16)")
     parser.add_argument("--idle-timeout", type=int, default=None,
                         help="Unload model after N idle seconds (0/unset = disabled)")
+    parser.add_argument("--batch-window-ms", type=int, default=None,
+                        help="Batch requests arriving within N ms into one GPU run (0/unset = disabled)")
+    parser.add_argument("--max-batch", type=int, default=None,
+                        help="Maximum requests per batch (default: 8)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="30s windows per batched GPU forward pass (default: 16)")
+    parser.add_argument("--beam-size", type=int, default=None,
+                        help="Beam search width (default: 5; 1 = greedy)")
+    parser.add_argument("--vad-min-silence-ms", type=int, default=None,
+                        help="Silence that splits VAD speech regions, in ms (default: 500)")
+    parser.add_argument("--vad-threshold", type=float, default=None,
+                        help="Silero VAD speech probability threshold (default: 0.5)")
+    parser.add_argument("--chunked-min-seconds", type=int, default=None,
+                        help="Auto-chunk uploads at least this long (0/unset = only with chunked=true)")
+    parser.add_argument("--preload-poll-url", type=str, default=None,
+                        help="llama-swap root URL to poll; restores unloaded models once an LLM has run and stopped")
+    parser.add_argument("--cache-max-mb", type=int, default=None,
+                        help="Transcript cache size budget in MB (0 = disabled, default: 256)")
+    parser.add_argument("--cpu-replicas", type=int, default=None,
+                        help="With --device cpu, run N model replicas in worker processes (0/1/unset = off)")
+    parser.add_argument("--vram-headroom-mb", type=int, default=None,
+                        help="Free VRAM to keep beyond a model's footprint before loading it (0 = no guard, default: 512)")
+    parser.add_argument("--llama-swap-url", type=str, default=None,
+                        help="llama-swap root URL to ask for an LLM unload when VRAM is short")
+    parser.add_argument("--max-queue", type=int, default=None,
+                        help="Waiting requests before answering 429 (0 = unbounded, default: 32)")
 
     args = parser.parse_args()
 
     # Override globals if specified
-    global DEFAULT_MODEL, DEVICE, COMPUTE_TYPE, WHISPER_IDLE_TIMEOUT
+    global DEFAULT_MODEL, DEVICE, COMPUTE_TYPE, WHISPER_IDLE_TIMEOUT, WHISPER_BATCH_WINDOW_MS, WHISPER_MAX_BATCH
+    global WHISPER_CACHE_MAX_MB, WHISPER_CHUNKED_MIN_SECONDS, WHISPER_MODEL_BUDGET_MB, WHISPER_PRELOAD_POLL_URL
+    global WHISPER_MODELS
+    global WHISPER_MAX_QUEUE, WHISPER_CPU_REPLICAS, WHISPER_VRAM_HEADROOM_MB, WHISPER_LLAMA_SWAP_URL
+    global WHISPER_BATCH_SIZE, WHISPER_BEAM_SIZE, WHISPER_VAD_MIN_SILENCE_MS, WHISPER_VAD_THRESHOLD
     if args.model:
-        DEFAULT_MODEL = args.model
+        DEFAULT_MODEL = normalize_model_name(args.model)
+    if args.models is not None:
+        WHISPER_MODELS = [m.strip() for m in args.models.split(",") if m.strip()]
+    if args.model_budget_mb is not None:
+        WHISPER_MODEL_BUDGET_MB = args.model_budget_mb
     if args.device:
         DEVICE = args.device
     if args.compute_type:
         COMPUTE_TYPE = args.compute_type
     if args.idle_timeout is not None:
         WHISPER_IDLE_TIMEOUT = args.idle_timeout
+    if args.batch_window_ms is not None:
+        WHISPER_BATCH_WINDOW_MS = args.batch_window_ms
+    if args.max_batch:
+        WHISPER_MAX_BATCH = args.max_batch
+    if args.batch_size:
+        WHISPER_BATCH_SIZE = args.batch_size
+    if args.beam_size:
+        WHISPER_BEAM_SIZE = args.beam_size
+    if args.vad_min_silence_ms is not None:
+        WHISPER_VAD_MIN_SILENCE_MS = args.vad_min_silence_ms
+    if args.vad_threshold is not None:
+        WHISPER_VAD_THRESHOLD = args.vad_threshold
+    if args.chunked_min_seconds is not None:
+        WHISPER_CHUNKED_MIN_SECONDS = args.chunked_min_seconds
+    if args.preload_poll_url is not None:
+        WHISPER_PRELOAD_POLL_URL = args.preload_poll_url.rstrip("/")
+    if args.cache_max_mb is not None:
+        WHISPER_CACHE_MAX_MB = args.cache_max_mb
+    if args.max_queue is not None:
+        WHISPER_MAX_QUEUE = args.max_queue
+    if args.cpu_replicas is not None:
+        WHISPER_CPU_REPLICAS = args.cpu_replicas
+    if args.vram_headroom_mb is not None:
+        WHISPER_VRAM_HEADROOM_MB = args.vram_headroom_mb
+    if args.llama_swap_url is not None:
+        WHISPER_LLAMA_SWAP_URL = args.llama_swap_url.rstrip("/")
 
     print(f"=" * 60)
     print(f"LIMA Faster-Whisper Server (CUDA)")
     print(f"=" * 60)
     print(f"Host: {args.host}:{args.port}")
     print(f"Model: {DEFAULT_MODEL}")
+    print(f"Model budget: {f'{WHISPER_MODEL_BUDGET_MB}MB' if WHISPER_MODEL_BUDGET_MB > 0 else 'single model'}")
     print(f"Device: {DEVICE}")
     print(f"Compute type: {COMPUTE_TYPE}")
     print(f"Idle unload: {str(WHISPER_IDLE_TIMEOUT) + 's' if WHISPER_IDLE_TIMEOUT > 0 else 'disabled'}")
+    print(f"Transcript cache: {f'{WHISPER_CACHE_MAX_MB}MB' if WHISPER_CACHE_MAX_MB > 0 else 'disabled'}")
+    print(f"Batching: {f'{WHISPER_BATCH_WINDOW_MS}ms window, max {WHISPER_MAX_BATCH}, batch size {WHISPER_BATCH_SIZE}' if WHISPER_BATCH_WINDOW_MS > 0 else 'disabled'}")
+    print(f"Decoding: beam {WHISPER_BEAM_SIZE}, VAD threshold {WHISPER_VAD_THRESHOLD}, min silence {WHISPER_VAD_MIN_SILENCE_MS}ms")
+    print(f"Max queue: {WHISPER_MAX_QUEUE or 'unbounded'}")
+    if WHISPER_PROFILE or WHISPER_PROFILE_SAMPLE_RATE > 0:
+        print(f"Profiling: {'every request' if WHISPER_PROFILE else 'X-Profile requests'}, "
+              f"cProfile sample rate {WHISPER_PROFILE_SAMPLE_RATE} -> {WHISPER_PROFILE_DIR}")
+    if DEVICE == "cuda":
+        guard = f"{WHISPER_VRAM_HEADROOM_MB}MB headroom" if WHISPER_VRAM_HEADROOM_MB > 0 else "disabled"
+        if WHISPER_VRAM_HEADROOM_MB > 0 and WHISPER_LLAMA_SWAP_URL:
+            guard += f", unloads LLMs via {WHISPER_LLAMA_SWAP_URL}"
+        print(f"VRAM guard: {guard}")
+    if DEVICE == "cpu":
+        print(f"CPU replicas: {WHISPER_CPU_REPLICAS if WHISPER_CPU_REPLICAS > 1 else 'off (single model)'}")
     print(f"GPU: NVIDIA CUDA acceleration")
     print(f"=" * 60)
 
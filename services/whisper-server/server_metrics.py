@@ -0,0 +1,171 @@
+"""
+Minimal Prometheus-style metrics for the LIMA whisper servers.
+
+Just enough of the text exposition format (counters, gauges, histograms with
+labels) to size the box and catch regressions from a /metrics scrape, without
+adding prometheus_client to the server's dependency set. All metrics are
+labelled by model and compute_type.
+"""
+
+import threading
+from typing import Callable, Optional
+
+# Latency buckets (seconds): sub-second short memos up to multi-minute meetings.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+# Real-time factor buckets (audio seconds per wall second).
+RTF_BUCKETS = (1, 5, 10, 25, 50, 100, 200, 500)
+
+_lock = threading.Lock()
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{str(v)}"' for k, v in sorted(labels.items()))
+    return "{" + inner + "}"
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with _lock:
+            return [f"{self.name}{_labels(dict(k))} {_fmt(v)}" for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Gauge whose samples come from a callback at scrape time.
+
+    The callback returns (labels, value) pairs; reading live state at scrape
+    time avoids keeping a second copy of it in sync.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, collect: Callable[[], list[tuple[dict, float]]]):
+        super().__init__(name, help_text)
+        self._collect = collect
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{_labels(labels)} {_fmt(v)}" for labels, v in self._collect()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._series: dict[tuple, list] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = []
+        with _lock:
+            for key, series in self._series.items():
+                labels = dict(key)
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_labels({**labels, 'le': _fmt(bound)})} {count}")
+                lines.append(f"{self.name}_sum{_labels(labels)} {_fmt(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(labels)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        out = []
+        for metric in self._metrics:
+            out.extend(metric.header())
+            out.extend(metric.render())
+        return "\n".join(out) + "\n"
+
+
+class WhisperMetrics:
+    """The metric set both servers export."""
+
+    def __init__(self, resident_bytes: Callable[[], list[tuple[dict, float]]]):
+        r = self.registry = Registry()
+        self.queue_wait = r.register(Histogram(
+            "whisper_queue_wait_seconds", "Time from decoded upload to start of inference"))
+        self.decode = r.register(Histogram(
+            "whisper_decode_seconds", "Upload decode time (container/codec to PCM)"))
+        self.inference = r.register(Histogram(
+            "whisper_inference_seconds", "Model inference time per request"))
+        self.total = r.register(Histogram(
+            "whisper_request_seconds", "End-to-end transcription request latency"))
+        self.rtf = r.register(Histogram(
+            "whisper_realtime_factor", "Audio seconds transcribed per inference second", RTF_BUCKETS))
+        self.audio_seconds = r.register(Counter(
+            "whisper_audio_seconds_total", "Seconds of audio transcribed"))
+        self.lock_wait = r.register(Counter(
+            "whisper_lock_wait_seconds_total", "Time spent waiting to acquire the model lock"))
+        self.model_loads = r.register(Counter(
+            "whisper_model_loads_total", "Model loads"))
+        self.model_unloads = r.register(Counter(
+            "whisper_model_unloads_total", "Model unloads (explicit, idle, or eviction)"))
+        self.model_load_seconds = r.register(Histogram(
+            "whisper_model_load_seconds", "Model load duration"))
+        self.cache_requests = r.register(Counter(
+            "whisper_cache_requests_total", "Transcript cache lookups by result"))
+        self.vram_refusals = r.register(Counter(
+            "whisper_vram_refusals_total", "Model loads refused for lack of free VRAM"))
+        self.llm_unloads = r.register(Counter(
+            "whisper_llm_unload_requests_total", "llama-swap unloads requested to make room for whisper"))
+        self.cancelled = r.register(Counter(
+            "whisper_cancelled_requests_total", "Transcriptions abandoned because the client disconnected"))
+        self.resident = r.register(Gauge(
+            "whisper_model_resident_bytes", "Current resident model memory", resident_bytes))
+
+    def observe_request(self, labels: dict, audio_s: Optional[float], decode_s: float,
+                        inference_s: float, total_s: float) -> None:
+        """Record one completed transcription."""
+        self.decode.observe(decode_s, **labels)
+        self.inference.observe(inference_s, **labels)
+        self.total.observe(total_s, **labels)
+        if audio_s:
+            self.audio_seconds.inc(audio_s, **labels)
+            if inference_s > 0:
+                self.rtf.observe(audio_s / inference_s, **labels)
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -8,20 +8,31 @@ OpenAI-compatible API at /v1/audio/transcriptions
 """
 
 import asyncio
+import functools
 import gc
 import tempfile
 import os
 import argparse
+import shutil
+import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 from lightning_whisper_mlx import LightningWhisperMLX
-from fastapi import FastAPI, File, Form, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, Form, Header, Request, UploadFile, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
 
+from admission import AdmissionQueue, QueueFull, parse_priority
+from profiling import ArrivalStamp, request_profile, upload_seconds
+from server_metrics import WhisperMetrics
+from transcript_cache import DEFAULT_PATH as DEFAULT_CACHE_PATH, TranscriptCache, cache_key, hash_upload
+
 # Model configuration
 # Available: tiny, base, small, medium, large, large-v2, large-v3
 # Distilled: distil-small.en, distil-medium.en, distil-large-v2, distil-large-v3
@@ -40,6 +51,8 @@ def normalize_model_name(model: str) -> str:
 
 DEFAULT_MODEL = normalize_model_name(os.environ.get("WHISPER_MODEL", "base"))
 BATCH_SIZE = int(os.environ.get("WHISPER_BATCH_SIZE", "12"))
+# lightning-whisper-mlx runs unquantized (quant=None), i.e. float16 weights.
+COMPUTE_TYPE = "float16"
 
 # Seconds of inactivity after which the model is unloaded (0/unset = disabled).
 # See server_cuda.py for the rationale. On Apple Silicon the GPU shares system
@@ -48,11 +61,65 @@ BATCH_SIZE = int(os.environ.get("WHISPER_BATCH_SIZE", "12"))
 # real Metal reclamation on macOS hardware is unverified.
 WHISPER_IDLE_TIMEOUT = int(os.environ.get("WHISPER_IDLE_TIMEOUT", "0") or "0")
 
+# Content-hash transcript cache (see transcript_cache.py and server_cuda.py).
+WHISPER_CACHE_MAX_MB = int(os.environ.get("WHISPER_CACHE_MAX_MB", "256") or "0")
+WHISPER_CACHE_PATH = os.environ.get("WHISPER_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+
+# Admission control (see admission.py and server_cuda.py): interactive requests
+# are admitted ahead of batch ones, one in flight per class unless overridden,
+# and 429 + Retry-After once WHISPER_MAX_QUEUE requests are waiting.
+WHISPER_MAX_QUEUE = int(os.environ.get("WHISPER_MAX_QUEUE", "32") or "0")
+WHISPER_INTERACTIVE_CONCURRENCY = int(os.environ.get("WHISPER_INTERACTIVE_CONCURRENCY", "1") or "1")
+WHISPER_BATCH_CONCURRENCY = int(os.environ.get("WHISPER_BATCH_CONCURRENCY", "1") or "1")
+
+# Opt-in profiling (see profiling.py and server_cuda.py): X-Profile header or
+# WHISPER_PROFILE=1 for Server-Timing stage timings, sampled cProfile dumps.
+WHISPER_PROFILE = os.environ.get("WHISPER_PROFILE", "0") == "1"
+WHISPER_PROFILE_SAMPLE_RATE = float(os.environ.get("WHISPER_PROFILE_SAMPLE_RATE", "0") or "0")
+WHISPER_PROFILE_DIR = Path(os.environ.get(
+    "WHISPER_PROFILE_DIR", str(Path.home() / ".cache" / "lima-whisper" / "profiles")))
+
 # Lazy-load model on first request. Load/unload transitions are serialized by
 # _model_lock so concurrent requests can't double-load or hit a mid-teardown model.
 _whisper_model = None
 _model_lock = asyncio.Lock()
 _last_used_monotonic: Optional[float] = None
+_transcript_cache: Optional[TranscriptCache] = None
+_admission: Optional[AdmissionQueue] = None  # created in lifespan
+
+# Loads and inference run on one dedicated thread so the event loop keeps
+# serving /health, /metrics, and /unload mid-transcription (see server_cuda.py).
+# Always the same thread, so MLX's per-thread default stream doesn't change
+# between load and inference.
+_inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper-inference")
+
+
+async def _run_inference(fn, *args, **kwargs):
+    """Run a blocking model call on the inference thread and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_inference_executor, functools.partial(fn, *args, **kwargs))
+
+
+def _labels() -> dict:
+    # A function, not a constant: main() may override DEFAULT_MODEL after import.
+    return {"model": DEFAULT_MODEL, "compute_type": COMPUTE_TYPE}
+
+
+def _resident_bytes() -> list[tuple[dict, float]]:
+    """MLX active memory while the model is loaded (best-effort across mlx versions)."""
+    if _whisper_model is None:
+        return []
+    try:
+        import mlx.core as mx
+        get = getattr(mx, "get_active_memory", None) or getattr(getattr(mx, "metal", None), "get_active_memory", None)
+        if get is not None:
+            return [(_labels(), float(get()))]
+    except Exception:
+        pass
+    return []
+
+
+METRICS = WhisperMetrics(_resident_bytes)
 
 
 def _load_model_locked():
@@ -60,12 +127,16 @@ def _load_model_locked():
     global _whisper_model
     if _whisper_model is None:
         print(f"Loading model: {DEFAULT_MODEL} (batch_size={BATCH_SIZE})")
+        t0 = time.perf_counter()
         _whisper_model = LightningWhisperMLX(
             model=DEFAULT_MODEL,
             batch_size=BATCH_SIZE,
             quant=None,  # No quantization for best quality
         )
-        print("Model loaded successfully")
+        load_s = time.perf_counter() - t0
+        METRICS.model_loads.inc(**_labels())
+        METRICS.model_load_seconds.observe(load_s, **_labels())
+        print(f"Model loaded successfully ({load_s:.1f}s)")
     return _whisper_model
 
 
@@ -85,6 +156,7 @@ def _unload_model_locked() -> bool:
     _whisper_model = None
     del model
     gc.collect()
+    METRICS.model_unloads.inc(**_labels())
     try:
         import mlx.core as mx
         clear = getattr(mx, "clear_cache", None) or getattr(getattr(mx, "metal", None), "clear_cache", None)
@@ -116,6 +188,14 @@ async def lifespan(app: FastAPI):
         f"Configured: model={DEFAULT_MODEL} batch_size={BATCH_SIZE}"
         f" idle_timeout={WHISPER_IDLE_TIMEOUT or 'off'} (lazy-load on first request)"
     )
+    global _admission, _transcript_cache
+    _admission = AdmissionQueue(
+        {"interactive": WHISPER_INTERACTIVE_CONCURRENCY, "batch": WHISPER_BATCH_CONCURRENCY},
+        WHISPER_MAX_QUEUE,
+    )
+    if WHISPER_CACHE_MAX_MB > 0:
+        _transcript_cache = TranscriptCache(WHISPER_CACHE_PATH, WHISPER_CACHE_MAX_MB * 1024 * 1024)
+        print(f"Transcript cache: {WHISPER_CACHE_PATH} (max {WHISPER_CACHE_MAX_MB}MB)")
     task = None
     if WHISPER_IDLE_TIMEOUT > 0:
         print(f"Idle unload enabled: model unloads after {WHISPER_IDLE_TIMEOUT}s idle")
@@ -133,6 +213,7 @@ app = FastAPI(
     version="0.3.0",
     lifespan=lifespan,
 )
+app.add_middleware(ArrivalStamp)
 
 
 @app.get("/health")
@@ -141,7 +222,10 @@ async def health():
     return {
         "status": "ok",
         "model": DEFAULT_MODEL,
+        "compute_type": COMPUTE_TYPE,
         "model_loaded": _whisper_model is not None,
+        "cache_enabled": _transcript_cache is not None,
+        "queue": _admission.stats() if _admission else None,
     }
 
 
@@ -153,6 +237,30 @@ async def unload():
     return {"unloaded": unloaded}
 
 
+@app.post("/preload")
+async def preload():
+    """Load the model now so the next transcription skips the load. See server_cuda.py."""
+    async with _model_lock:
+        already = _whisper_model is not None
+        t0 = time.perf_counter()
+        await _run_inference(_load_model_locked)
+    return {"model": DEFAULT_MODEL, "already_loaded": already, "load_seconds": round(time.perf_counter() - t0, 3)}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text-format metrics. See server_metrics.py."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/cache/purge")
+async def purge_cache():
+    """Drop every cached transcript."""
+    if _transcript_cache is None:
+        raise HTTPException(status_code=404, detail="Transcript cache is disabled")
+    return {"purged": await asyncio.to_thread(_transcript_cache.purge)}
+
+
 @app.get("/v1/models")
 async def list_models():
     """List available models."""
@@ -170,56 +278,250 @@ async def list_models():
     }
 
 
+SAMPLE_RATE = 16000
+
+
+# ffmpeg stderr lines that mean the container needs a seekable input (index
+# at the end of an m4a/mov without faststart), not that the audio is bad.
+SEEK_FAILURE_MARKERS = ("moov atom not found", "partial file", "Illegal seek")
+
+
+class FfmpegError(RuntimeError):
+    """ffmpeg exited non-zero; the message is its last stderr line."""
+
+    def __init__(self, returncode: int, stderr: str):
+        lines = stderr.strip().splitlines()
+        super().__init__(lines[-1] if lines else f"ffmpeg exited with {returncode}")
+        self.stderr = stderr
+
+    @property
+    def needs_seek(self) -> bool:
+        return any(marker in self.stderr for marker in SEEK_FAILURE_MARKERS)
+
+
+def _ffmpeg_decode(source, input_arg: str, pass_fds: tuple = ()) -> np.ndarray:
+    """Run ffmpeg to 16kHz mono s16le and return float32 samples.
+
+    `source` is a file object streamed into ffmpeg's stdin from a helper
+    thread (so the upload is never materialized as one bytes object), or None
+    when `input_arg` is a path ffmpeg reads itself. Raises FfmpegError.
+    """
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", input_arg,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-",
+    ]
+    proc = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE if source is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        pass_fds=pass_fds,
+    )
+
+    def feed():
+        try:
+            shutil.copyfileobj(source, proc.stdin)
+        except BrokenPipeError:
+            pass  # ffmpeg gave up early; its exit status carries the error
+        finally:
+            proc.stdin.close()
+
+    feeder = None
+    if source is not None:
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+    # Drain stderr concurrently so a chatty ffmpeg can't block on a full pipe.
+    stderr_chunks = []
+    drain = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+    drain.start()
+    pcm = proc.stdout.read()
+    proc.wait()
+    drain.join()
+    if feeder is not None:
+        feeder.join()
+    if proc.returncode != 0:
+        raise FfmpegError(proc.returncode, b"".join(stderr_chunks).decode(errors="replace"))
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+
+NPY_MAGIC = b"\x93NUMPY"
+
+
+def _read_pcm(fileobj) -> Optional[np.ndarray]:
+    """Samples from a raw-PCM .npy upload, or None if the upload isn't one.
+
+    Benchmarks (scripts/pcm_cache.py) upload audio already decoded to 16kHz
+    mono float32 so their timings exclude the codec; the sample rate can't be
+    checked and is the client's responsibility. allow_pickle stays off, so only
+    plain numeric arrays are accepted.
+    """
+    fileobj.seek(0)
+    if fileobj.read(len(NPY_MAGIC)) != NPY_MAGIC:
+        fileobj.seek(0)
+        return None
+    fileobj.seek(0)
+    audio = np.lib.format.read_array(fileobj, allow_pickle=False)
+    if audio.ndim != 1 or audio.size == 0:
+        raise ValueError(f"PCM upload must be a non-empty 1-D array, got shape {audio.shape}")
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) / 32768.0
+    if audio.dtype.kind != "f":
+        raise ValueError(f"PCM upload must be float32 or int16 samples, got {audio.dtype}")
+    return audio.astype(np.float32, copy=False)
+
+
+def _decode_upload(file: UploadFile) -> np.ndarray:
+    """Decode the upload to a float32 array without the temp-file round-trip.
+
+    The multipart parser's spooled file is piped straight into ffmpeg. A pipe
+    can't seek, so containers that keep their index at the end (m4a/mov
+    without faststart) fail there; only that failure (see FfmpegError.needs_seek)
+    retries with a seekable input. Any other ffmpeg error is raised as-is and
+    answered with 400 rather than decoded a second time.
+    lightning-whisper-mlx accepts the resulting array in place of a path.
+
+    A .npy upload of 16kHz mono samples skips decoding (see _read_pcm).
+    """
+    pcm = _read_pcm(file.file)
+    if pcm is not None:
+        return pcm
+    file.file.seek(0)
+    try:
+        return _ffmpeg_decode(file.file, "pipe:0")
+    except FfmpegError as e:
+        if not e.needs_seek:
+            raise
+    return _decode_seekable(file)
+
+
+def _decode_seekable(file: UploadFile) -> np.ndarray:
+    """Decode from a seekable copy of the upload.
+
+    Uploads over the spool limit (1MB, most phone memos) are already in an
+    anonymous temp file; ffmpeg reads that through /dev/fd instead of a second
+    copy. Smaller ones live in memory and are written to a temp file.
+    """
+    spool = file.file
+    if getattr(spool, "_rolled", False):
+        spool.flush()
+        spool.seek(0)
+        fd = spool.fileno()
+        return _ffmpeg_decode(None, f"/dev/fd/{fd}", pass_fds=(fd,))
+    spool.seek(0)
+    suffix = Path(file.filename).suffix if file.filename else ".mp3"
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+        shutil.copyfileobj(spool, tmp)
+        tmp.flush()
+        return _ffmpeg_decode(None, tmp.name)
+
+
 @app.post("/v1/audio/transcriptions")
 async def transcribe(
+    request: Request,
     file: UploadFile = File(...),
     model: Optional[str] = Form(None),
     language: Optional[str] = Form(None),
     response_format: Optional[str] = Form("json"),
+    priority: Optional[str] = Form(None),
+    x_priority: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None),
 ):
     """
     Transcribe audio file using Lightning Whisper MLX.
 
-    OpenAI-compatible endpoint.
+    OpenAI-compatible endpoint. When the transcript cache is enabled, the
+    X-Cache response header reports hit or miss. Priority ("interactive" or
+    "batch") comes from the X-Priority header or `priority` form field; a full
+    queue answers 429 with Retry-After. An X-Profile header returns per-stage
+    timings in a Server-Timing header (see profiling.py).
     """
-    # Save uploaded file temporarily
-    suffix = Path(file.filename).suffix if file.filename else ".mp3"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    t_request = time.perf_counter()
+    profile = request_profile(x_profile, WHISPER_PROFILE, WHISPER_PROFILE_SAMPLE_RATE, WHISPER_PROFILE_DIR)
+    if profile.enabled and (upload_s := upload_seconds(request.scope, t_request)) is not None:
+        profile.add("upload", upload_s)
+    try:
+        priority_class = parse_priority(x_priority or priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    key = None
+    cached = None
+    if _transcript_cache is not None:
+        key = cache_key(
+            await asyncio.to_thread(profile.call, "hash", hash_upload, file.file),
+            model=DEFAULT_MODEL,
+            batch_size=BATCH_SIZE,
+            language=language,
+        )
+        cached = await asyncio.to_thread(_transcript_cache.get, key)
+        METRICS.cache_requests.inc(result="hit" if cached is not None else "miss", **_labels())
 
     try:
         global _last_used_monotonic
-        # Hold the lock across transcription so a concurrent /unload can't tear
-        # the model down mid-inference.
-        async with _model_lock:
-            whisper = _load_model_locked()
-            # Pass language parameter if specified, otherwise auto-detect
-            transcribe_args = {"audio_path": tmp_path}
-            if language:
-                transcribe_args["language"] = language
-            result = whisper.transcribe(**transcribe_args)
-            _last_used_monotonic = time.monotonic()
-
-        text = result.get("text", "")
-
-        if response_format == "text":
-            return text
-        elif response_format == "verbose_json":
-            return JSONResponse(content={
-                "text": text,
+        if cached is not None:
+            result = cached
+        else:
+            t_admit = time.perf_counter()
+            async with _admission.slot(priority_class):
+                admission_wait = time.perf_counter() - t_admit
+                profile.add("admission", admission_wait)
+                t_decode = time.perf_counter()
+                try:
+                    audio = await asyncio.to_thread(profile.call, "decode", _decode_upload, file)
+                except Exception as e:
+                    raise HTTPException(status_code=400, detail=f"Could not decode audio: {e}")
+                decode_s = time.perf_counter() - t_decode
+
+                # Hold the lock across transcription so a concurrent /unload can't tear
+                # the model down mid-inference.
+                t_wait = time.perf_counter()
+                async with _model_lock:
+                    waited = time.perf_counter() - t_wait
+                    profile.add("lock", waited)
+                    METRICS.lock_wait.inc(waited, **_labels())
+                    METRICS.queue_wait.observe(admission_wait + waited, **_labels())
+                    whisper = await _run_inference(profile.call, "load", _load_model_locked)
+                    started = time.perf_counter()
+                    # Pass language parameter if specified, otherwise auto-detect
+                    transcribe_args = {"audio_path": audio}
+                    if language:
+                        transcribe_args["language"] = language
+                    result = await _run_inference(profile.call, "inference", whisper.transcribe, **transcribe_args)
+                    inference_s = time.perf_counter() - started
+                    _last_used_monotonic = time.monotonic()
+
+            METRICS.observe_request(_labels(), len(audio) / SAMPLE_RATE, decode_s, inference_s,
+                                    time.perf_counter() - t_request)
+
+            result = {
+                "text": result.get("text", ""),
                 "segments": result.get("segments", []),
                 "language": result.get("language", language),
-            })
-        else:
-            return {"text": text}
-
+            }
+            if key is not None:
+                await asyncio.to_thread(_transcript_cache.put, key, result)
+
+        headers = {}
+        if key is not None:
+            headers["X-Cache"] = "hit" if cached is not None else "miss"
+        text = result["text"]
+
+        with profile.stage("serialize"):
+            if response_format == "text":
+                response = JSONResponse(content=text)
+            elif response_format == "verbose_json":
+                response = JSONResponse(content=result)
+            else:
+                response = JSONResponse(content={"text": text})
+        # After the serialize stage, so Server-Timing includes it
+        response.headers.update({**headers, **profile.headers()})
+        return response
+
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        # Clean up temp file
-        os.unlink(tmp_path)
 
 
 def main():
@@ -231,17 +533,25 @@ def main():
     parser.add_argument("--batch-size", type=int, default=None, help="Batch size for inference (default: 12)")
     parser.add_argument("--idle-timeout", type=int, default=None,
                         help="Unload model after N idle seconds (0/unset = disabled)")
+    parser.add_argument("--cache-max-mb", type=int, default=None,
+                        help="Transcript cache size budget in MB (0 = disabled, default: 256)")
+    parser.add_argument("--max-queue", type=int, default=None,
+                        help="Waiting requests before answering 429 (0 = unbounded, default: 32)")
 
     args = parser.parse_args()
 
     # Override globals if specified
-    global DEFAULT_MODEL, BATCH_SIZE, WHISPER_IDLE_TIMEOUT
+    global DEFAULT_MODEL, BATCH_SIZE, WHISPER_IDLE_TIMEOUT, WHISPER_CACHE_MAX_MB, WHISPER_MAX_QUEUE
     if args.model:
         DEFAULT_MODEL = args.model
     if args.batch_size:
         BATCH_SIZE = args.batch_size
     if args.idle_timeout is not None:
         WHISPER_IDLE_TIMEOUT = args.idle_timeout
+    if args.cache_max_mb is not None:
+        WHISPER_CACHE_MAX_MB = args.cache_max_mb
+    if args.max_queue is not None:
+        WHISPER_MAX_QUEUE = args.max_queue
 
     print(f"=" * 60)
     print(f"LIMA Lightning Whisper MLX Server")
@@ -250,6 +560,8 @@ def main():
     print(f"Model: {DEFAULT_MODEL}")
     print(f"Batch size: {BATCH_SIZE}")
     print(f"Idle unload: {str(WHISPER_IDLE_TIMEOUT) + 's' if WHISPER_IDLE_TIMEOUT > 0 else 'disabled'}")
+    print(f"Transcript cache: {f'{WHISPER_CACHE_MAX_MB}MB' if WHISPER_CACHE_MAX_MB > 0 else 'disabled'}")
+    print(f"Max queue: {WHISPER_MAX_QUEUE or 'unbounded'}")
     print(f"GPU: Apple Silicon Metal acceleration")
     print(f"=" * 60)
 
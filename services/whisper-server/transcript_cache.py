@@ -0,0 +1,111 @@
+"""
+On-disk transcript cache shared by the LIMA whisper servers.
+
+Keyed on the SHA-256 of the uploaded audio bytes plus every parameter that
+changes the output (model, compute type, language, beam/VAD settings, ...), so
+re-dropping or re-processing the same memo returns the stored transcript
+instead of paying for inference again. Stored in SQLite (stdlib) with
+least-recently-used eviction once the payload total exceeds the size budget.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+DEFAULT_PATH = Path.home() / ".cache" / "lima-whisper" / "transcripts.sqlite3"
+
+
+def hash_upload(fileobj: BinaryIO, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a (spooled) upload, read in chunks; rewinds it afterwards."""
+    fileobj.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def cache_key(audio_sha256: str, **params) -> str:
+    """Combine the audio hash with the output-affecting parameters."""
+    material = json.dumps({"audio": audio_sha256, **params}, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class TranscriptCache:
+    """Size-bounded LRU transcript store.
+
+    One connection guarded by a lock: lookups are a single indexed row, so
+    serializing them costs nothing next to a transcription, and the servers
+    can call in from executor threads.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcripts ("
+            " key TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS transcripts_lru ON transcripts (last_used)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached result and mark it most recently used, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM transcripts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE transcripts SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, result: dict) -> None:
+        """Store a result, then evict least-recently-used rows over budget."""
+        payload = json.dumps(result, ensure_ascii=False)
+        size = len(payload.encode())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts (key, payload, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, payload, size, time.time()),
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+            if total > self.max_bytes:
+                evicted = 0
+                for old_key, old_size in self._conn.execute(
+                    "SELECT key, size FROM transcripts ORDER BY last_used"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM transcripts WHERE key = ?", (old_key,))
+                    total -= old_size
+                    evicted += 1
+                print(f"Transcript cache over budget — evicted {evicted} entries")
+            self._conn.commit()
+
+    def purge(self) -> int:
+        """Delete every entry; returns how many were removed."""
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM transcripts").rowcount
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts"
+            ).fetchone()
+        return {"entries": entries, "bytes": total, "max_bytes": self.max_bytes, "path": str(self.path)}